@@ -0,0 +1,107 @@
+import threading
+
+import pandas as pd
+
+
+# --------------------------------------------------------
+# ÖZET TABLO (ay × ödeme × durum × iş türü × ilçe)
+# --------------------------------------------------------
+DIMENSIONS = ["Ay", "Ödeme Durumu", "Durum", "İş Türü", "İlçe"]
+
+
+def summarize(jobs):
+    """Parsed jobs -> job count ("size") and Ücret sum per DIMENSIONS cell."""
+    keys = pd.DataFrame(index=jobs.index)
+    keys["Ay"] = jobs["Tarih"].dt.strftime("%Y-%m").fillna("")
+    for col in DIMENSIONS[1:]:
+        keys[col] = jobs[col].astype(object).where(jobs[col].notna(), "") if col in jobs.columns else ""
+    keys["Ücret"] = jobs["Ücret"].fillna(0)
+    return keys.groupby(DIMENSIONS, sort=False)["Ücret"].agg(["size", "sum"])
+
+
+class JobAggregates:
+    """Job counts and Ücret sums per DIMENSIONS cell, kept up to date row by row.
+
+    Subscribe it to a SheetMirror: the initial build is one groupby over
+    the parsed frame, after that only appended, edited or deleted rows are
+    folded in. Every query works on the cells, whose number grows with the
+    months in the data rather than with the number of jobs. Cells of
+    archived jobs (see archive.py) are added with set_archive().
+    """
+
+    def __init__(self, parse):
+        self.parse = parse  # raw sheet frame -> parsed jobs frame
+        self._lock = threading.Lock()
+        self._cells = {}
+        self._archive = None
+        self._table = None
+
+    # ---------------- maintenance ----------------
+    def _fold(self, raw, sign):
+        for key, (count, total) in summarize(self.parse(raw)).iterrows():
+            cell = self._cells.setdefault(key, [0, 0.0])
+            cell[0] += sign * count
+            cell[1] += sign * total
+            if cell[0] <= 0:
+                del self._cells[key]
+
+    def rebuild(self, raw):
+        with self._lock:
+            self._cells = {}
+            if not raw.empty:
+                self._fold(raw, +1)
+            self._table = None
+
+    def rows_changed(self, columns, removed, added):
+        def frame(rows):
+            raw = pd.DataFrame(rows, columns=columns)
+            return raw.where(raw != "")
+
+        with self._lock:
+            if removed:
+                self._fold(frame(removed), -1)
+            if added:
+                self._fold(frame(added), +1)
+            self._table = None
+
+    def set_archive(self, table):
+        """Precomputed cells (DIMENSIONS + Adet, Ücret) of jobs no longer in the sheet."""
+        with self._lock:
+            self._archive = table
+            self._table = None
+
+    # ---------------- queries ----------------
+    def table(self, year=None, month=None):
+        """Cells as a frame (DIMENSIONS + Adet, Ücret), optionally for one year/month."""
+        with self._lock:
+            if self._table is None:
+                rows = [(*key, count, total) for key, (count, total) in self._cells.items()]
+                table = pd.DataFrame(rows, columns=DIMENSIONS + ["Adet", "Ücret"])
+                if self._archive is not None and not self._archive.empty:
+                    table = (
+                        pd.concat([table, self._archive[DIMENSIONS + ["Adet", "Ücret"]]], ignore_index=True)
+                        .groupby(DIMENSIONS, as_index=False, sort=False)[["Adet", "Ücret"]].sum()
+                    )
+                self._table = table
+            table = self._table
+
+        if year is not None:
+            table = table[table["Ay"].str[:4] == str(year)]
+        if month is not None:
+            table = table[table["Ay"].str[5:7] == f"{int(month):02d}"]
+        return table
+
+    def totals(self, year=None, month=None):
+        t = self.table(year, month)
+        return {
+            "toplam": int(t["Adet"].sum()),
+            "bekleyen_is": int(t.loc[t["Durum"] != "Tamamlandı", "Adet"].sum()),
+            "bekleyen_odeme": float(t.loc[t["Ödeme Durumu"] == "Bekliyor", "Ücret"].sum()),
+            "odenen": float(t.loc[t["Ödeme Durumu"] == "Ödendi", "Ücret"].sum()),
+        }
+
+    def monthly(self, year=None, month=None, odeme="Ödendi"):
+        """Ücret per month (columns Ay, Ücret) for one payment state."""
+        t = self.table(year, month)
+        t = t[(t["Ödeme Durumu"] == odeme) & (t["Ay"] != "")]
+        return t.groupby("Ay", as_index=False)["Ücret"].sum().sort_values("Ay")
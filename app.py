@@ -1,24 +1,32 @@
 import streamlit as st
 import pandas as pd
 
+import time
+import functools
 from datetime import datetime, date
 
-# Google Sheets connection
-from streamlit_gsheets import GSheetsConnection
-
-# Charts
-import altair as alt
-
-# Exports / downloads
-import io
-import base64
-import xlsxwriter
-
-# PDF (reportlab)
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+# Data access
+from storage import RevisionProbe, RowConflict, open_storage
+from mirror import SheetMirror, frame_changes
+from cache import SharedCache
+from writequeue import WriteQueue
+from perf import InstrumentedStorage, PerfStats
+from scheduler import RequestScheduler
+from aggregates import JobAggregates
+from archive import JobArchive, closed_jobs
+from bulk_import import JOB_COLUMNS, read_upload, validate_jobs
+from cube import GROUPS, MEASURES, PERIODS, JobCube
+from search import JobSearchIndex
+from partitions import DatePartitions
+from receivables import AGING_BANDS, UNDATED, Receivables
+from users import UserTable
+from schema import DURUM_LIST, ID_COLUMN, IS_TURU_LIST, ODEME_DURUMU_LIST, ilce_mahalle_map, parse_jobs
+
+# Exports / downloads. altair (charts), reportlab and xlsxwriter are
+# imported on first use; `python bench.py --imports` shows what each costs.
+from exports import (
+    BackgroundReports, BatchProgress, StatementPool, bekleyen_pdf, statements_zip, table_html, xlsx_report,
+)
 
 
 # --------------------------------------------------------
@@ -162,21 +170,234 @@ h1, h2, h3 {
 )
 
 
-def html_table(df: pd.DataFrame) -> None:
-    """Render dataframe as light-gray HTML table."""
-    st.markdown(f'<div class="table-wrap">{df.to_html(index=False)}</div>', unsafe_allow_html=True)
+@st.cache_data(max_entries=500, show_spinner=False)
+def _table_html(df: pd.DataFrame) -> str:
+    return table_html(df)
+
+
+def _sorted(df: pd.DataFrame, col: str, descending: bool) -> pd.DataFrame:
+    try:
+        return df.sort_values(col, ascending=not descending, kind="stable")
+    except TypeError:  # mixed types, e.g. dates next to "" cells
+        return df.sort_values(col, ascending=not descending, kind="stable", key=lambda s: s.astype(str))
+
+
+def html_table(df: pd.DataFrame, key: str = None, page_size: int = 25) -> None:
+    """Render dataframe as light-gray HTML table.
+
+    With a `key` the table is paginated: only the selected page is turned
+    into HTML (cached per page) and sent, with sort and page controls.
+    """
+    if key is None:
+        with get_perf().span("to_html"):
+            html = table_html(df)
+        st.markdown(html, unsafe_allow_html=True)
+        return
+
+    pages = max(1, -(-len(df) // page_size))
+    page_key = f"{key}_sayfa"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+
+    c_sort, c_dir, c_page = st.columns([2, 1, 1])
+    sort_col = c_sort.selectbox("Sırala", ["—"] + list(df.columns), key=f"{key}_sirala")
+    descending = c_dir.toggle("Azalan", key=f"{key}_azalan")
+    page = c_page.number_input("Sayfa", min_value=1, max_value=pages, step=1, key=page_key)
+
+    with get_perf().span("to_html"):
+        if sort_col != "—":
+            df = _sorted(df, sort_col, descending)
+        start = (page - 1) * page_size
+        html = _table_html(df.iloc[start:start + page_size])
+    st.markdown(html, unsafe_allow_html=True)
+    st.caption(f"{len(df)} kayıt · sayfa {page}/{pages}")
+
+
+# --------------------------------------------------------
+# PERFORMANS ÖLÇÜMÜ
+# --------------------------------------------------------
+PERF_DUMP_DIR = "data"
+
+
+@st.cache_resource
+def get_perf():
+    """Rolling stage timings and API counters for the whole process (see the Performans page)."""
+    return PerfStats(window=500)
 
 
 # --------------------------------------------------------
-# GOOGLE SHEETS – BAĞLANTI
+# VERİ DEPOSU – BAĞLANTI
 # --------------------------------------------------------
+# `[storage]` in secrets.toml picks the backend: Google Sheets by default,
+# or backend = "sqlite" (path, latency, jitter, quota_per_minute) to run
+# without a Google account, e.g. for profiling. requests_per_minute, burst
+# and max_concurrency size the request scheduler in front of either one.
+def storage_config():
+    try:
+        return dict(st.secrets.get("storage", {}))
+    except FileNotFoundError:
+        return {}
+
+
+@st.cache_resource
+def get_storage():
+    """Process-wide storage: every API call is scheduled against the quota, then measured."""
+    config = storage_config()
+    return RequestScheduler(
+        InstrumentedStorage(open_storage(config), get_perf()),
+        requests_per_minute=float(config.get("requests_per_minute", 60)),
+        burst=int(config.get("burst", 10)),
+        max_concurrency=int(config.get("max_concurrency", 4)),
+    )
+
+
 try:
-    conn = st.connection("gsheets", type=GSheetsConnection)
+    get_storage()
 except Exception as e:
-    st.error("Google Sheets bağlantı hatası: " + str(e))
+    st.error("Veri deposu bağlantı hatası: " + str(e))
     st.stop()
 
 
+# --------------------------------------------------------
+# SAYFA1 – YEREL AYNA (arka planda senkronize)
+# --------------------------------------------------------
+MIRROR_PATH = "data/sayfa1.sqlite"
+MIRROR_SYNC_SECONDS = 5
+WRITE_QUEUE_PATH = "data/yazma_kuyrugu.sqlite"
+
+
+@st.cache_resource
+def get_revision_probe():
+    return RevisionProbe(get_storage(), min_interval=2)
+
+
+@st.cache_resource
+def get_write_queue():
+    """Saves are journaled here and sent to the sheet by a background thread."""
+    queue = WriteQueue(WRITE_QUEUE_PATH, get_storage())
+    queue.start()
+    return queue
+
+
+@st.cache_resource
+def get_mirror():
+    """Process-wide Sayfa1 mirror; the first session brings it up to date, then a thread keeps it fresh."""
+    mirror = SheetMirror(
+        MIRROR_PATH, get_storage(), worksheet="Sayfa1", interval=MIRROR_SYNC_SECONDS, queue=get_write_queue(),
+        id_column=ID_COLUMN, probe=get_revision_probe(),
+    )
+    mirror.sync()
+    mirror.start()
+    return mirror
+
+
+# --------------------------------------------------------
+# ORTAK VERİ ÖNBELLEĞİ (tüm oturumlar)
+# --------------------------------------------------------
+@st.cache_resource
+def get_shared_cache():
+    return SharedCache()
+
+
+def load_jobs():
+    """Parsed Sayfa1, shared by every session until the mirror's revision moves.
+
+    The frame is shared: copy it before mutating. `df.attrs["revision"]` is
+    the mirror revision it was parsed from.
+    """
+    mirror = get_mirror()
+    perf = get_perf()
+
+    def parse():
+        with perf.span("mirror_snapshot"):
+            revision, raw = mirror.snapshot()
+        with perf.span("parse"):
+            df = parse_jobs(raw)
+        df.attrs["revision"] = revision
+        return df
+
+    return get_shared_cache().get("Sayfa1", mirror.revision(), parse)
+
+
+@st.cache_resource
+def get_search_index():
+    return JobSearchIndex()
+
+
+def search_jobs(df, arama):
+    """Row positions in `df` matching the search text, best matches first."""
+    with get_perf().span("search"):
+        snapshot = get_shared_cache().get(
+            "Arama", df.attrs["revision"], lambda: get_search_index().refresh(df)
+        )
+        return snapshot.search(arama)
+
+
+def date_partitions(df):
+    """(year, month) -> row positions of `df`, built once per data revision."""
+    return get_shared_cache().get(
+        "Tarih", df.attrs["revision"], lambda: DatePartitions(df["Tarih"])
+    )
+
+
+def receivables(df):
+    """Aging bands and customer ledgers, built once per data revision and day."""
+    today = date.today()
+    return get_shared_cache().get(
+        "Alacak", (df.attrs["revision"], today), lambda: Receivables(df, today)
+    )
+
+
+@st.cache_resource
+def get_aggregates():
+    """KPI/revenue cells, folded forward by the mirror on every append, edit and sync."""
+    aggregates = JobAggregates(parse_jobs)
+    get_mirror().subscribe(aggregates)
+    return aggregates
+
+
+@st.cache_resource
+def get_cube():
+    """Location × İş Türü × Ödeme × month cube for the analysis page, folded forward like the aggregates."""
+    cube = JobCube(parse_jobs)
+    get_mirror().subscribe(cube)
+    return cube
+
+
+@st.cache_resource
+def get_archive():
+    return JobArchive(get_storage(), get_mirror())
+
+
+def archive_keep_years():
+    """Closed jobs of the current year and this many years before it stay in Sayfa1."""
+    try:
+        return int(st.secrets.get("archive", {}).get("keep_years", 1))
+    except FileNotFoundError:
+        return 1
+
+
+def load_archive_summary():
+    """Archive summary for the current revision; its cells are handed to the aggregates."""
+    def load():
+        summary = get_archive().summary()
+        get_aggregates().set_archive(summary.table())
+        get_cube().set_archive(summary.table())
+        return summary
+
+    return get_shared_cache().get("Arşiv", get_revision_probe().current(), load)
+
+
+def monthly_revenue_chart(aylik):
+    import altair as alt
+
+    return alt.Chart(aylik).mark_bar(cornerRadius=6).encode(
+        x="Ay:N",
+        y="Ücret:Q",
+        tooltip=["Ay", "Ücret"]
+    ).properties(height=300)
+
+
 # --------------------------------------------------------
 # LOGIN SESSION
 # --------------------------------------------------------
@@ -189,36 +410,35 @@ if "logged_in" not in st.session_state:
 # --------------------------------------------------------
 # USERS TABLOSU OKUMA
 # --------------------------------------------------------
+@st.cache_resource
+def get_users():
+    return UserTable(get_storage(), get_write_queue(), get_shared_cache())
+
+
 def load_users():
+    """Users sheet, shared by every session; re-read only when the spreadsheet revision moves."""
     try:
-        users_df = conn.read(worksheet="Users", ttl=5).fillna("")
-        users_df = users_df.astype(str)
-        for col in users_df.columns:
-            users_df[col] = users_df[col].str.strip()
-        return users_df
+        return get_users().load(get_revision_probe().current())
     except Exception as e:
         st.error(f"⚠️ Users sayfası okunamadı: {e}")
         st.stop()
 
 
+def load_credentials():
+    """Login index over the Users sheet, rebuilt only when the users themselves change."""
+    return get_users().credentials(load_users())
+
+
+def save_users(users_df):
+    """Queue the whole Users sheet for writing; until it lands, load_users serves the new frame."""
+    get_users().save(users_df)
+
+
 # --------------------------------------------------------
 # LOGIN KONTROLÜ
 # --------------------------------------------------------
 def check_login(username, password):
-    users = load_users()
-
-    username = str(username).strip().lower()
-    password = str(password).strip()
-
-    users["username"] = users["username"].astype(str).str.strip().str.lower()
-    users["password"] = (
-        users["password"].astype(str).str.strip().str.replace(".0", "", regex=False)
-    )
-
-    match = users[(users["username"] == username) & (users["password"] == password)]
-    if len(match) == 1:
-        return match.iloc[0]["role"]
-    return None
+    return load_credentials().check(username, password)
 
 
 # --------------------------------------------------------
@@ -245,91 +465,124 @@ if not st.session_state.logged_in:
     st.stop()
 
 
+# Everything below is timed per page; end_rerun() closes the "rerun" span.
+get_perf().set_page(st.session_state.page)
+RERUN_STARTED = time.perf_counter()
+
+
+def end_rerun():
+    get_perf().record("rerun", time.perf_counter() - RERUN_STARTED)
+    st.stop()
+
+
+def page_fragment(func=None, *, run_every=None):
+    """st.fragment whose reruns are timed under the session's page.
+
+    A fragment rerun runs on a new script thread that has no page set, so
+    the wrapper sets it again and times each run as "fragment.<name>".
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            get_perf().set_page(st.session_state.page)
+            with get_perf().span(f"fragment.{func.__name__}"):
+                return func(*args, **kwargs)
+        return st.fragment(run, run_every=run_every)
+    return decorate(func) if func is not None else decorate
+
+
 # --------------------------------------------------------
 # SAYFA1 VERİLERİNİ YÜKLE
 # --------------------------------------------------------
 try:
-    df = conn.read(worksheet="Sayfa1", ttl=5).fillna("")
-    df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce").dt.date
-    df["Tarih_Dt"] = pd.to_datetime(df["Tarih"], errors="coerce")
+    with get_perf().span("load"):
+        df = load_jobs()
+        load_archive_summary()
 except Exception as e:
     st.error("Google Sheets okuma hatası: " + str(e))
     st.stop()
 
 
-# --------------------------------------------------------
-# SABİT LİSTELER
-# --------------------------------------------------------
-IS_TURU_LIST = [
-    "Aplikasyon", "Yapı Aplikasyonu", "Ecri-misil", "Kübaj", "Tus",
-    "Kat İrtifağı", "Kat Mülkiyeti", "Cins Değişikliği", "İntikal",
-    "İfraz", "Yola Terk", "İhtas", "Tevhit", "Oturma Raporu Takip",
-    "Numarataj", "Zemin Tespit", "İmar Barışı (Kat Mülkiyeti)",
-    "Hatalı Bağımsız Düzeltme", "41 uygulaması", "Plankote"
-]
-
-DURUM_LIST = [
-    "Başvuru Alındı",
-    "Araziye gidildi",
-    "Evraklar hazırlanıyor",
-    "Tamamlandı"
-]
-
-df["Durum"] = df["Durum"].astype(str)
-df.loc[~df["Durum"].isin(DURUM_LIST), "Durum"] = "Başvuru Alındı"
-
-
 # --------------------------------------------------------
 # ANASAYFA DASHBOARD
 # --------------------------------------------------------
 def render_anasayfa(df):
     st.subheader("📌 Genel Durum Özeti")
 
-    bekleyen_is = df[df["Durum"] != "Tamamlandı"]
-    bekleyen_odeme = df[df["Ödeme Durumu"] == "Bekliyor"]
-    odenen = df[df["Ödeme Durumu"] == "Ödendi"]
+    perf = get_perf()
+    with perf.span("aggregate"):
+        aggregates = get_aggregates()
+        ozet = aggregates.totals()
+        aylik = aggregates.monthly()
 
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("📂 Bekleyen İş", len(bekleyen_is))
-    col2.metric("💰 Bekleyen Ödeme", f"{bekleyen_odeme['Ücret'].sum():,.0f} TL")
-    col3.metric("🟢 Ödenen Toplam", f"{odenen['Ücret'].sum():,.0f} TL")
-    col4.metric("📦 Toplam İş", len(df))
+    col1.metric("📂 Bekleyen İş", ozet["bekleyen_is"])
+    col2.metric("💰 Bekleyen Ödeme", f"{ozet['bekleyen_odeme']:,.0f} TL")
+    col3.metric("🟢 Ödenen Toplam", f"{ozet['odenen']:,.0f} TL")
+    col4.metric("📦 Toplam İş", ozet["toplam"])
 
     st.divider()
 
     st.subheader("📊 Aylık Gelir")
-    if not odenen.empty:
-        odenen = odenen.copy()
-        odenen["Ay"] = pd.to_datetime(odenen["Tarih"]).dt.to_period("M").astype(str)
-        aylik = odenen.groupby("Ay")["Ücret"].sum().reset_index()
-
-        chart = alt.Chart(aylik).mark_bar(cornerRadius=6).encode(
-            x="Ay:N",
-            y="Ücret:Q",
-            tooltip=["Ay", "Ücret"]
-        ).properties(height=300)
-
-        st.altair_chart(chart, use_container_width=True)
+    if not aylik.empty:
+        st.altair_chart(monthly_revenue_chart(aylik), use_container_width=True)
     else:
         st.info("Henüz ödenmiş iş yok.")
 
     st.divider()
 
     st.subheader("🟡 Bekleyen Son İşler")
-    tbl1 = bekleyen_is.sort_values("Tarih", ascending=False).head(10)[
-        ["Tarih", "Müşteri", "İş Türü", "Ada_Parsel", "Ücret"]
-    ].copy()
+    with perf.span("filter"):
+        bekleyen_is = df[df["Durum"] != "Tamamlandı"]
+        tbl1 = bekleyen_is.sort_values("Tarih", ascending=False).head(10)[
+            ["Tarih", "Müşteri", "İş Türü", "Ada_Parsel", "Ücret"]
+        ].copy()
     html_table(tbl1)
 
     st.divider()
 
     st.subheader("💸 Bekleyen Son Ödemeler")
-    tbl2 = bekleyen_odeme.sort_values("Tarih", ascending=False).head(10)[
-        ["Tarih", "Müşteri", "Ada_Parsel", "Ücret"]
-    ].copy()
+    with perf.span("filter"):
+        bekleyen_odeme = df[df["Ödeme Durumu"] == "Bekliyor"]
+        tbl2 = bekleyen_odeme.sort_values("Tarih", ascending=False).head(10)[
+            ["Tarih", "Müşteri", "Ada_Parsel", "Ücret"]
+        ].copy()
     html_table(tbl2)
 
 
+# --------------------------------------------------------
+# YAZMA KUYRUĞU DURUMU
+# --------------------------------------------------------
+def write_queue_status():
+    queue = get_write_queue()
+    bekleyen = queue.pending()
+    hatali = queue.failed()
+
+    if bekleyen:
+        st.caption(f"⏳ {bekleyen} değişiklik Google Sheets'e gönderiliyor")
+        if queue.last_error is not None:
+            st.caption(f"Yeniden denenecek: {queue.last_error}")
+    if hatali:
+        st.warning(f"⚠️ {len(hatali)} değişiklik gönderilemedi: {hatali[-1]['error']}")
+        st.caption("Bekletilen sayfalar: " + ", ".join(queue.blocked()) + " — sonraki değişiklikler sırada bekliyor")
+        c1, c2 = st.columns(2)
+        if c1.button("🔁 Tekrar dene"):
+            queue.retry_failed()
+            st.rerun()
+        # Discarding drops other users' changes too, so only admins may do it.
+        if st.session_state.role == "admin" and c2.button("🗑 Vazgeç"):
+            try:
+                queue.discard_failed()
+            except Exception as e:
+                st.error(f"⚠️ Vazgeçilemedi: {e}")
+                st.stop()
+            get_users().forget()
+            get_archive().forget()
+            get_shared_cache().invalidate("Arşiv")
+            get_mirror().sync(force=True)
+            st.rerun()
+
+
 # --------------------------------------------------------
 # SIDEBAR MENÜ
 # --------------------------------------------------------
@@ -349,14 +602,28 @@ with st.sidebar:
             st.session_state.page = "users"
             st.rerun()
 
+        if st.button("⏱ Performans"):
+            st.session_state.page = "performans"
+            st.rerun()
+
+        if st.button("🗄 Arşiv"):
+            st.session_state.page = "arsiv"
+            st.rerun()
+
     if st.button("💰 Ödeme Paneli"):
         st.session_state.page = "odeme"
         st.rerun()
 
+    if st.button("📈 Analiz"):
+        st.session_state.page = "analiz"
+        st.rerun()
+
     if st.button("🚪 Çıkış Yap"):
         st.session_state.logged_in = False
         st.rerun()
 
+    write_queue_status()
+
 
 # --------------------------------------------------------
 # SAYFA: KULLANICI YÖNETİMİ (ADMIN)
@@ -380,7 +647,7 @@ if st.session_state.page == "users":
     if st.button("Kaydet"):
         new_row = pd.DataFrame([{"username": u, "password": p, "role": r}])
         updated = pd.concat([users_df, new_row], ignore_index=True)
-        conn.update(worksheet="Users", data=updated)
+        save_users(updated)
         st.success("Kullanıcı eklendi ✔")
         st.rerun()
 
@@ -389,35 +656,219 @@ if st.session_state.page == "users":
 
     if st.button("❌ Sil"):
         updated = users_df[users_df["username"] != del_user]
-        conn.update(worksheet="Users", data=updated)
+        save_users(updated)
         st.success("Silindi ✔")
         st.rerun()
 
-    st.stop()
+    end_rerun()
+
+
+# --------------------------------------------------------
+# SAYFA: PERFORMANS (ADMIN)
+# --------------------------------------------------------
+if st.session_state.page == "performans":
+    if st.session_state.role != "admin":
+        st.error("Bu sayfa sadece admin kullanıcılar içindir!")
+        st.stop()
+
+    st.title("⏱ Performans")
+    perf = get_perf()
+
+    st.subheader("Aşama süreleri (son ölçümler)")
+    ozet = perf.summary()
+    if ozet.empty:
+        st.info("Henüz ölçüm yok.")
+    else:
+        sayfa = st.selectbox("Sayfa", ["Tümü"] + sorted(ozet["Sayfa"].unique()))
+        if sayfa != "Tümü":
+            ozet = ozet[ozet["Sayfa"] == sayfa]
+        html_table(ozet.round(1))
+
+    st.subheader("API çağrıları ve veri miktarı")
+    sayaclar = pd.DataFrame(
+        [(name, labels.get("op", ""), value) for name, labels, value in perf.counters()],
+        columns=["Sayaç", "İşlem", "Değer"],
+    )
+    if sayaclar.empty:
+        st.info("Henüz API çağrısı yok.")
+    else:
+        html_table(sayaclar)
+
+    st.subheader("İstek zamanlayıcı")
+    zamanlayici = get_storage().status()
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Sırada", zamanlayici["waiting"])
+    k2.metric("Çalışan", zamanlayici["active"])
+    k3.metric("Kalan kota", zamanlayici["tokens"])
+    k4.metric("Kota aşımı (429)", zamanlayici["throttled"])
+    k5.metric("Birleştirilen okuma", zamanlayici["merged"])
+
+    st.subheader("📤 Dışa aktar")
+    c1, c2, c3 = st.columns(3)
+    if c1.button("JSON olarak kaydet"):
+        st.success(f"Kaydedildi: {perf.dump(f'{PERF_DUMP_DIR}/perf.json')}")
+    if c2.button("Prometheus metni kaydet"):
+        st.success(f"Kaydedildi: {perf.dump(f'{PERF_DUMP_DIR}/perf.prom', fmt='prometheus')}")
+    if c3.button("Ölçümleri sıfırla"):
+        perf.reset()
+        st.rerun()
+
+    end_rerun()
+
+
+# --------------------------------------------------------
+# SAYFA: ARŞİV (ADMIN)
+# --------------------------------------------------------
+if st.session_state.page == "arsiv":
+    if st.session_state.role != "admin":
+        st.error("Bu sayfa sadece admin kullanıcılar içindir!")
+        st.stop()
+
+    st.title("🗄 Arşiv")
+    st.caption(
+        "Tamamlanmış ve ödenmiş eski işler Sayfa1'den yıllık arşiv sayfalarına taşınır. "
+        "Özet rakamlar ve gelir grafikleri arşivi de kapsar."
+    )
+
+    bu_yil = datetime.now().year
+    sinir_yil = st.number_input(
+        "Bu yıldan önceki kapanmış işleri arşivle",
+        min_value=2000, max_value=bu_yil, value=bu_yil - archive_keep_years(), step=1,
+    )
+    sinir = date(int(sinir_yil), 1, 1)
+    adaylar = closed_jobs(df, sinir)
+    st.metric("Arşivlenecek iş", len(adaylar))
+
+    if len(adaylar) and st.button("🗄 Arşivle", type="primary"):
+        with st.spinner("Arşivleniyor..."):
+            try:
+                adet, ozet = get_archive().archive(sinir)
+            except RowConflict as e:
+                st.warning(f"⚠️ {e}")
+                st.stop()
+        if ozet is not None:
+            get_aggregates().set_archive(ozet.table())
+            get_cube().set_archive(ozet.table())
+            get_shared_cache().put("Arşiv", get_revision_probe().current(), ozet)
+        st.success(f"{adet} iş arşivlendi ✔")
+        st.rerun()
+
+    st.subheader("Arşivdeki yıllar")
+    yillik = load_archive_summary().by_year()
+    if yillik.empty:
+        st.info("Arşiv boş.")
+    else:
+        html_table(yillik.rename(columns={"Adet": "İş Sayısı"}))
+
+    end_rerun()
 
 
 # --------------------------------------------------------
 # ÖDEME PANELİ
 # --------------------------------------------------------
-def render_odeme_paneli(conn):
-    st.title("💰 Ödeme Paneli")
+@st.cache_resource
+def get_background_reports():
+    return BackgroundReports(workers=2)
+
+
+@st.cache_resource
+def get_statement_pool():
+    """Worker processes for statement PDFs, shared by every batch and session."""
+    return StatementPool()
+
+
+@page_fragment(run_every=0.5)
+def pdf_hazirlaniyor(future):
+    """Polls the PDF job; a full rerun shows the download once it is done."""
+    if future.done():
+        st.rerun()
+    st.info("⏳ PDF hazırlanıyor...")
+
+
+@page_fragment
+def bekleyen_pdf_indir(pdf_key, bekleyen):
+    reports = get_background_reports()
+    future = reports.get(pdf_key)
+
+    if future is not None and future.done() and future.exception() is not None:
+        st.error(f"PDF oluşturulamadı: {future.exception()}")
+        future = None
+
+    if future is None:
+        if not st.button("📄 Bekleyen Ödemeler PDF hazırla"):
+            return
+        future = reports.submit(pdf_key, timed_pdf, get_perf().current_page(), bekleyen.copy())
+
+    if not future.done():
+        # Only the polling fragment reruns; the rest of the page stays usable.
+        pdf_hazirlaniyor(future)
+        return
+
+    st.download_button(
+        "📄 Bekleyen Ödemeleri PDF İndir",
+        data=future.result(),
+        file_name="bekleyen_odemeler.pdf",
+        mime="application/pdf"
+    )
 
-    dfp = conn.read(worksheet="Sayfa1", ttl=5).fillna("")
-    dfp["Tarih"] = pd.to_datetime(dfp["Tarih"], errors="coerce")
+
+def timed_pdf(page, bekleyen):
+    """bekleyen_pdf on a worker thread, timed under the page that asked for it."""
+    with get_perf().span("export_pdf", page=page):
+        return bekleyen_pdf(bekleyen)
+
+
+def timed_statements(page, statements, progress):
+    """statements_zip on a report thread; the PDFs themselves are built in worker processes."""
+    with get_perf().span("export_statements", page=page):
+        return statements_zip(statements, progress, get_statement_pool())
+
+
+@st.cache_data(max_entries=20, show_spinner="Excel raporu hazırlanıyor...")
+def odeme_raporu_xlsx(_df_f, revision, yil, ay, musteri):
+    """XLSX bytes for one filter selection; the frame itself is not hashed."""
+    with get_perf().span("export_xlsx"):
+        return xlsx_report(_df_f.drop(columns=[ID_COLUMN], errors="ignore"))
+
+
+@page_fragment
+def odeme_raporu_indir(df_f, rapor_key):
+    # Built only on request; the bytes are cached per filter combination.
+    if st.button("📊 Excel raporunu hazırla"):
+        st.session_state.xlsx_rapor_key = rapor_key
+
+    if st.session_state.get("xlsx_rapor_key") == rapor_key:
+        st.download_button(
+            "📊 Excel (XLSX) İndir",
+            data=odeme_raporu_xlsx(df_f, *rapor_key),
+            file_name="odeme_raporu.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+
+@page_fragment
+def odeme_paneli():
+    """Filters, figures and tables; a filter change reruns only this fragment."""
+    df = load_jobs()
 
     st.subheader("🔎 Filtreler")
     col_yil, col_ay, col_musteri = st.columns(3)
 
-    yillar = sorted(dfp["Tarih"].dt.year.dropna().unique())
-    aylar = ["Tümü"] + [f"{i:02d}" for i in range(1, 13)]
+    bolumler = date_partitions(df)
+    arsiv = load_archive_summary()
+    yillar = sorted(set(bolumler.years()) | set(arsiv.years()))
 
     sec_yil = col_yil.selectbox("Yıl", ["Tümü"] + list(map(str, yillar)))
-    sec_ay = col_ay.selectbox("Ay", aylar)
+    secili = None if sec_yil == "Tümü" else int(sec_yil)
+    aylar = sorted(set(bolumler.months(secili)) | set(arsiv.months(secili)))
+    if arsiv.months(secili):
+        st.caption("ℹ️ Arşivlenen işler tablolarda yer almaz; özet rakamlara ve grafiğe dahildir.")
+    sec_ay = col_ay.selectbox("Ay", ["Tümü"] + [f"{i:02d}" for i in aylar])
 
     musteriler = (
-        dfp["Müşteri"]
+        df["Müşteri"]
         .astype(str).str.strip()
-        .loc[dfp["Müşteri"].astype(str).str.strip() != ""]
+        .loc[df["Müşteri"].astype(str).str.strip() != ""]
         .unique()
     )
     musteriler = sorted(musteriler, key=str.lower)
@@ -428,90 +879,62 @@ def render_odeme_paneli(conn):
         index=0
     )
 
-    df_f = dfp.copy()
-    if sec_yil != "Tümü":
-        df_f = df_f[df_f["Tarih"].dt.year == int(sec_yil)]
-    if sec_ay != "Tümü":
-        df_f = df_f[df_f["Tarih"].dt.strftime("%m") == sec_ay]
-    if sec_musteri != "Tümü":
-        df_f = df_f[df_f["Müşteri"].astype(str).str.strip() == sec_musteri]
-
-    bekleyen = df_f[df_f["Ödeme Durumu"] == "Bekliyor"].copy()
-    odenen = df_f[df_f["Ödeme Durumu"] == "Ödendi"].copy()
-
-    today = datetime.now()
-    if not bekleyen.empty:
-        bekleyen["Gecikme (Gün)"] = (today - bekleyen["Tarih"]).dt.days
-    else:
-        bekleyen["Gecikme (Gün)"] = []
+    perf = get_perf()
+    with perf.span("filter"):
+        df_f = bolumler.select(
+            df,
+            None if sec_yil == "Tümü" else int(sec_yil),
+            None if sec_ay == "Tümü" else int(sec_ay),
+        )
+        if sec_musteri != "Tümü":
+            df_f = df_f[df_f["Müşteri"].astype(str).str.strip() == sec_musteri]
+
+        bekleyen = df_f[df_f["Ödeme Durumu"] == "Bekliyor"].copy()
+        odenen = df_f[df_f["Ödeme Durumu"] == "Ödendi"].copy()
+        bekleyen["Gecikme (Gün)"] = receivables(df).days.reindex(bekleyen.index)
+
+    # Without a customer filter the figures come from the aggregate cells.
+    with perf.span("aggregate"):
+        if sec_musteri == "Tümü":
+            aggregates = get_aggregates()
+            yil = None if sec_yil == "Tümü" else int(sec_yil)
+            ay = None if sec_ay == "Tümü" else int(sec_ay)
+            ozet = aggregates.totals(yil, ay)
+            aylik = aggregates.monthly(yil, ay)
+        else:
+            ozet = {
+                "bekleyen_odeme": bekleyen["Ücret"].sum(),
+                "odenen": odenen["Ücret"].sum(),
+                "toplam": len(df_f),
+            }
+            aylik = odenen.assign(Ay=odenen["Tarih"].dt.to_period("M").astype(str))
+            aylik = aylik.groupby("Ay")["Ücret"].sum().reset_index()
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("🟡 Bekleyen Tahsilat", f"{bekleyen['Ücret'].sum():,.0f} TL")
-    col2.metric("🟢 Ödenen Toplam", f"{odenen['Ücret'].sum():,.0f} TL")
-    col3.metric("📦 Kayıt Sayısı", len(df_f))
+    col1.metric("🟡 Bekleyen Tahsilat", f"{ozet['bekleyen_odeme']:,.0f} TL")
+    col2.metric("🟢 Ödenen Toplam", f"{ozet['odenen']:,.0f} TL")
+    col3.metric("📦 Kayıt Sayısı", ozet["toplam"])
 
     st.divider()
 
     st.subheader("📊 Aylık Gelir")
-    if not odenen.empty:
-        odenen = odenen.copy()
-        odenen["Ay"] = odenen["Tarih"].dt.to_period("M").astype(str)
-        aylik = odenen.groupby("Ay")["Ücret"].sum().reset_index()
-        chart = alt.Chart(aylik).mark_bar(cornerRadius=6).encode(
-            x="Ay:N",
-            y="Ücret:Q",
-            tooltip=["Ay", "Ücret"]
-        ).properties(height=300)
-        st.altair_chart(chart, use_container_width=True)
+    if not aylik.empty:
+        st.altair_chart(monthly_revenue_chart(aylik), use_container_width=True)
 
     st.subheader("🟡 Bekleyen Ödemeler")
     if not bekleyen.empty:
-        html_table(bekleyen[["Tarih", "Müşteri", "Ada_Parsel", "Ücret", "Gecikme (Gün)"]])
+        html_table(bekleyen[["Tarih", "Müşteri", "Ada_Parsel", "Ücret", "Gecikme (Gün)"]], key="bekleyen_tablo")
     else:
         st.info("Bekleyen ödeme yok.")
 
-    # PDF export
+    # PDF export – rendered on a worker thread only when requested
     if not bekleyen.empty:
-        pdf_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-
-        styles = getSampleStyleSheet()
-        elements = []
-        elements.append(Paragraph("<b>Bekleyen Ödemeler Raporu</b>", styles["Title"]))
-        elements.append(Paragraph(f"Tarih: {datetime.now().strftime('%d.%m.%Y')}", styles["Normal"]))
-        elements.append(Paragraph(" ", styles["Normal"]))
-
-        table_data = [["Tarih", "Müşteri", "Ada / Parsel", "Ücret (TL)", "Gecikme (Gün)"]]
-        for _, row in bekleyen.iterrows():
-            table_data.append([
-                row["Tarih"].strftime("%d.%m.%Y") if pd.notnull(row["Tarih"]) else "",
-                str(row["Müşteri"]),
-                str(row["Ada_Parsel"]),
-                f"{float(row['Ücret']):,.0f} TL",
-                str(row["Gecikme (Gün)"])
-            ])
-
-        table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("ALIGN", (3, 1), (3, -1), "RIGHT"),
-            ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-        ]))
-        elements.append(table)
-        doc.build(elements)
-
-        st.download_button(
-            "📄 Bekleyen Ödemeleri PDF İndir",
-            data=pdf_buffer.getvalue(),
-            file_name="bekleyen_odemeler.pdf",
-            mime="application/pdf"
-        )
+        pdf_key = ("bekleyen", df.attrs["revision"], sec_yil, sec_ay, sec_musteri)
+        bekleyen_pdf_indir(pdf_key, bekleyen)
 
     st.subheader("🟢 Ödenmiş İşler")
     if not odenen.empty:
-        html_table(odenen[["Tarih", "Müşteri", "Ada_Parsel", "Ücret"]])
+        html_table(odenen[["Tarih", "Müşteri", "Ada_Parsel", "Ücret"]], key="odenen_tablo")
     else:
         st.info("Ödenmiş iş yok.")
 
@@ -519,218 +942,348 @@ def render_odeme_paneli(conn):
     st.divider()
     st.subheader("📥 Rapor İndirme")
 
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output, {"in_memory": True})
-    worksheet = workbook.add_worksheet("Ödeme Raporu")
-
-    header = workbook.add_format({"bold": True, "bg_color": "#E6EEF8", "border": 1})
-    money = workbook.add_format({"num_format": '#,##0 "TL"'})
-    date_fmt = workbook.add_format({"num_format": "dd.mm.yyyy"})
-
-    for col_i, col_name in enumerate(df_f.columns):
-        worksheet.write(0, col_i, col_name, header)
-
-    for row_i, row in df_f.iterrows():
-        for col_i, val in enumerate(row):
-            if isinstance(val, pd.Timestamp):
-                worksheet.write_datetime(row_i + 1, col_i, val, date_fmt)
-            elif df_f.columns[col_i] == "Ücret":
-                try:
-                    worksheet.write(row_i + 1, col_i, float(val), money)
-                except Exception:
-                    worksheet.write(row_i + 1, col_i, str(val))
-            else:
-                worksheet.write(row_i + 1, col_i, str(val))
+    odeme_raporu_indir(df_f, (df.attrs["revision"], sec_yil, sec_ay, sec_musteri))
+
+
+@page_fragment
+def geciken_alacaklar():
+    df = load_jobs()
+    alacak = receivables(df)
 
-    workbook.close()
+    st.subheader("⏰ Geciken Alacaklar")
+    toplam = alacak.totals()
+    for col, band in zip(st.columns(len(AGING_BANDS) + 1), AGING_BANDS + [UNDATED]):
+        col.metric(f"{band} gün" if band != UNDATED else band, f"{toplam[band]:,.0f} TL")
 
+    en_gecikenler = alacak.top_overdue(10)
+    if en_gecikenler.empty:
+        st.info("Bekleyen alacak yok.")
+    else:
+        html_table(en_gecikenler)
+
+    st.subheader("📒 Müşteri Carisi")
+    musteri = st.selectbox("Müşteri", ["Seçiniz"] + alacak.customers(), key="cari_musteri")
+    if musteri != "Seçiniz":
+        bakiye = alacak.balances.loc[musteri]
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("İş Sayısı", int(bakiye["İş"]))
+        c2.metric("Faturalanan", f"{bakiye['Faturalanan']:,.0f} TL")
+        c3.metric("Ödenen", f"{bakiye['Ödenen']:,.0f} TL")
+        c4.metric("Bekleyen", f"{bakiye['Bekleyen']:,.0f} TL")
+        html_table(alacak.ledger(musteri), key="cari_tablo")
+
+
+@page_fragment(run_every=1)
+def ekstre_ilerlemesi(future):
+    """Polls the running batch; a full rerun shows the download once it is done."""
+    if future.done():
+        st.rerun()
+    ilerleme = st.session_state.get("ekstre_ilerleme")
+    if ilerleme is not None and ilerleme.total:
+        st.progress(ilerleme.done / ilerleme.total, text=f"⏳ {ilerleme.done}/{ilerleme.total} ekstre hazırlandı")
+    else:
+        st.info("⏳ Ekstreler hazırlanıyor...")
+
+
+@page_fragment
+def ekstre_zip_indir():
+    df = load_jobs()
+    alacak = receivables(df)
+    sadece_bakiye = st.checkbox("Sadece bekleyen bakiyesi olan müşteriler", value=True, key="ekstre_bakiye")
+    zip_key = ("ekstre", df.attrs["revision"], date.today(), sadece_bakiye)
+
+    reports = get_background_reports()
+    future = reports.get(zip_key)
+    if future is not None and future.done() and future.exception() is not None:
+        st.error(f"Ekstreler oluşturulamadı: {future.exception()}")
+        future = None
+
+    if future is None:
+        if not st.button("📦 Müşteri ekstrelerini hazırla (ZIP)"):
+            return
+        musteriler = alacak.aging.index.tolist() if sadece_bakiye else alacak.customers()
+        ekstreler = alacak.statements(musteriler)
+        st.session_state.ekstre_ilerleme = BatchProgress(len(ekstreler))
+        future = reports.submit(zip_key, timed_statements, get_perf().current_page(), ekstreler, st.session_state.ekstre_ilerleme)
+
+    if not future.done():
+        # Only the progress fragment reruns while the workers are busy.
+        ekstre_ilerlemesi(future)
+        return
+
+    ilerleme = st.session_state.get("ekstre_ilerleme")
+    if ilerleme is not None and ilerleme.failed:
+        st.warning("Oluşturulamayan ekstreler: " + ", ".join(musteri for musteri, _ in ilerleme.failed))
     st.download_button(
-        "📊 Excel (XLSX) İndir",
-        data=output.getvalue(),
-        file_name="odeme_raporu.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        "📦 Müşteri Ekstrelerini İndir (ZIP)",
+        data=future.result(),
+        file_name=f"musteri_ekstreleri_{date.today():%Y%m%d}.zip",
+        mime="application/zip"
     )
 
 
+def render_odeme_paneli():
+    st.title("💰 Ödeme Paneli")
+    odeme_paneli()
+    st.divider()
+    geciken_alacaklar()
+    ekstre_zip_indir()
+
+
+# --------------------------------------------------------
+# ANALİZ (ilçe × mahalle × iş türü × dönem)
+# --------------------------------------------------------
+@page_fragment
+def analiz_paneli():
+    cube = get_cube()
+
+    c1, c2, c3 = st.columns(3)
+    grup = c1.selectbox("Satırlar", GROUPS, key="analiz_grup")
+    donem = c2.selectbox("Dönem", PERIODS, key="analiz_donem")
+    olcu = c3.selectbox("Ölçü", MEASURES, index=1, key="analiz_olcu")
+
+    c4, c5, c6, c7 = st.columns(4)
+    yil = c4.selectbox("Yıl", ["Tümü"] + cube.years(), key="analiz_yil")
+    ilce = c5.selectbox("İlçe", ["Tümü"] + cube.ilceler(), key="analiz_ilce")
+    is_turu = c6.selectbox("İş Türü", ["Tümü"] + IS_TURU_LIST, key="analiz_is_turu")
+    odeme = c7.selectbox("Ödeme Durumu", ["Tümü"] + ODEME_DURUMU_LIST, key="analiz_odeme")
+
+    def secim(value):
+        return None if value == "Tümü" else value
+
+    with get_perf().span("cube"):
+        tablo = cube.pivot(
+            by=grup, period=donem, measure=olcu,
+            ilce=secim(ilce), is_turu=secim(is_turu), odeme=secim(odeme), year=secim(yil),
+        )
+
+    if tablo.empty:
+        st.info("Seçime uygun kayıt yok.")
+        return
+
+    import altair as alt
+
+    grafik = tablo["Toplam"].head(15).rename_axis("Grup").reset_index()
+    st.altair_chart(
+        alt.Chart(grafik).mark_bar(cornerRadius=6).encode(
+            x=alt.X("Toplam:Q", title=olcu),
+            y=alt.Y("Grup:N", sort="-x", title=grup),
+            tooltip=["Grup", "Toplam"],
+        ).properties(height=30 * len(grafik) + 40),
+        use_container_width=True,
+    )
+    html_table(tablo.reset_index(), key="analiz_tablo")
+    st.caption("Arşivlenmiş işlerin mahalle bilgisi tutulmaz; ilçelerinde \"(belirtilmemiş)\" altında sayılır.")
+
+
+def render_analiz():
+    st.title("📈 Analiz")
+    analiz_paneli()
+
+
 # --------------------------------------------------------
 # NAVIGATION
 # --------------------------------------------------------
 if st.session_state.page == "main":
     render_anasayfa(df)
-    st.stop()
+    end_rerun()
 
 if st.session_state.page == "odeme":
-    render_odeme_paneli(conn)
-    st.stop()
+    render_odeme_paneli()
+    end_rerun()
+
+if st.session_state.page == "analiz":
+    render_analiz()
+    end_rerun()
 
 # --------------------------------------------------------
 # İŞ TAKİP PANELİ (interaktif data_editor)
 # --------------------------------------------------------
-st.subheader("📊 Ay Bazlı İş & Ciro Analizi")
-
-ay_liste = {
+# Each block is a fragment: a widget inside it reruns only that block,
+# which reloads the (shared, cached) frame itself instead of receiving it,
+# so it never renders data older than the last sync. Saves call
+# st.rerun(), which refreshes the whole page.
+AY_LISTE = {
     "Tümü": None,
     "Ocak": 1, "Şubat": 2, "Mart": 3, "Nisan": 4,
     "Mayıs": 5, "Haziran": 6, "Temmuz": 7, "Ağustos": 8,
     "Eylül": 9, "Ekim": 10, "Kasım": 11, "Aralık": 12
 }
 
-yil_liste = sorted({d.year for d in df["Tarih"] if pd.notnull(d)}, reverse=True)
-yil_liste = ["Tümü"] + [str(y) for y in yil_liste]
 
-colA, colB = st.columns(2)
-secili_ay = colA.selectbox("Ay Seçiniz", list(ay_liste.keys()))
-secili_yil = colB.selectbox("Yıl Seçiniz", yil_liste)
+@page_fragment
+def is_takip_kpi():
+    st.subheader("📊 Ay Bazlı İş & Ciro Analizi")
+    df = load_jobs()
 
-df_kpi = df.copy()
-if secili_yil != "Tümü":
-    df_kpi = df_kpi[df_kpi["Tarih_Dt"].dt.year == int(secili_yil)]
-if ay_liste[secili_ay] is not None:
-    df_kpi = df_kpi[df_kpi["Tarih_Dt"].dt.month == ay_liste[secili_ay]]
+    yillar = set(date_partitions(df).years()) | set(load_archive_summary().years())
+    yil_liste = ["Tümü"] + [str(y) for y in sorted(yillar, reverse=True)]
 
-bekleyen = len(df_kpi[df_kpi["Durum"] != "Tamamlandı"])
-gelen_is = len(df_kpi)
-tahsilat_bekleyen = df_kpi[df_kpi["Ödeme Durumu"] == "Bekliyor"]["Ücret"].sum()
-ciro = df_kpi[df_kpi["Ödeme Durumu"] == "Ödendi"]["Ücret"].sum()
+    colA, colB = st.columns(2)
+    secili_ay = colA.selectbox("Ay Seçiniz", list(AY_LISTE.keys()))
+    secili_yil = colB.selectbox("Yıl Seçiniz", yil_liste)
 
-label = f"{secili_ay} {secili_yil}" if secili_yil != 'Tümü' else secili_ay
+    with get_perf().span("aggregate"):
+        kpi = get_aggregates().totals(
+            None if secili_yil == "Tümü" else int(secili_yil),
+            AY_LISTE[secili_ay],
+        )
 
-c1, c2, c3, c4 = st.columns(4)
-c1.metric(f"📂 Bekleyen İş ({label})", bekleyen)
-c2.metric(f"📅 Gelen İş ({label})", gelen_is)
-c3.metric(f"💰 Tahsilat Bekleyen ({label})", f"{tahsilat_bekleyen:.0f} TL")
-c4.metric(f"🏦 Ciro ({label})", f"{ciro:.0f} TL")
+    label = f"{secili_ay} {secili_yil}" if secili_yil != 'Tümü' else secili_ay
 
-st.divider()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric(f"📂 Bekleyen İş ({label})", kpi["bekleyen_is"])
+    c2.metric(f"📅 Gelen İş ({label})", kpi["toplam"])
+    c3.metric(f"💰 Tahsilat Bekleyen ({label})", f"{kpi['bekleyen_odeme']:.0f} TL")
+    c4.metric(f"🏦 Ciro ({label})", f"{kpi['odenen']:.0f} TL")
 
-st.subheader("➕ Yeni İş Ekle")
-
-ilce_mahalle_map = {
-    "Karaburun": ["Merkez","Yayla","Eğlenhoca","İnecik","Kösedere","Karareis","Saip","Sarpıncık","Hasseki","İhsaniye","Küçükbahçe","Yeniköy","Bozköy"],
-    "Çeşme": ["Alaçatı","Ilıca","Ovacık","Şifne","Reisdere","Üniversite","Musalla"],
-    "Urla": ["Merkez","Gülbahçe","Zeytinalanı","Kuşçular","Bademler","Balıklıova"],
-    "Güzelbahçe": ["Yaka","Siteler","Çamlık","Yelki"],
-    "Narlıdere": ["Çatalkaya","Limanreis","Yenikale","Altıevler"],
-    "Balçova": ["Merkez","Korutürk","Onur","İnciraltı"],
-    "Konak": ["Alsancak","Güzelyalı","Göztepe","Karataş","Kemeraltı","Basmane"],
-    "Karabağlar": ["Bahçelievler","Gülyaka","Cennetçeşme","Esenyalı"],
-    "Buca": ["Kuruçeşme","Buttepe","Gediz","Yıldız","Hürriyet"],
-    "Bornova": ["Kazımdirik","Erzene","Evka 3","Işıkkent","Çamdibi"],
-    "Bayraklı": ["Adalet","Mansuroğlu","Anadolu","Soğukkuyu"],
-    "Karşıyaka": ["Bostanlı","Mavişehir","Alaybey","Bahariye"],
-    "Çiğli": ["Sasalı","Balatçık","Ataşehir","Evka 5"],
-    "Menemen": ["Merkez","Asarlık","Türkelli","Seyrek"],
-    "Aliağa": ["Yeni Mahalle","Kazım Dirik","Hürriyet"],
-    "Foça": ["Yeni Foça","Eski Foça","Gökçealan"],
-    "Dikili": ["Salihler","Bademli","Kabakum"],
-    "Bergama": ["Atmaca","Bozköy","Zağnos"],
-    "Kınık": ["Merkez","Poyracık"],
-    "Tire": ["Derekahve","İpekçiler","Yeni Mahalle"],
-    "Ödemiş": ["Mescitli","Karadoğan","Hürriyet"],
-    "Kiraz": ["Irmak","Haliller","Cevizli"],
-    "Beydağ": ["Atatürk","Menderes"],
-    "Torbalı": ["Tepeköy","Yazıbaşı","Muratbey"],
-    "Selçuk": ["İsa Bey","14 Mayıs","Zafer"],
-    "Menderes": ["Gümüldür","Özdere","Tekeli"],
-    "Kemalpaşa": ["Ulucak","Bağyurdu","Yukarıkızılca"]
-}
 
-ilceler = list(ilce_mahalle_map.keys())
+@page_fragment
+def yeni_is_formu():
+    st.subheader("➕ Yeni İş Ekle")
 
-st.markdown('<div class="card-box">', unsafe_allow_html=True)
-st.markdown('<div style="font-size:18px;font-weight:700;margin-bottom:10px;color:var(--text-main);">📝 İş Detayları</div>', unsafe_allow_html=True)
+    ilceler = list(ilce_mahalle_map.keys())
 
-col_loc1, col_loc2 = st.columns(2)
-ilce_yeni = col_loc1.selectbox("İlçe", ilceler, key="ilce_yeni")
-mahalle_listesi = ilce_mahalle_map.get(ilce_yeni, [])
-mahalle_yeni = col_loc2.selectbox("Mahalle", mahalle_listesi, key="mahalle_yeni")
+    st.markdown('<div class="card-box">', unsafe_allow_html=True)
+    st.markdown('<div style="font-size:18px;font-weight:700;margin-bottom:10px;color:var(--text-main);">📝 İş Detayları</div>', unsafe_allow_html=True)
 
-with st.form("yeni_is_form"):
-    c1, c2, c3 = st.columns(3)
-    tarih_yeni = c1.date_input("Tarih", value=datetime.now().date())
-    musteri_yeni = c2.text_input("Müşteri")
-    is_turu_yeni = c3.selectbox("İş Türü", IS_TURU_LIST)
+    col_loc1, col_loc2 = st.columns(2)
+    ilce_yeni = col_loc1.selectbox("İlçe", ilceler, key="ilce_yeni")
+    mahalle_listesi = ilce_mahalle_map.get(ilce_yeni, [])
+    mahalle_yeni = col_loc2.selectbox("Mahalle", mahalle_listesi, key="mahalle_yeni")
 
-    c4, c5, c6 = st.columns(3)
-    ada_parsel_yeni = c4.text_input("Ada / Parsel")
-    durum_yeni = c5.selectbox("Durum", DURUM_LIST)
-    odeme_yeni = c6.selectbox("Ödeme Durumu", ["Seçiniz", "Bekliyor", "Ödendi"], index=0)
+    with st.form("yeni_is_form"):
+        c1, c2, c3 = st.columns(3)
+        tarih_yeni = c1.date_input("Tarih", value=datetime.now().date())
+        musteri_yeni = c2.text_input("Müşteri")
+        is_turu_yeni = c3.selectbox("İş Türü", IS_TURU_LIST)
 
-    c7, _ = st.columns([1, 3])
-    ucret_yeni = c7.number_input("Ücret (₺)", min_value=0, step=100)
+        c4, c5, c6 = st.columns(3)
+        ada_parsel_yeni = c4.text_input("Ada / Parsel")
+        durum_yeni = c5.selectbox("Durum", DURUM_LIST)
+        odeme_yeni = c6.selectbox("Ödeme Durumu", ["Seçiniz"] + ODEME_DURUMU_LIST, index=0)
 
-    submitted = st.form_submit_button("💾 İşi Kaydet")
+        c7, _ = st.columns([1, 3])
+        ucret_yeni = c7.number_input("Ücret (₺)", min_value=0, step=100)
 
-    if submitted:
-        if not musteri_yeni:
-            st.warning("Müşteri adı boş bırakılamaz.")
-        elif odeme_yeni == "Seçiniz":
-            st.warning("Ödeme durumu seçilmelidir.")
-        else:
-            new_row = pd.DataFrame([{
-                "Tarih": tarih_yeni,
-                "Müşteri": musteri_yeni,
-                "İş Türü": is_turu_yeni,
-                "Ada_Parsel": ada_parsel_yeni,
-                "İlçe": ilce_yeni,
-                "Mahalle": mahalle_yeni,
-                "Durum": durum_yeni,
-                "Ödeme Durumu": odeme_yeni,
-                "Ücret": ucret_yeni
-            }])
-
-            df_new = pd.concat([df, new_row], ignore_index=True)
-            df_new["Tarih"] = df_new["Tarih"].astype(str)
-
-            conn.update(worksheet="Sayfa1", data=df_new)
-            st.success("✔ Yeni iş başarıyla eklendi")
+        submitted = st.form_submit_button("💾 İşi Kaydet")
+
+        if submitted:
+            if not musteri_yeni:
+                st.warning("Müşteri adı boş bırakılamaz.")
+            elif odeme_yeni == "Seçiniz":
+                st.warning("Ödeme durumu seçilmelidir.")
+            else:
+                get_mirror().append_rows([{
+                    "Tarih": str(tarih_yeni),
+                    "Müşteri": musteri_yeni,
+                    "İş Türü": is_turu_yeni,
+                    "Ada_Parsel": ada_parsel_yeni,
+                    "İlçe": ilce_yeni,
+                    "Mahalle": mahalle_yeni,
+                    "Durum": durum_yeni,
+                    "Ödeme Durumu": odeme_yeni,
+                    "Ücret": ucret_yeni
+                }])
+                st.success("✔ Yeni iş başarıyla eklendi")
+                st.rerun()
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@page_fragment
+def toplu_ice_aktar():
+    with st.expander("📥 Toplu İş Aktarımı (CSV / XLSX)"):
+        st.caption("Sütunlar: " + ", ".join(JOB_COLUMNS) + ". Durum boş bırakılırsa ilk aşama yazılır.")
+        dosya = st.file_uploader("Dosya seçin", type=["csv", "xlsx"], key="aktarim_dosyasi")
+        if dosya is None:
+            return
+
+        try:
+            with get_perf().span("import_validate"):
+                kayitlar, hatalar = validate_jobs(read_upload(dosya.name, dosya.getvalue()))
+        except Exception as e:
+            st.error("Dosya okunamadı: " + str(e))
+            return
+
+        c1, c2 = st.columns(2)
+        c1.metric("✅ Geçerli satır", len(kayitlar))
+        c2.metric("⚠️ Hatalı satır", len(hatalar))
+
+        if not hatalar.empty:
+            st.markdown("**Hatalı satırlar** (dosyadaki satır numarasıyla)")
+            html_table(hatalar, key="aktarim_hatalari")
+
+        if kayitlar and st.button(f"📥 {len(kayitlar)} geçerli işi ekle", type="primary"):
+            get_mirror().append_rows(kayitlar)
+            st.success(f"✔ {len(kayitlar)} iş eklendi")
             st.rerun()
 
-st.markdown("</div>", unsafe_allow_html=True)
 
-st.subheader("📋 İş Listesi")
+def highlight_odeme_hucre(val):
+    if val == "Ödendi":
+        return "background-color: #1f7a1f; color: white;"
+    return ""
 
-arama = st.text_input("🔍 Arama")
-df_view = df.copy()
 
-if "Tarih_Dt" in df_view.columns:
-    df_view = df_view.drop(columns=["Tarih_Dt"])
+@page_fragment
+def is_listesi():
+    st.subheader("📋 İş Listesi")
+    df = load_jobs()
 
-if arama:
-    df_view = df_view[
-        df_view["Müşteri"].astype(str).str.contains(arama, case=False, na=False) |
-        df_view["Ada_Parsel"].astype(str).str.contains(arama, case=False, na=False)
-    ]
+    arama = st.text_input("🔍 Arama")
 
-df_view["Sil"] = False
+    # While edits are pending the editor keeps the frame they were made on:
+    # it stores them by row position, and the mirror may have moved rows
+    # since. Saves then address rows by the ID column of that frame.
+    duzenleme = st.session_state.get("is_listesi_tablo", {})
+    kaynak = st.session_state.get("is_listesi_kaynak")
+    if (kaynak is not None and kaynak[0] == arama
+            and any(duzenleme.get(k) for k in ("edited_rows", "added_rows", "deleted_rows"))):
+        df_view = kaynak[1]
+    else:
+        df_view = df.iloc[search_jobs(df, arama)].copy() if arama else df.copy()
+        df_view["Sil"] = False
+        st.session_state.is_listesi_kaynak = (arama, df_view)
+
+    with get_perf().span("styler"):
+        styled_df = df_view.style.applymap(highlight_odeme_hucre, subset=["Ödeme Durumu"])
+
+        edited = st.data_editor(
+            styled_df,
+            key="is_listesi_tablo",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                ID_COLUMN: None,
+                "İş Türü": st.column_config.SelectboxColumn("İş Türü", options=IS_TURU_LIST),
+                "Durum": st.column_config.SelectboxColumn("Durum", options=DURUM_LIST),
+                "Ödeme Durumu": st.column_config.SelectboxColumn("Ödeme Durumu", options=ODEME_DURUMU_LIST),
+                "Ücret": st.column_config.NumberColumn("Ücret", format="%d ₺"),
+                "Tarih": st.column_config.DateColumn("Tarih", format="DD.MM.YYYY"),
+                "Ada_Parsel": st.column_config.TextColumn("Ada / Parsel"),
+                "Müşteri": st.column_config.TextColumn("Müşteri"),
+                "Sil": st.column_config.CheckboxColumn("🗑 Sil")
+            }
+        )
 
-def highlight_odeme_hucre(val):
-    if val == "Ödendi":
-        return "background-color: #1f7a1f; color: white;"
-    return ""
+    if st.button("💾 Kaydet", type="primary"):
+        # Only the edited cells and the rows ticked in "Sil" are written.
+        degisiklikler, silinecekler = frame_changes(df_view, edited, flag="Sil", key=ID_COLUMN)
+        mirror = get_mirror()
+        mirror.update_cells(degisiklikler)
+        mirror.delete_rows(silinecekler)
+        # the edits are saved; the next run starts from the current frame
+        del st.session_state["is_listesi_tablo"]
+        st.session_state.pop("is_listesi_kaynak", None)
+        st.success("Kaydedildi ✔")
+        st.rerun()
 
-styled_df = df_view.style.applymap(highlight_odeme_hucre, subset=["Ödeme Durumu"])
-
-edited = st.data_editor(
-    styled_df,
-    hide_index=True,
-    use_container_width=True,
-    column_config={
-        "İş Türü": st.column_config.SelectboxColumn("İş Türü", options=IS_TURU_LIST),
-        "Durum": st.column_config.SelectboxColumn("Durum", options=DURUM_LIST),
-        "Ödeme Durumu": st.column_config.SelectboxColumn("Ödeme Durumu", options=["Bekliyor", "Ödendi"]),
-        "Ücret": st.column_config.NumberColumn("Ücret", format="%d ₺"),
-        "Tarih": st.column_config.DateColumn("Tarih", format="DD.MM.YYYY"),
-        "Ada_Parsel": st.column_config.TextColumn("Ada / Parsel"),
-        "Müşteri": st.column_config.TextColumn("Müşteri"),
-        "Sil": st.column_config.CheckboxColumn("🗑 Sil")
-    }
-)
 
-edited_no_flag = edited.drop(columns=["Sil"])
-edited_no_flag["Tarih"] = edited_no_flag["Tarih"].astype(str)
+is_takip_kpi()
+st.divider()
+yeni_is_formu()
+toplu_ice_aktar()
+is_listesi()
 
-if st.button("💾 Kaydet", type="primary"):
-    conn.update(worksheet="Sayfa1", data=edited_no_flag)
-    st.success("Kaydedildi ✔")
-    st.rerun()
+end_rerun()
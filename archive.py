@@ -0,0 +1,140 @@
+import threading
+
+import pandas as pd
+
+from aggregates import DIMENSIONS, summarize
+from mirror import sheet_value
+from schema import ID_COLUMN, parse_jobs
+from storage import values_frame
+
+
+# --------------------------------------------------------
+# ARŞİV (kapanmış işler, yıl bazında)
+# --------------------------------------------------------
+# Jobs that are finished and paid, dated before a cutoff, never change
+# again. They are moved out of Sayfa1 into one worksheet per year
+# ("Arşiv 2022", ...), so the working set the pages load stays small. Their
+# KPI cells go to the "Arşiv Özeti" worksheet, which JobAggregates adds
+# to the live cells, so totals and revenue charts still cover them.
+
+ARCHIVE_PREFIX = "Arşiv"
+SUMMARY_SHEET = "Arşiv Özeti"
+# Year and month are kept as numbers: "2023-05" typed into a sheet turns into a date.
+SUMMARY_COLUMNS = ["Yıl", "Ay No"] + DIMENSIONS[1:] + ["Adet", "Ücret"]
+
+
+def archive_sheet(year):
+    return f"{ARCHIVE_PREFIX} {year}"
+
+
+def closed_jobs(df, before):
+    """Index of jobs that are Tamamlandı, Ödendi and dated before `before`."""
+    mask = (
+        (df["Durum"] == "Tamamlandı")
+        & (df["Ödeme Durumu"] == "Ödendi")
+        & (df["Tarih"] < pd.Timestamp(before))
+    )
+    return df.index[mask.fillna(False).astype(bool)]
+
+
+class ArchiveSummary:
+    """Contents of the summary worksheet: aggregate cells per archived year."""
+
+    def __init__(self, values):
+        frame = values_frame(values)
+        if frame.empty:
+            frame = pd.DataFrame(columns=SUMMARY_COLUMNS)
+        for col in DIMENSIONS[1:]:
+            frame[col] = frame[col].astype(object).where(frame[col].notna(), "").astype(str)
+        for col in ("Yıl", "Ay No", "Adet", "Ücret"):
+            frame[col] = pd.to_numeric(frame[col], errors="coerce").fillna(0)
+        frame[["Yıl", "Ay No", "Adet"]] = frame[["Yıl", "Ay No", "Adet"]].astype(int)
+        self.frame = frame[SUMMARY_COLUMNS].reset_index(drop=True)
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Cells as returned by aggregates.summarize() (grouped by DIMENSIONS)."""
+        frame = cells.rename(columns={"size": "Adet", "sum": "Ücret"}).reset_index()
+        frame["Yıl"] = frame["Ay"].str[:4].astype(int)
+        frame["Ay No"] = frame["Ay"].str[5:7].astype(int)
+        return cls([SUMMARY_COLUMNS] + frame[SUMMARY_COLUMNS].values.tolist())
+
+    def merged(self, other):
+        frame = pd.concat([self.frame, other.frame], ignore_index=True)
+        frame = frame.groupby(SUMMARY_COLUMNS[:-2], as_index=False, sort=True)[["Adet", "Ücret"]].sum()
+        return ArchiveSummary([SUMMARY_COLUMNS] + frame[SUMMARY_COLUMNS].values.tolist())
+
+    def values(self):
+        return [SUMMARY_COLUMNS] + self.frame.values.tolist()
+
+    def table(self):
+        """Cells in JobAggregates' layout (DIMENSIONS + Adet, Ücret)."""
+        table = self.frame.copy()
+        table["Ay"] = table["Yıl"].astype(str) + "-" + table["Ay No"].astype(str).str.zfill(2)
+        return table[DIMENSIONS + ["Adet", "Ücret"]]
+
+    def years(self):
+        return sorted(set(self.frame["Yıl"].tolist()), reverse=True)
+
+    def months(self, year=None):
+        frame = self.frame if year is None else self.frame[self.frame["Yıl"] == year]
+        return sorted(set(frame["Ay No"].tolist()))
+
+    def by_year(self):
+        """Archived job count and Ücret per year."""
+        return self.frame.groupby("Yıl", as_index=False)[["Adet", "Ücret"]].sum()
+
+
+class JobArchive:
+    """Moves closed jobs from the mirrored worksheet into yearly archive worksheets."""
+
+    def __init__(self, storage, mirror):
+        self.storage = storage
+        self.mirror = mirror
+        self._lock = threading.Lock()
+        self._saved = None  # summary queued with an archive run that has not been sent
+
+    def summary(self):
+        """Current summary; a missing summary worksheet reads as an empty one."""
+        with self._lock:
+            saved = self._saved
+            if saved is not None:
+                if self.mirror.queue is not None and self.mirror.queue.unsent(self.mirror.worksheet):
+                    return saved
+                self._saved = None
+        return ArchiveSummary(self.storage.read_values(SUMMARY_SHEET))
+
+    def archive(self, before):
+        """Archive the mirror's closed jobs dated before `before`.
+
+        The jobs are picked from one mirror snapshot and moved by their row
+        ID as a single write (storage.move_by_id): appended to their year's
+        archive worksheet and added to the summary before they leave the
+        sheet, so an interruption can leave a row in both places but never
+        in neither. If the mirror changed after the snapshot nothing is
+        written and RowConflict is raised.
+        Returns (number of jobs archived, new summary).
+        """
+        revision, raw = self.mirror.snapshot()
+        jobs = parse_jobs(raw)
+        jobs = jobs.loc[closed_jobs(jobs, before)]
+        if jobs.empty:
+            return 0, None
+
+        header = self.mirror.columns()
+        moves = {}
+        for year, year_jobs in jobs.groupby(jobs["Tarih"].dt.year):
+            rows = raw.loc[year_jobs.index, header].itertuples(index=False)
+            moves[archive_sheet(int(year))] = [[sheet_value(v) for v in row] for row in rows]
+
+        summary = self.summary().merged(ArchiveSummary.from_cells(summarize(jobs)))
+        ids = raw.loc[jobs.index, ID_COLUMN].astype(str).tolist()
+        with self._lock:
+            self.mirror.move_rows(ids, moves, {SUMMARY_SHEET: summary.values()}, revision)
+            self._saved = summary
+        return len(ids), summary
+
+    def forget(self):
+        """The queued archive run was discarded; the next summary() reads the sheet again."""
+        with self._lock:
+            self._saved = None
@@ -0,0 +1,386 @@
+"""Headless benchmarks for the Sayfa1 pipeline, on synthetic data.
+
+    python bench.py                       # 1k, 10k, 100k rows
+    python bench.py --sizes 1000000 --repeat 1 --out data/bench-1m.json
+    python bench.py --imports             # cold-start import cost per module
+
+Every stage a page goes through (load, parse, filter, aggregate, render to
+HTML, export) is timed on its own, without Streamlit, and the results are
+written as JSON so runs from different releases can be compared.
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aggregates import JobAggregates
+from cube import JobCube
+from exports import BatchProgress, StatementPool, bekleyen_pdf, statements_zip, table_html, xlsx_report
+from mirror import SheetMirror
+from partitions import DatePartitions
+from receivables import Receivables
+from schema import DURUM_LIST, IS_TURU_LIST, ODEME_DURUMU_LIST, ilce_mahalle_map, parse_jobs
+from search import JobSearchIndex
+from storage import SQLiteStorage
+
+
+# --------------------------------------------------------
+# SENTETİK SAYFA1
+# --------------------------------------------------------
+COLUMNS = ["Tarih", "Müşteri", "İş Türü", "Ada_Parsel", "İlçe", "Mahalle", "Durum", "Ödeme Durumu", "Ücret"]
+
+ADLAR = ["Ahmet", "Ayşe", "Mehmet", "Fatma", "Mustafa", "Emine", "Ali", "Hatice", "Hüseyin", "Zeynep",
+         "İbrahim", "Elif", "Işıl", "Murat", "Şule", "Ömer", "Gül", "Çağrı", "Ümit", "Yusuf"]
+SOYADLAR = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım", "Öztürk", "Aydın",
+            "Özdemir", "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Kara", "Koç", "Kurt", "Işık", "Güneş"]
+
+
+def generate_jobs(n, seed=0, start="2019-01-01", end="2025-12-31"):
+    """Sheet values (header first) for `n` realistic jobs.
+
+    Dates spread over several years, customers recur, locations come from
+    ilce_mahalle_map, and some cells are blank the way hand-kept sheets are.
+    """
+    rng = np.random.default_rng(seed)
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    tarih = (pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n), unit="D")).strftime("%Y-%m-%d")
+    tarih = np.where(rng.random(n) < 0.01, "", tarih)
+
+    # about one customer per three jobs, so names repeat like real clients
+    customers = max(1, n // 3)
+    ad = rng.integers(0, len(ADLAR), customers)
+    soyad = rng.integers(0, len(SOYADLAR), customers)
+    names = np.array([f"{ADLAR[a]} {SOYADLAR[s]} {i}" for i, (a, s) in enumerate(zip(ad, soyad))])
+    musteri = names[rng.integers(0, customers, n)]
+
+    ada_parsel = np.char.add(np.char.add(rng.integers(1, 3000, n).astype(str), "/"),
+                             rng.integers(1, 60, n).astype(str))
+
+    locations = [(ilce, mahalle) for ilce, mahalleler in ilce_mahalle_map.items() for mahalle in mahalleler]
+    loc = rng.integers(0, len(locations), n)
+
+    durum = np.array(DURUM_LIST)[rng.integers(0, len(DURUM_LIST), n)]
+    odeme = np.array(ODEME_DURUMU_LIST)[(rng.random(n) < 0.6).astype(int)]
+    odeme = np.where(rng.random(n) < 0.02, "", odeme)
+    ucret = (rng.integers(10, 400, n) * 50).astype(object)
+    ucret[rng.random(n) < 0.03] = ""
+
+    rows = zip(
+        tarih.tolist(),
+        musteri.tolist(),
+        np.array(IS_TURU_LIST)[rng.integers(0, len(IS_TURU_LIST), n)].tolist(),
+        ada_parsel.tolist(),
+        [locations[i][0] for i in loc.tolist()],
+        [locations[i][1] for i in loc.tolist()],
+        durum.tolist(),
+        odeme.tolist(),
+        ucret.tolist(),
+    )
+    return [COLUMNS] + [list(r) for r in rows]
+
+
+# --------------------------------------------------------
+# ZAMANLAMA
+# --------------------------------------------------------
+def timed(fn, repeat):
+    """(last result, {best, median, runs}) of calling fn() `repeat` times."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - started)
+    return result, {"best": min(runs), "median": statistics.median(runs), "runs": len(runs)}
+
+
+def run_size(n, repeat, workdir, seed=0):
+    stages = {}
+
+    def stage(name, fn, times=repeat):
+        result, stats = timed(fn, times)
+        stages[name] = stats
+        return result
+
+    values = stage("generate", lambda: generate_jobs(n, seed), 1)
+
+    storage = SQLiteStorage(os.path.join(workdir, f"sheet-{n}.sqlite"))
+    stage("seed", lambda: storage.write_values("Sayfa1", values), 1)
+
+    # load: a cold mirror doing its first full sync, then building the frame
+    def load():
+        mirror = SheetMirror(os.path.join(workdir, f"mirror-{n}-{time.monotonic_ns()}.sqlite"), storage)
+        mirror.sync()
+        return mirror.snapshot()
+
+    revision, raw = stage("load", load, 1)
+    df = stage("parse", lambda: parse_jobs(raw))
+    df.attrs["revision"] = revision
+
+    partitions = stage("partition_build", lambda: DatePartitions(df["Tarih"]))
+    year = partitions.years()[len(partitions.years()) // 2]
+    month = partitions.months(year)[0]
+    musteri = df["Müşteri"].iloc[0]
+
+    def filter_panel():
+        selected = partitions.select(df, year, month)
+        return selected[selected["Müşteri"] == musteri], selected
+
+    _, month_rows = stage("filter", filter_panel)
+
+    index = JobSearchIndex()
+    snapshot = stage("search_build", lambda: index.refresh(df))
+    queries = ["yilmaz", "işik", "123/4", "45", "ahmet kaya"]
+    stage("search", lambda: [snapshot.search(q) for q in queries])
+
+    aggregates = JobAggregates(parse_jobs)
+    stage("aggregate_build", lambda: aggregates.rebuild(raw))
+    stage("kpi", lambda: (aggregates.totals(year, month), aggregates.monthly(), aggregates.totals()))
+
+    cube = JobCube(parse_jobs)
+    stage("cube_build", lambda: cube.rebuild(raw))
+    stage("cube", lambda: (
+        cube.pivot("İlçe", "Çeyrek", is_turu="Kat Mülkiyeti", odeme="Ödendi"),
+        cube.pivot("Mahalle", "Ay", ilce=df["İlçe"].iloc[0], year=year),
+    ))
+
+    alacak = stage("receivables_build", lambda: Receivables(df, datetime.now()))
+    stage("receivables", lambda: (alacak.totals(), alacak.top_overdue(10), alacak.ledger(musteri)))
+
+    def anasayfa_tables():
+        son_isler = df[df["Durum"] != "Tamamlandı"].sort_values("Tarih", ascending=False).head(10)
+        son_odemeler = df[df["Ödeme Durumu"] == "Bekliyor"].sort_values("Tarih", ascending=False).head(10)
+        return table_html(son_isler) + table_html(son_odemeler)
+
+    stage("render_anasayfa", anasayfa_tables)
+    stage("render_page", lambda: table_html(month_rows.head(25)))
+
+    year_rows = partitions.select(df, year)
+    stage("export_xlsx", lambda: xlsx_report(year_rows))
+
+    bekleyen = month_rows[month_rows["Ödeme Durumu"] == "Bekliyor"].copy()
+    bekleyen["Gecikme (Gün)"] = (datetime.now() - bekleyen["Tarih"]).dt.days
+    stage("export_pdf", lambda: bekleyen_pdf(bekleyen))
+
+    ekstreler = alacak.statements(alacak.customers()[:50])
+    pool = StatementPool()
+    try:
+        # the first batch starts the workers, as the first one in the app does
+        stage("export_statements", lambda: statements_zip(ekstreler, BatchProgress(len(ekstreler)), pool), 1)
+    finally:
+        pool.shutdown()
+
+    return {"rows": n, "year": year, "month": month, "stages": stages}
+
+
+# --------------------------------------------------------
+# İÇE AKTARMA MALİYETİ (python bench.py --imports)
+# --------------------------------------------------------
+# The import statements of a script, and of the repo modules it imports,
+# are read with ast. Startup is the code that runs before the first screen
+# (login) is drawn: the script's top-level statements up to its login
+# guard (the first top-level `if` ending in st.stop()), and, followed
+# through calls, the bodies of the functions and classes they call, in
+# this script or in a repo module, every branch included. Calls to
+# methods are not followed. Every other import is deferred to first use.
+# Both sets are imported in a fresh interpreter under `-X importtime`,
+# startup first, so the deferred figures are what first use adds on top of
+# an already started app.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMPORT_SCRIPTS = ["app.py", "odeme.py"]
+_MARK = "-- import "
+
+
+def _imported(node):
+    """Modules an import statement loads ([] for any other node or a relative import)."""
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    if isinstance(node, ast.ImportFrom) and not node.level:
+        return [node.module]
+    return []
+
+
+def _executed(nodes):
+    """`nodes` and everything they run in place; function and lambda bodies are left out."""
+    skip = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+    stack = [n for n in reversed(nodes) if not isinstance(n, skip)]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed([c for c in ast.iter_child_nodes(node) if not isinstance(c, skip)]))
+
+
+def _is_login_guard(node):
+    return isinstance(node, ast.If) and any(
+        isinstance(s, ast.Expr) and isinstance(s.value, ast.Call)
+        and isinstance(s.value.func, ast.Attribute) and s.value.func.attr == "stop"
+        for s in node.body
+    )
+
+
+class _Module:
+    """A parsed repo module: its functions (classes by __init__) and names imported from repo modules."""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as f:
+            self.tree = ast.parse(f.read())
+        self.functions, self.names = {}, {}
+        for node in self.tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.functions[node.name] = node.body
+            elif isinstance(node, ast.ClassDef):
+                init = [n for n in node.body if isinstance(n, ast.FunctionDef) and n.name == "__init__"]
+                self.functions[node.name] = init[0].body if init else []
+            elif isinstance(node, ast.ImportFrom) and not node.level:
+                for alias in node.names:
+                    self.names[alias.asname or alias.name] = (node.module, alias.name)
+
+
+def script_imports(path):
+    """(startup, deferred) modules imported by a script and the repo modules it loads, in run order."""
+    modules, followed = {}, set()
+    startup, everything = {}, {}
+
+    def load(name):
+        local = os.path.join(HERE, name + ".py")
+        if name not in modules and os.path.exists(local):
+            modules[name] = _Module(local)
+            everything.update(dict.fromkeys(m for n in ast.walk(modules[name].tree) for m in _imported(n)))
+            run(name, modules[name].tree.body)
+
+    def call(module, name):
+        if (module, name) in followed:
+            return
+        followed.add((module, name))
+        if name in modules[module].functions:
+            run(module, modules[module].functions[name])
+        elif name in modules[module].names:
+            target, original = modules[module].names[name]
+            if target in modules:
+                call(target, original)
+
+    def run(module, nodes):
+        for node in _executed(nodes):
+            for name in _imported(node):
+                startup[name] = None
+                load(name)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+                call(module, node.func.id)
+
+    script = os.path.splitext(os.path.basename(path))[0]
+    modules[script] = _Module(path)
+    everything.update(dict.fromkeys(m for n in ast.walk(modules[script].tree) for m in _imported(n)))
+    body = modules[script].tree.body
+    guards = [i for i, node in enumerate(body) if _is_login_guard(node)]
+    run(script, body[:guards[0] + 1] if guards else body)
+    return list(startup), [m for m in everything if m not in startup]
+
+
+def _cumulative_ms(line):
+    """`-X importtime` line -> (depth, cumulative ms), or None for other lines."""
+    if not line.startswith("import time:") or "self [us]" in line:
+        return None
+    _, cumulative, name = line[len("import time:"):].split("|")
+    return (len(name) - len(name.lstrip()) - 1) // 2, int(cumulative) / 1000
+
+
+def import_costs(modules):
+    """{module: ms its import statement took} in one fresh interpreter, in order.
+
+    Each statement is charged with everything it loaded that was not loaded
+    yet, so earlier modules absorb shared dependencies (pandas, numpy, ...).
+    """
+    code = "import sys\n" + "\n".join(f"sys.stderr.write({_MARK + m!r} + '\\n'); import {m}" for m in modules)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=HERE)
+    if out.returncode:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+
+    costs, current = {}, None
+    for line in out.stderr.splitlines():
+        if line.startswith(_MARK):
+            current = line[len(_MARK):]
+            costs[current] = 0.0
+            continue
+        parsed = _cumulative_ms(line)
+        if current is not None and parsed is not None and parsed[0] == 0:
+            costs[current] += parsed[1]
+    return {m: round(ms, 1) for m, ms in costs.items()}
+
+
+def run_imports(scripts):
+    report = {}
+    for script in scripts:
+        startup, deferred = script_imports(os.path.join(HERE, script))
+        costs = import_costs(startup + deferred)
+        report[script] = {
+            phase: {m: costs[m] for m in modules}
+            for phase, modules in (("startup", startup), ("deferred", deferred))
+        }
+        for phase, label in (("startup", "açılışta"), ("deferred", "ilk kullanımda")):
+            modules = report[script][phase]
+            print(f"{script} – {label}: {sum(modules.values()):.0f} ms")
+            for name, ms in sorted(modules.items(), key=lambda item: -item[1]):
+                if ms >= 1:
+                    print(f"    {name:<24} {ms:8.1f} ms")
+    return report
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sayfa1 pipeline on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="data/bench.json")
+    parser.add_argument("--imports", action="store_true",
+                        help="measure the import cost of app.py and odeme.py instead of the pipeline")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.platform(),
+        "results": [],
+    }
+    if args.imports:
+        report["imports"] = run_imports(IMPORT_SCRIPTS)
+        if args.out == parser.get_default("out"):
+            args.out = "data/bench-imports.json"
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            for n in args.sizes:
+                result = run_size(n, args.repeat, workdir, args.seed)
+                report["results"].append(result)
+                print(f"{n:>9} satır: " + ", ".join(
+                    f"{name} {stats['best'] * 1000:.1f} ms" for name, stats in result["stages"].items()
+                ))
+
+    folder = os.path.dirname(args.out)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Sonuçlar: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from schema import DEFAULT_DURUM, DURUM_LIST, IS_TURU_LIST, ODEME_DURUMU_LIST, ilce_mahalle_map
+
+
+# --------------------------------------------------------
+# TOPLU İŞ AKTARIMI (CSV / XLSX)
+# --------------------------------------------------------
+# A whole file is checked column by column (no per-row loop): every rule
+# gives a boolean mask, and the masks are turned into one error text per
+# row. Valid rows become job records for a single SheetMirror.append_rows
+# call, i.e. one API request however long the file is.
+
+JOB_COLUMNS = ["Tarih", "Müşteri", "İş Türü", "Ada_Parsel", "İlçe", "Mahalle", "Durum", "Ödeme Durumu", "Ücret"]
+REQUIRED_COLUMNS = ["Tarih", "Müşteri", "İş Türü", "İlçe", "Mahalle", "Ödeme Durumu", "Ücret"]
+DATE_FORMATS = ["%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y"]
+THOUSANDS = r"-?\d{1,3}(\.\d{3})+"  # "1.500", "12.500": Turkish grouping, not decimals
+FIRST_DATA_ROW = 2  # row 1 of the file is the header
+
+
+def read_upload(name, data):
+    """Uploaded file (name, bytes) -> frame of text cells.
+
+    CSV separators (, ; tab) are detected; files saved by Excel in Turkish
+    locale (cp1254) are read too. Raises ValueError with a message for the user.
+    """
+    if name.lower().endswith((".xlsx", ".xls")):
+        try:
+            return pd.read_excel(io.BytesIO(data), dtype=object)
+        except ImportError:
+            raise ValueError("XLSX dosyalarını okumak için openpyxl paketi gerekli; dosyayı CSV olarak kaydedin.")
+    for encoding in ("utf-8-sig", "cp1254"):
+        try:
+            return pd.read_csv(io.BytesIO(data), sep=None, engine="python", dtype=str, encoding=encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Dosya kodlaması okunamadı (UTF-8 ya da Windows-1254 bekleniyor).")
+
+
+def _text(col):
+    return col.astype(object).where(col.notna(), "").astype(str).str.strip()
+
+
+def parse_dates(col):
+    """ISO dates (and Excel date cells) first, then day-first Turkish formats."""
+    dates = pd.to_datetime(col, format="ISO8601", errors="coerce")
+    text = _text(col)
+    for fmt in DATE_FORMATS:
+        missing = dates.isna() & (text != "")
+        if not missing.any():
+            break
+        dates = dates.where(~missing, pd.to_datetime(text.where(missing), format=fmt, errors="coerce"))
+    return dates.dt.normalize()
+
+
+def parse_amounts(col):
+    """Ücret cells -> float; "1.250,50 ₺", "12.500 TL" and "1250.5" all work, NaN if not a number."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float)
+    text = _text(col).str.replace(r"(₺|TL|\s)", "", regex=True)
+    grouped = text.str.contains(",", regex=False) | text.str.fullmatch(THOUSANDS)
+    text = text.where(~grouped, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(text.where(text != ""), errors="coerce")
+
+
+def validate_jobs(upload):
+    """Check an uploaded frame against the Sayfa1 vocabularies.
+
+    Returns (records, errors): job dicts for the valid rows, ready for
+    SheetMirror.append_rows, and a frame with the file row number and the
+    problems of every rejected row. Raises ValueError when required
+    columns are missing.
+    """
+    upload = upload.rename(columns=lambda c: str(c).strip())
+    missing = [c for c in REQUIRED_COLUMNS if c not in upload.columns]
+    if missing:
+        raise ValueError("Eksik sütun(lar): " + ", ".join(missing))
+    upload = upload.dropna(how="all")
+
+    jobs = pd.DataFrame(index=upload.index)
+    for col in JOB_COLUMNS:
+        jobs[col] = _text(upload[col]) if col in upload.columns else ""
+    jobs["Durum"] = jobs["Durum"].where(jobs["Durum"] != "", DEFAULT_DURUM)
+    tarih = parse_dates(upload["Tarih"])
+    ucret = parse_amounts(upload["Ücret"])
+
+    places = pd.MultiIndex.from_tuples(
+        [(ilce, mahalle) for ilce, mahalleler in ilce_mahalle_map.items() for mahalle in mahalleler]
+    )
+    rules = [
+        ("Tarih okunamadı", tarih.isna()),
+        ("Müşteri boş", jobs["Müşteri"] == ""),
+        ("İş Türü listede yok", ~jobs["İş Türü"].isin(IS_TURU_LIST)),
+        ("Durum listede yok", ~jobs["Durum"].isin(DURUM_LIST)),
+        ("Ödeme Durumu listede yok", ~jobs["Ödeme Durumu"].isin(ODEME_DURUMU_LIST)),
+        ("İlçe listede yok", ~jobs["İlçe"].isin(list(ilce_mahalle_map))),
+        ("Mahalle bu ilçede yok", jobs["İlçe"].isin(list(ilce_mahalle_map))
+            & ~pd.MultiIndex.from_arrays([jobs["İlçe"], jobs["Mahalle"]]).isin(places)),
+        ("Ücret sayı değil", ucret.isna()),
+        ("Ücret negatif", ucret < 0),
+    ]
+
+    problems = pd.Series("", index=jobs.index)
+    for message, mask in rules:
+        problems = problems + np.where(mask.to_numpy(), message + "; ", "")
+    bad = problems != ""
+
+    errors = pd.DataFrame({
+        "Satır": jobs.index[bad] + FIRST_DATA_ROW,
+        "Müşteri": jobs.loc[bad, "Müşteri"],
+        "Hatalar": problems[bad].str.rstrip("; "),
+    }).reset_index(drop=True)
+
+    valid = jobs[~bad].copy()
+    valid["Tarih"] = tarih[~bad].dt.strftime("%Y-%m-%d")
+    whole = ucret[~bad] % 1 == 0
+    valid["Ücret"] = ucret[~bad].astype(object).where(~whole, ucret[~bad].round().astype("Int64").astype(object))
+    return valid.to_dict("records"), errors
@@ -0,0 +1,63 @@
+import threading
+
+
+# --------------------------------------------------------
+# PROCESS-WIDE VERİ ÖNBELLEĞİ (single-flight)
+# --------------------------------------------------------
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SharedCache:
+    """Parsed datasets shared by every session of the process.
+
+    Each dataset name holds one entry, tagged with the revision it was built
+    from. When several sessions miss on the same (name, revision) at once,
+    only the first runs the loader; the others wait for its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._inflight = {}
+
+    def get(self, name, revision, loader):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == revision:
+                return entry[1]
+            flight = self._inflight.get((name, revision))
+            leader = flight is None
+            if leader:
+                flight = self._inflight[(name, revision)] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            with self._lock:
+                self._entries[name] = (revision, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop((name, revision), None)
+            flight.done.set()
+
+    def invalidate(self, name):
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def put(self, name, revision, value):
+        """Store a value the caller already has, e.g. right after writing it."""
+        with self._lock:
+            self._entries[name] = (revision, value)
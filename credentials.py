@@ -0,0 +1,52 @@
+import hashlib
+import hmac
+import os
+
+
+# --------------------------------------------------------
+# KİMLİK İNDEKSİ (kullanıcı adı -> tuzlu şifre özeti + rol)
+# --------------------------------------------------------
+def normalize_username(username):
+    return str(username).strip().lower()
+
+
+def normalize_password(password):
+    """Sheet cells holding a numeric password come back as '1234.0'."""
+    password = str(password).strip()
+    if password.endswith(".0") and password[:-2].isdigit():
+        return password[:-2]
+    return password
+
+
+def _digest(salt, password):
+    return hashlib.blake2b(password.encode("utf-8"), salt=salt).digest()
+
+
+class CredentialIndex:
+    """Users sheet folded into a dict for login: one lookup, no frame scan.
+
+    Passwords are kept only as salted digests; the index is rebuilt from
+    the Users frame whenever that frame is re-read.
+    """
+
+    def __init__(self, users):
+        self._entries = {}
+        for username, password, role in zip(users["username"], users["password"], users["role"]):
+            key = normalize_username(username)
+            if not key:
+                continue
+            salt = os.urandom(16)
+            self._entries[key] = (salt, _digest(salt, normalize_password(password)), str(role).strip())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def check(self, username, password):
+        """Role for a valid username/password pair, else None."""
+        entry = self._entries.get(normalize_username(username))
+        if entry is None:
+            return None
+        salt, digest, role = entry
+        if hmac.compare_digest(digest, _digest(salt, str(password).strip())):
+            return role
+        return None
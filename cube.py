@@ -0,0 +1,215 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from schema import IS_TURU_LIST, ODEME_DURUMU_LIST, ilce_mahalle_map
+
+
+# --------------------------------------------------------
+# ANALİZ KÜPÜ (konum × iş türü × ödeme × ay)
+# --------------------------------------------------------
+# A dense NumPy array holding job count and Ücret for every
+# (İlçe, Mahalle) × İş Türü × Ödeme Durumu × month cell. The axes start
+# from the fixed lists in schema.py and grow when a value outside them (a
+# legacy mahalle, a new month) shows up. Like JobAggregates it is
+# subscribed to the SheetMirror and only folds in the rows that changed;
+# every roll-up (year/quarter/month, ilçe/mahalle) is a sum over axes of
+# the array, never a scan of the jobs.
+
+PERIODS = ("Yıl", "Çeyrek", "Ay")
+GROUPS = ("İlçe", "Mahalle", "İş Türü")
+MEASURES = ("Adet", "Ücret")
+UNSPECIFIED = "(belirtilmemiş)"
+UNDATED = "Tarihsiz"
+
+
+class _Axis:
+    """Labels of one cube axis and their positions; unseen labels are appended."""
+
+    def __init__(self, labels=()):
+        self.labels = []
+        self.positions = {}
+        self.codes(pd.Index(list(labels), dtype=object))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def codes(self, values, label=None):
+        """Positions of `values`; only the distinct values are looked up one by one."""
+        codes, uniques = pd.factorize(values)
+        positions = np.empty(len(uniques), dtype=np.intp)
+        for i, value in enumerate(uniques):
+            value = label(value) if label else value
+            if value not in self.positions:
+                self.positions[value] = len(self.labels)
+                self.labels.append(value)
+            positions[i] = self.positions[value]
+        return positions[codes]
+
+
+def _text(jobs, col):
+    if col not in jobs.columns:
+        return pd.Series("", index=jobs.index)
+    return jobs[col].astype(object).where(jobs[col].notna(), "").astype(str).str.strip()
+
+
+def _month_key(key):
+    """yyyymm integer (0 when undated) -> "yyyy-mm"."""
+    return f"{key // 100:04d}-{key % 100:02d}" if key else ""
+
+
+def period_label(month, period):
+    """"2024-05" -> "2024" / "2024-Ç2" / "2024-05"."""
+    if not month:
+        return UNDATED
+    if period == "Yıl":
+        return month[:4]
+    if period == "Çeyrek":
+        return f"{month[:4]}-Ç{(int(month[5:7]) - 1) // 3 + 1}"
+    return month
+
+
+class JobCube:
+    """Job count and Ücret per location, İş Türü, Ödeme Durumu and month."""
+
+    def __init__(self, parse):
+        self.parse = parse  # raw sheet frame -> parsed jobs frame
+        self._lock = threading.Lock()
+        self._archive = None
+        self._reset()
+
+    def _reset(self):
+        locations = [(ilce, mahalle) for ilce, mahalleler in ilce_mahalle_map.items() for mahalle in mahalleler]
+        self._locations = _Axis(locations)
+        self._types = _Axis(IS_TURU_LIST)
+        self._payments = _Axis(ODEME_DURUMU_LIST)
+        self._months = _Axis()
+        self._data = np.zeros(self._shape())
+
+    def _shape(self):
+        return (len(self._locations), len(self._types), len(self._payments), len(self._months), len(MEASURES))
+
+    # ---------------- maintenance ----------------
+    def _add(self, locations, types, payments, months, counts, amounts, month_label=None):
+        index = (
+            self._locations.codes(locations),
+            self._types.codes(types),
+            self._payments.codes(payments),
+            self._months.codes(months, month_label),
+        )
+        shape = self._shape()
+        if shape != self._data.shape:
+            grown = np.zeros(shape)
+            grown[tuple(slice(0, n) for n in self._data.shape)] = self._data
+            self._data = grown
+        np.add.at(self._data, index + (0,), counts)
+        np.add.at(self._data, index + (1,), amounts)
+
+    def _fold_jobs(self, jobs, sign):
+        if jobs.empty:
+            return
+        tarih = jobs["Tarih"]
+        self._add(
+            pd.MultiIndex.from_arrays([_text(jobs, "İlçe"), _text(jobs, "Mahalle")]),
+            _text(jobs, "İş Türü"),
+            _text(jobs, "Ödeme Durumu"),
+            (tarih.dt.year * 100 + tarih.dt.month).fillna(0).astype(int),
+            np.full(len(jobs), float(sign)),
+            sign * jobs["Ücret"].fillna(0).to_numpy(dtype=float),
+            month_label=_month_key,
+        )
+
+    def _fold_archive(self, table, sign):
+        """Archived cells carry no Mahalle; they land in their ilçe's unspecified bucket."""
+        if table is None or table.empty:
+            return
+        self._add(
+            pd.MultiIndex.from_arrays([table["İlçe"].astype(str), [""] * len(table)]),
+            table["İş Türü"].astype(str),
+            table["Ödeme Durumu"].astype(str),
+            table["Ay"].astype(str),
+            sign * table["Adet"].to_numpy(dtype=float),
+            sign * table["Ücret"].to_numpy(dtype=float),
+        )
+
+    def rebuild(self, raw):
+        with self._lock:
+            self._reset()
+            if not raw.empty:
+                self._fold_jobs(self.parse(raw), +1)
+            self._fold_archive(self._archive, +1)
+
+    def rows_changed(self, columns, removed, added):
+        def frame(rows):
+            raw = pd.DataFrame(rows, columns=columns)
+            return raw.where(raw != "")
+
+        with self._lock:
+            if removed:
+                self._fold_jobs(self.parse(frame(removed)), -1)
+            if added:
+                self._fold_jobs(self.parse(frame(added)), +1)
+
+    def set_archive(self, table):
+        """Cells of archived jobs, in JobAggregates' layout (DIMENSIONS + Adet, Ücret)."""
+        with self._lock:
+            self._fold_archive(self._archive, -1)
+            self._archive = table
+            self._fold_archive(table, +1)
+
+    # ---------------- queries ----------------
+    def ilceler(self):
+        with self._lock:
+            return list(dict.fromkeys(ilce for ilce, _ in self._locations.labels if ilce))
+
+    def years(self):
+        with self._lock:
+            months = list(self._months.labels)
+            counts = self._data[..., 0].sum(axis=(0, 1, 2))
+        return sorted({m[:4] for m, n in zip(months, counts) if m and n > 0}, reverse=True)
+
+    def pivot(self, by="İlçe", period="Ay", measure="Ücret", ilce=None, is_turu=None, odeme=None, year=None):
+        """`measure` per `by` value (rows) and period (columns), summed over the cube.
+
+        `ilce` narrows the locations (by="Mahalle" then drills into that
+        ilçe), `is_turu`/`odeme` pick one value of their axis and `year`
+        keeps that year's months only. Rows and columns that stay empty
+        are dropped; a Toplam column is added at the end.
+        """
+        with self._lock:
+            locations = list(self._locations.labels)
+            types = list(self._types.labels)
+            payments = list(self._payments.labels)
+            months = list(self._months.labels)
+            cube = self._data[..., MEASURES.index(measure)]
+
+            if ilce is not None:
+                cube = cube[[i for i, (name, _) in enumerate(locations) if name == ilce]]
+                locations = [loc for loc in locations if loc[0] == ilce]
+            if is_turu is not None:
+                cube = cube[:, [i for i, t in enumerate(types) if t == is_turu]]
+            if odeme is not None:
+                cube = cube[:, :, [i for i, p in enumerate(payments) if p == odeme]]
+            if year is not None:
+                keep = [i for i, m in enumerate(months) if m[:4] == str(year)]
+                cube = cube[..., keep]
+                months = [months[i] for i in keep]
+
+            if by == "İş Türü":
+                grid, labels = cube.sum(axis=(0, 2)), types
+            else:
+                grid = cube.sum(axis=(1, 2))
+                if by == "İlçe":
+                    labels = [name or UNSPECIFIED for name, _ in locations]
+                else:
+                    labels = [f"{name} / {mahalle or UNSPECIFIED}" if ilce is None else mahalle or UNSPECIFIED
+                              for name, mahalle in locations]
+
+        table = pd.DataFrame(grid, index=pd.Index(labels, name=by), columns=months)
+        table = table.T.groupby([period_label(m, period) for m in months]).sum().T
+        table = table.groupby(level=0, sort=False).sum()
+        table = table.loc[(table != 0).any(axis=1), (table != 0).any(axis=0)]
+        table = table[sorted(table.columns, key=lambda c: (c == UNDATED, c))]
+        table["Toplam"] = table.sum(axis=1)
+        return table.sort_values("Toplam", ascending=False)
@@ -0,0 +1,277 @@
+import io
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# xlsxwriter and reportlab (with pdfworker) are imported inside the
+# functions that use them: they are among the slowest imports of the app
+# and only the export buttons need them (see `python bench.py --imports`).
+
+
+# --------------------------------------------------------
+# HTML TABLO
+# --------------------------------------------------------
+def _date_cell(value):
+    return "" if pd.isna(value) else value.strftime("%Y-%m-%d")
+
+
+def table_html(df):
+    """Typed frame -> HTML: dates without time, whole-TL amounts, blanks for missing."""
+    dates = {c: _date_cell for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])}
+    html = df.to_html(index=False, na_rep="", float_format="{:.0f}".format, formatters=dates)
+    return f'<div class="table-wrap">{html}</div>'
+
+
+# --------------------------------------------------------
+# EXCEL (XLSX) RAPORU
+# --------------------------------------------------------
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+MONEY_COLUMNS = ("Ücret",)
+
+
+def _typed_columns(df):
+    """Convert each column once, up front: (kind, values, blank mask)."""
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if pd.api.types.is_datetime64_any_dtype(col):
+            serial = ((col - EXCEL_EPOCH) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+            columns.append(("date", serial.tolist(), np.isnan(serial).tolist()))
+        elif name in MONEY_COLUMNS or pd.api.types.is_numeric_dtype(col):
+            num = pd.to_numeric(col, errors="coerce").to_numpy(dtype=float)
+            kind = "money" if name in MONEY_COLUMNS else "number"
+            columns.append((kind, num.tolist(), np.isnan(num).tolist()))
+        else:
+            text = col.astype(object).where(col.notna(), "").astype(str)
+            columns.append(("text", text.tolist(), (text == "").tolist()))
+    return columns
+
+
+def xlsx_report(df, sheet_name="Ödeme Raporu"):
+    """Frame -> XLSX bytes, streamed row by row in xlsxwriter's constant-memory mode."""
+    import xlsxwriter
+
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet(sheet_name)
+
+    header = workbook.add_format({"bold": True, "bg_color": "#E6EEF8", "border": 1})
+    formats = {
+        "date": workbook.add_format({"num_format": "dd.mm.yyyy"}),
+        "money": workbook.add_format({"num_format": '#,##0 "TL"'}),
+        "number": None,
+        "text": None,
+    }
+    writers = {
+        "date": worksheet.write_number,
+        "money": worksheet.write_number,
+        "number": worksheet.write_number,
+        "text": worksheet.write_string,
+    }
+
+    worksheet.write_row(0, 0, [str(c) for c in df.columns], header)
+    columns = [(writers[kind], formats[kind], values, blank) for kind, values, blank in _typed_columns(df)]
+
+    # constant_memory flushes each row as the next begins, so cells are
+    # written strictly row by row; the per-column writer and format are
+    # chosen once above, not per cell.
+    for r in range(len(df)):
+        for c, (write, fmt, values, blank) in enumerate(columns):
+            if not blank[r]:
+                write(r + 1, c, values[r], fmt)
+
+    workbook.close()
+    return output.getvalue()
+
+
+# --------------------------------------------------------
+# PDF – BEKLEYEN ÖDEMELER
+# --------------------------------------------------------
+def format_date(col):
+    return col.dt.strftime("%d.%m.%Y").fillna("")
+
+
+def format_money(col):
+    return pd.to_numeric(col, errors="coerce").fillna(0).map("{:,.0f} TL".format)
+
+
+def bekleyen_pdf(bekleyen):
+    """Bekleyen Ödemeler Raporu as PDF bytes (rows formatted column-wise)."""
+    from reportlab.platypus import Paragraph, Table
+
+    from pdfworker import pdf_document, pdf_table_style
+
+    pdf_buffer = io.BytesIO()
+    doc, styles = pdf_document(pdf_buffer)
+    elements = []
+    elements.append(Paragraph("<b>Bekleyen Ödemeler Raporu</b>", styles["Title"]))
+    elements.append(Paragraph(f"Tarih: {datetime.now().strftime('%d.%m.%Y')}", styles["Normal"]))
+    elements.append(Paragraph(" ", styles["Normal"]))
+
+    gecikme = bekleyen["Gecikme (Gün)"]
+    table_data = [["Tarih", "Müşteri", "Ada / Parsel", "Ücret (TL)", "Gecikme (Gün)"]]
+    table_data += [list(row) for row in zip(
+        format_date(bekleyen["Tarih"]),
+        bekleyen["Müşteri"].astype(str),
+        bekleyen["Ada_Parsel"].astype(str),
+        format_money(bekleyen["Ücret"]),
+        gecikme.astype("Int64").astype(str).where(gecikme.notna(), ""),
+    )]
+
+    table = Table(table_data, repeatRows=1)
+    table.setStyle(pdf_table_style())
+    elements.append(table)
+    doc.build(elements)
+    return pdf_buffer.getvalue()
+
+
+# --------------------------------------------------------
+# PDF – MÜŞTERİ EKSTRELERİ (toplu, ZIP)
+# --------------------------------------------------------
+# One statement per Müşteri, each built by its own task in a process pool
+# (reportlab is pure Python, so threads would share one core). The ledger
+# is formatted into table rows here; workers get those rows only, build the
+# PDF with pdfworker (which loads reportlab and nothing else of the app) and
+# return its bytes. The caller's thread writes them into the ZIP in
+# completion order and counts progress. The pool is started once and
+# shared by every batch; where worker processes cannot be started the
+# statements are built on threads instead.
+
+def statement_rows(ledger):
+    """A customer's ledger -> statement table rows as text, header row first."""
+    gecikme = ledger["Gecikme (Gün)"]
+    table_data = [["Tarih", "İş Türü", "Ada / Parsel", "Ücret (TL)", "Ödeme", "Gecikme (Gün)"]]
+    table_data += [list(row) for row in zip(
+        format_date(ledger["Tarih"]),
+        ledger["İş Türü"].astype(str),
+        ledger["Ada_Parsel"].astype(str),
+        format_money(ledger["Ücret"]),
+        ledger["Ödeme Durumu"].astype(object).where(ledger["Ödeme Durumu"].notna(), "").astype(str),
+        gecikme.astype("Int64").astype(str).where(gecikme.notna(), ""),
+    )]
+    return table_data
+
+
+def statement_filename(customer):
+    name = re.sub(r'[\\/:*?"<>|\s]+', "_", str(customer)).strip("_.") or "musteri"
+    return f"ekstre_{name}.pdf"
+
+
+class BatchProgress:
+    """Shared counters of a running batch; read by the page that polls it."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = []  # (customer, error text)
+
+
+class StatementPool:
+    """Worker processes for statement PDFs, started on first use and kept.
+
+    A pool whose worker died is replaced on the next submit; threads stand
+    in where worker processes cannot be started.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _start(self):
+        from pdfworker import worker_context
+
+        try:
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=worker_context())
+        except (NotImplementedError, OSError, ValueError):
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ekstre")
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._start()
+            try:
+                return self._pool.submit(fn, *args)
+            except BrokenExecutor:
+                self._pool = self._start()
+                return self._pool.submit(fn, *args)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def statements_zip(statements, progress, pool, today=None):
+    """ZIP bytes with one PDF per (customer, ledger, balance) in `statements`.
+
+    Each statement is a separate task on `pool` (a StatementPool); a failed
+    one is recorded in `progress.failed` and left out instead of sinking
+    the batch.
+    """
+    from pdfworker import statement_pdf
+
+    today = (today or datetime.now()).strftime("%d.%m.%Y")
+    output = io.BytesIO()
+    names = set()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        futures = {
+            pool.submit(statement_pdf, str(customer), today, dict(balance), statement_rows(ledger)): customer
+            for customer, ledger, balance in statements
+        }
+        for future in as_completed(futures):
+            customer = futures[future]
+            try:
+                pdf = future.result()
+            except Exception as e:
+                progress.failed.append((customer, str(e)))
+            else:
+                name = statement_filename(customer)
+                while name in names:
+                    name = name[:-4] + "_.pdf"
+                names.add(name)
+                archive.writestr(name, pdf)
+            progress.done += 1
+    return output.getvalue()
+
+
+# --------------------------------------------------------
+# ARKA PLAN RAPOR ÜRETİMİ
+# --------------------------------------------------------
+class BackgroundReports:
+    """Runs report builders on worker threads and keeps the results by key.
+
+    The key should identify both the filter selection and the data
+    revision, so a finished report is served again instantly and a stale
+    one is never returned. Only the newest `max_entries` reports are kept.
+    """
+
+    def __init__(self, workers=2, max_entries=20):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rapor")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is not None:
+                self._jobs.move_to_end(key)
+            return future
+
+    def submit(self, key, fn, *args):
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._jobs[key] = self._pool.submit(fn, *args)
+            self._jobs.move_to_end(key)
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+            return future
@@ -0,0 +1,531 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from storage import RowConflict, delete_by_id, move_by_id, update_by_id
+
+
+# --------------------------------------------------------
+# SAYFA1 – YEREL SQLITE AYNASI
+# --------------------------------------------------------
+# Rows are stored by their data position in the worksheet (sheet row - 2),
+# with the raw cell values and a hash of them. A sync only writes rows whose
+# hash changed, and the frame built from the mirror keeps that position as
+# its index so callers can address sheet rows directly. The sheet revision
+# last synced is kept in meta, so a restart against an unchanged sheet
+# downloads nothing.
+#
+# Positions are only good for reading: by the time a write reaches the
+# sheet its rows may have moved (a row inserted or sorted by hand, a
+# delete or an archive run). With `id_column` set, every row gets a stable
+# ID in that column (added to the sheet on the first sync, given to new
+# rows on append) and update_cells / delete_rows take IDs instead of
+# positions; an ID is turned into a sheet position only when the write is
+# sent.
+
+HEADER_ROWS = 1
+
+
+def row_hash(values):
+    payload = json.dumps(values, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def pad_row(values, width):
+    values = list(values[:width])
+    return values + [""] * (width - len(values))
+
+
+def new_row_id():
+    """Random row ID; the letter keeps the sheet from reading it as a number."""
+    return "r" + uuid.uuid4().hex[:12]
+
+
+def sheet_value(val):
+    """Frame cell -> value as it is written to the sheet."""
+    if val is None or (not isinstance(val, (list, tuple)) and pd.isna(val)):
+        return ""
+    if isinstance(val, datetime):
+        return val.date().isoformat()
+    if isinstance(val, date):
+        return val.isoformat()
+    if hasattr(val, "item"):  # numpy scalars
+        return val.item()
+    return val
+
+
+def frame_changes(original, edited, flag="Sil", key=None):
+    """Row-level diff of an edited view against the frame it came from.
+
+    Both frames share their index (sheet data position). Returns
+    ({row: {column: new value}}, [rows flagged for deletion]), where a row
+    is its index label, or its value in `original[key]` when `key` is
+    given. Only rows present in `edited` are compared, so a search-filtered
+    view leaves the other rows untouched.
+    """
+    deleted = []
+    if flag in edited.columns:
+        deleted = [int(i) for i in edited.index[edited[flag].fillna(False).astype(bool)]]
+        edited = edited.drop(columns=[flag])
+
+    columns = [c for c in edited.columns if c in original.columns and c != key]
+    ids = edited.index.difference(deleted)
+    before = original.loc[ids, columns].astype(object)
+    after = edited.loc[ids, columns].astype(object)
+    before = before.where(before.notna(), "")
+    after = after.where(after.notna(), "")
+    mask = before != after
+
+    changes = {}
+    for row_id, col in zip(*np.nonzero(mask.to_numpy())):
+        changes.setdefault(int(ids[row_id]), {})[columns[col]] = sheet_value(after.iat[row_id, col])
+    if key is not None:
+        changes = {str(original.at[i, key]): row for i, row in changes.items()}
+        deleted = [str(original.at[i, key]) for i in deleted]
+    return changes, deleted
+
+
+def _parse_rows(columns, row_ids, rows):
+    """Raw rows -> frame indexed by row_id; same parser streamlit_gsheets uses, so dtypes match conn.read()."""
+    frame = TextParser([columns] + [pad_row(r, len(columns)) for r in rows]).read()
+    frame.index = pd.Index(list(row_ids), name="row_id")
+    return frame.dropna(how="all")
+
+
+class SheetMirror:
+    """On-disk copy of one worksheet, kept current by a background thread."""
+
+    def __init__(self, path, storage, worksheet="Sayfa1", interval=5, reconcile_every=120, queue=None,
+                 id_column=None, probe=None):
+        self.path = path
+        self.storage = storage
+        self.queue = queue  # optional WriteQueue; writes then return before reaching the sheet
+        self.probe = probe  # optional shared RevisionProbe; else every sync probes on its own
+        self.worksheet = worksheet
+        self.id_column = id_column  # optional header of the stable row ID column
+        self.interval = interval
+        self.reconcile_every = reconcile_every
+        self.last_error = None
+
+        self._lock = threading.Lock()       # sqlite writes + in-memory frame
+        self._sync_lock = threading.Lock()  # one sync at a time
+        self._frame = None
+        self._frame_revision = None
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._cycles = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    # ---------------- sqlite helpers ----------------
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def _meta(self, db, key, default=None):
+        row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, db, key, value):
+        db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
+
+    def _create_rows_table(self, db, columns):
+        cols = ", ".join(f"c{i}" for i in range(len(columns)))
+        db.execute("DROP TABLE IF EXISTS rows")
+        db.execute(f"CREATE TABLE rows (row_id INTEGER PRIMARY KEY, row_hash TEXT, {cols})")
+        self._set_meta(db, "columns", columns)
+
+    def _bump_revision(self, db):
+        self._set_meta(db, "revision", self._meta(db, "revision", 0) + 1)
+
+    # ---------------- public state ----------------
+    def columns(self):
+        with self._connect() as db:
+            return self._meta(db, "columns", [])
+
+    def revision(self):
+        with self._connect() as db:
+            return self._meta(db, "revision", 0)
+
+    def remote_revision(self):
+        """Sheet revision the mirror was last synced to."""
+        with self._connect() as db:
+            return self._meta(db, "remote_revision")
+
+    def is_empty(self):
+        return not self.columns()
+
+    # ---------------- sync ----------------
+    def _select(self, db, width, where, params):
+        cols = ", ".join(f"c{i}" for i in range(width))
+        return db.execute(f"SELECT row_id, row_hash, {cols} FROM rows WHERE {where}", params).fetchall()
+
+    def _upsert(self, db, columns, start, rows):
+        """Write rows starting at position `start`.
+
+        Returns (old values, new values) for each row whose hash changed;
+        old values are None for rows that did not exist yet.
+        """
+        width = len(columns)
+        placeholders = ", ".join("?" * (width + 2))
+        ids = list(range(start, start + len(rows)))
+        known = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ", ".join("?" * len(chunk))
+            for r in self._select(db, width, f"row_id IN ({marks})", chunk):
+                known[r[0]] = (r[1], list(r[2:]))
+
+        changed, written = [], []
+        for row_id, values in zip(ids, rows):
+            values = pad_row(values, width)
+            h = row_hash(values)
+            old_hash, old_values = known.get(row_id, (None, None))
+            if old_hash != h:
+                changed.append((old_values, values))
+                written.append((row_id, h, *values))
+        db.executemany(f"INSERT OR REPLACE INTO rows VALUES ({placeholders})", written)
+        return changed
+
+    # ---------------- listeners ----------------
+    def subscribe(self, listener):
+        """Register an incrementally maintained view of the mirror.
+
+        `listener.rebuild(frame)` is called right away with the current
+        contents (atomically with the registration), and again if the sheet
+        header changes. After that `listener.rows_changed(columns, removed,
+        added)` receives the raw values of every row that left or entered
+        the mirror, so the view never has to rescan all rows.
+        """
+        with self._lock:
+            with self._connect() as db:
+                listener.rebuild(self._load(db))
+            self._listeners.append(listener)
+
+    def _notify(self, columns, changed, removed=()):
+        old = [o for o, _ in changed if o is not None] + list(removed)
+        new = [n for _, n in changed]
+        if old or new:
+            for listener in self._listeners:
+                listener.rows_changed(columns, old, new)
+
+    def sync(self, force=False):
+        """Pull changes from the sheet; returns the number of rows touched.
+
+        A cheap revision probe (the shared `probe`, if given) runs first and
+        the cell data is only fetched when it moved (or every
+        `reconcile_every` cycles as a safety net). The fetched rows are
+        diffed by hash, so only changed rows are rewritten locally.
+        """
+        with self._sync_lock:
+            columns = self.columns()
+            self._cycles += 1
+            # While our own queued writes are on their way the sheet is
+            # behind the mirror; pulling now would undo them locally.
+            if columns and self.queue is not None and self.queue.unsent(self.worksheet):
+                return 0
+            force = force or not columns or self._cycles % self.reconcile_every == 0
+            force = force or bool(self.id_column) and self.id_column not in columns  # IDs not added yet
+
+            remote = self._remote_revision()
+            if not force and remote == self.remote_revision():
+                return 0
+
+            # The network fetch happens outside self._lock so reads and
+            # appends never wait on it.
+            values = self.storage.read_values(self.worksheet)
+            if self.id_column and values and self._assign_ids(values):
+                remote = self._remote_revision(fresh=True)
+            header, rows = ([str(c) for c in values[0]], values[HEADER_ROWS:]) if values else (columns, [])
+
+            with self._lock, self._connect() as db:
+                reset = header != columns
+                if reset:
+                    self._create_rows_table(db, header)
+                changed = self._upsert(db, header, 0, rows)
+                removed = [list(r[2:]) for r in self._select(db, len(header), "row_id >= ?", (len(rows),))]
+                db.execute("DELETE FROM rows WHERE row_id >= ?", (len(rows),))
+                touched = len(changed) + len(removed) + int(reset)
+                if touched:
+                    self._bump_revision(db)
+                self._set_meta(db, "remote_revision", remote)
+
+                if reset:
+                    frame = self._load(db)
+                    for listener in self._listeners:
+                        listener.rebuild(frame)
+                else:
+                    self._notify(header, changed, removed)
+            return touched
+
+    def _assign_ids(self, values):
+        """Give rows of fetched `values` without an ID one, in place and in the sheet.
+
+        Adds the ID column to the header first if the sheet has none.
+        Returns the number of cells written.
+        """
+        header = values[0] = [str(c) for c in values[0]]
+        cells = {}
+        if self.id_column not in header:
+            header.append(self.id_column)
+            cells[(1, len(header))] = self.id_column
+        col = header.index(self.id_column)
+        for i in range(HEADER_ROWS, len(values)):
+            row = values[i] = pad_row(values[i], len(header))
+            if row[col] == "" and any(v != "" for v in row):
+                row[col] = new_row_id()
+                cells[(i + 1, col + 1)] = row[col]
+        if cells:
+            # sent right away: positions are only trusted straight after the fetch
+            self.storage.update_cells(self.worksheet, cells)
+        return len(cells)
+
+    def _remote_revision(self, fresh=False):
+        """Sheet revision, through the shared probe when there is one (`fresh`: after our own write)."""
+        if self.probe is None:
+            return self.storage.revision()
+        return self.probe.refresh() if fresh else self.probe.current()
+
+    def _adopt_remote_revision(self):
+        """After our own write the sheet already matches the mirror; don't refetch it."""
+        if self.queue is not None:
+            return  # not sent yet; the sync after the flush reconciles instead
+        remote = self._remote_revision(fresh=True)
+        with self._lock, self._connect() as db:
+            self._set_meta(db, "remote_revision", remote)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sync()
+                self.last_error = None
+            except Exception as e:  # keep serving the last good copy
+                self.last_error = e
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"mirror-{self.worksheet}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------------- writes ----------------
+    def append_rows(self, records):
+        """Append job dicts to the sheet and to the local copy.
+
+        Only the new rows are sent; the cached frame is replaced by a new
+        one with the rows concatenated once, instead of being re-read from
+        SQLite. Frames handed out earlier are left untouched. Writes hold
+        the sync lock so a background fetch taken before the write cannot
+        undo it.
+        """
+        with self._sync_lock:
+            columns = self.columns()
+            if self.id_column in columns:
+                records = [{**record, self.id_column: record.get(self.id_column) or new_row_id()} for record in records]
+            rows = [[sheet_value(record.get(c, "")) for c in columns] for record in records]
+            if self.queue is None:
+                first_row = self.storage.append_rows(self.worksheet, rows)
+                start = first_row - HEADER_ROWS - 1
+            else:
+                self.queue.append_rows(self.worksheet, rows)
+                with self._connect() as db:
+                    start = db.execute("SELECT COALESCE(MAX(row_id) + 1, 0) FROM rows").fetchone()[0]
+
+            with self._lock:
+                with self._connect() as db:
+                    self._notify(columns, self._upsert(db, columns, start, rows))
+                    before = self._meta(db, "revision", 0)
+                    self._bump_revision(db)
+                if self._frame is not None and self._frame_revision == before:
+                    # a new object: the old frame may be in use by other sessions
+                    added = _parse_rows(columns, range(start, start + len(rows)), rows)
+                    self._frame = pd.concat([self._frame, added])
+                    self._frame_revision = before + 1
+            self._adopt_remote_revision()
+        return start
+
+    def update_cells(self, changes):
+        """Write {row: {column: value}} to the sheet and the local copy.
+
+        With an ID column `row` is the row's ID and the write lands wherever
+        that row is in the sheet when it is sent; otherwise it is the data
+        position. All changed cells go out in a single batched values request.
+        """
+        changes = {row: {col: v for col, v in values.items() if col != self.id_column}
+                   for row, values in changes.items()}
+        changes = {row: values for row, values in changes.items() if values}
+        if not changes:
+            return
+        with self._sync_lock:
+            columns = self.columns()
+            if self.id_column:
+                cells = {(str(row), columns.index(col) + 1): value
+                         for row, values in changes.items() for col, value in values.items()}
+                key = columns.index(self.id_column) + 1
+                if self.queue is not None:
+                    self.queue.update_by_id(self.worksheet, key, cells)
+                else:
+                    update_by_id(self.storage, self.worksheet, key, cells)
+            else:
+                cells = {(row + HEADER_ROWS + 1, columns.index(col) + 1): value
+                         for row, values in changes.items() for col, value in values.items()}
+                (self.queue or self.storage).update_cells(self.worksheet, cells)
+
+            with self._lock:
+                with self._connect() as db:
+                    positions = self._positions(db, columns, list(changes))
+                    changed = []
+                    for row, values in changes.items():
+                        if row not in positions:
+                            continue  # not in the local copy yet; the next sync brings it
+                        row_id = positions[row]
+                        found = self._select(db, len(columns), "row_id = ?", (row_id,))
+                        current = pad_row(list(found[0][2:]) if found else [], len(columns))
+                        for col, value in values.items():
+                            current[columns.index(col)] = value
+                        changed += self._upsert(db, columns, row_id, [current])
+                    self._notify(columns, changed)
+                    self._bump_revision(db)
+                # Reloaded on the next read: setting cells on the shared frame
+                # would change it under other sessions, and a value that does
+                # not fit the column's dtype would fail after the write was sent.
+                self._frame = None
+            self._adopt_remote_revision()
+
+    def delete_rows(self, rows):
+        """Delete rows (IDs, or data positions without an ID column) in one request.
+
+        Locally, rows below a deleted one move up, exactly as they do in the
+        sheet. By ID, the rows are deleted wherever they are when it is sent.
+        """
+        if not rows:
+            return
+        with self._sync_lock:
+            columns = self.columns()
+            if self.id_column:
+                ids = list(dict.fromkeys(str(row) for row in rows))
+                key = columns.index(self.id_column) + 1
+                if self.queue is not None:
+                    self.queue.delete_by_id(self.worksheet, key, ids)
+                else:
+                    delete_by_id(self.storage, self.worksheet, key, ids)
+            else:
+                positions = sorted({int(row) + HEADER_ROWS + 1 for row in rows})
+                (self.queue or self.storage).delete_rows(self.worksheet, positions)
+
+            self._drop_local(columns, rows)
+            self._adopt_remote_revision()
+
+    def move_rows(self, ids, moves, writes, revision):
+        """Move rows by ID out of the sheet (see storage.move_by_id) and the local copy.
+
+        `moves` and `writes` were built from the mirror at `revision`; if it
+        has moved since, nothing is written and RowConflict is raised.
+        """
+        with self._sync_lock:
+            if self.revision() != revision:
+                raise RowConflict("Sayfa bu arada değişti; hiçbir şey taşınmadı, tekrar deneyin.")
+            columns = self.columns()
+            key = columns.index(self.id_column) + 1
+            ids = list(dict.fromkeys(str(i) for i in ids))
+            if self.queue is not None:
+                self.queue.move_by_id(self.worksheet, key, ids, columns, moves, writes)
+            else:
+                move_by_id(self.storage, self.worksheet, key, ids, columns, moves, writes)
+            self._drop_local(columns, ids)
+            self._adopt_remote_revision()
+
+    def _drop_local(self, columns, rows):
+        """Remove rows (as delete_rows takes them) from the local copy; the rows below move up."""
+        with self._lock:
+            with self._connect() as db:
+                gone = np.array(sorted(self._positions(db, columns, list(rows)).values()), dtype=int)
+            if len(gone):
+                with self._connect() as db:
+                    before = self._meta(db, "revision", 0)
+                    marks = ", ".join("?" * len(gone))
+                    removed = self._select(db, len(columns), f"row_id IN ({marks})", gone.tolist())
+                    db.execute(f"DELETE FROM rows WHERE row_id IN ({marks})", gone.tolist())
+                    self._notify(columns, [], [list(r[2:]) for r in removed])
+                    below = [r[0] for r in db.execute(
+                        "SELECT row_id FROM rows WHERE row_id > ? ORDER BY row_id", (int(gone[0]),)
+                    )]
+                    # ascending, so every target position is already free
+                    shifted = np.array(below) - np.searchsorted(gone, below)
+                    db.executemany(
+                        "UPDATE rows SET row_id = ? WHERE row_id = ?",
+                        zip(shifted.tolist(), below),
+                    )
+                    self._bump_revision(db)
+                if self._frame is not None and self._frame_revision == before:
+                    frame = self._frame.drop(index=gone, errors="ignore")
+                    frame.index = pd.Index(
+                        frame.index - np.searchsorted(gone, frame.index), name="row_id"
+                    )
+                    self._frame = frame
+                    self._frame_revision = before + 1
+
+    def _positions(self, db, columns, rows):
+        """{row: row_id} for the given IDs (or positions, without an ID column) held locally."""
+        if not self.id_column:
+            return {row: int(row) for row in rows}
+        col = columns.index(self.id_column)
+        ids = [str(row) for row in rows]
+        found = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ", ".join("?" * len(chunk))
+            found.update(
+                (str(value), int(row_id))
+                for row_id, value in db.execute(f"SELECT row_id, c{col} FROM rows WHERE c{col} IN ({marks})", chunk)
+            )
+        return {row: found[str(row)] for row in rows if str(row) in found}
+
+    # ---------------- read ----------------
+    def _load(self, db):
+        columns = self._meta(db, "columns", [])
+        if not columns:
+            return pd.DataFrame()
+        cols = ", ".join(f"c{i}" for i in range(len(columns)))
+        rows = db.execute(f"SELECT row_id, {cols} FROM rows ORDER BY row_id").fetchall()
+
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        return _parse_rows(columns, [r[0] for r in rows], [list(r[1:]) for r in rows])
+
+    def snapshot(self):
+        """(revision, frame) read atomically; see read()."""
+        with self._lock:
+            with self._connect() as db:
+                revision = self._meta(db, "revision", 0)
+                if self._frame is None or self._frame_revision != revision:
+                    self._frame = self._load(db)
+                    self._frame_revision = revision
+            return revision, self._frame
+
+    def read(self):
+        """Mirror contents as a DataFrame indexed by sheet data position.
+
+        The frame is shared; callers must copy before mutating it.
+        """
+        return self.snapshot()[1]
@@ -1,11 +1,9 @@
 import streamlit as st
 import pandas as pd
-from streamlit_gsheets import GSheetsConnection
-import altair as alt
+from storage import open_storage, values_frame
+from schema import ID_COLUMN
+from scheduler import RequestScheduler
 from datetime import datetime
-import io
-import xlsxwriter
-import base64
 
 st.set_page_config(
     page_title="Ödeme Paneli",
@@ -16,10 +14,28 @@ st.set_page_config(
 st.title("💰 Ödeme Paneli")
 
 # ------------------------------------------------------
-# GOOGLE SHEETS
+# VERİ DEPOSU (secrets.toml [storage]; varsayılan Google Sheets)
 # ------------------------------------------------------
-conn = st.connection("gsheets", type=GSheetsConnection)
-df = conn.read(worksheet="Sayfa1", ttl=5)
+@st.cache_resource
+def get_storage():
+    try:
+        config = dict(st.secrets.get("storage", {}))
+    except FileNotFoundError:
+        config = {}
+    return RequestScheduler(
+        open_storage(config),
+        requests_per_minute=float(config.get("requests_per_minute", 60)),
+        burst=int(config.get("burst", 10)),
+        max_concurrency=int(config.get("max_concurrency", 4)),
+    )
+
+
+@st.cache_data(ttl=5)
+def load_sayfa1():
+    return values_frame(get_storage().read_values("Sayfa1"))
+
+
+df = load_sayfa1().drop(columns=[ID_COLUMN], errors="ignore")
 df = df.fillna("")
 df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce")
 
@@ -71,6 +87,8 @@ odenen["Ay"] = odenen["Tarih"].dt.to_period("M").astype(str)
 aylik = odenen.groupby("Ay")["Ücret"].sum().reset_index()
 
 if not aylik.empty:
+    import altair as alt  # only loaded when there is a chart to draw
+
     chart = (
         alt.Chart(aylik)
         .mark_bar(cornerRadius=6)
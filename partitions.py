@@ -0,0 +1,59 @@
+import numpy as np
+
+
+# --------------------------------------------------------
+# TARİH BÖLÜMLERİ (yıl × ay -> satır pozisyonları)
+# --------------------------------------------------------
+class DatePartitions:
+    """Row positions per (year, month) of a datetime column, built once per revision.
+
+    Building is one stable argsort over integer month keys; afterwards a
+    year/month filter only touches the positions it returns. Rows without
+    a date belong to no partition, so they only show up unfiltered.
+    """
+
+    def __init__(self, dates):
+        valid = dates.notna().to_numpy()
+        years = dates.dt.year.to_numpy(dtype=float)
+        months = dates.dt.month.to_numpy(dtype=float)
+        keys = np.where(valid, years * 12 + months - 1, -1).astype(np.int64)
+
+        order = np.argsort(keys, kind="stable")
+        order = order[keys[order] >= 0]
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(sorted_keys) != 0]) if len(order) else np.arange(0)
+        ends = np.r_[starts[1:], len(order)]
+
+        self.size = len(dates)
+        self._order = order
+        self._slices = {}  # (year, month) -> (start, end) in _order
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            year, month = divmod(int(sorted_keys[start]), 12)
+            self._slices[(year, month + 1)] = (start, end)
+
+    def years(self):
+        """Years with at least one dated row, newest first."""
+        return sorted({year for year, _ in self._slices}, reverse=True)
+
+    def months(self, year=None):
+        """Months (1-12) with at least one row, optionally within one year."""
+        return sorted({m for y, m in self._slices if year is None or y == year})
+
+    def rows(self, year=None, month=None):
+        """Sorted row positions for a year and/or month; None means no filter."""
+        if year is None and month is None:
+            return np.arange(self.size)
+        parts = [
+            self._order[start:end]
+            for (y, m), (start, end) in self._slices.items()
+            if (year is None or y == year) and (month is None or m == month)
+        ]
+        if not parts:
+            return np.arange(0)
+        return np.sort(np.concatenate(parts))
+
+    def select(self, df, year=None, month=None):
+        """The rows of `df` (the frame the index was built from) in that year/month."""
+        if year is None and month is None:
+            return df
+        return df.iloc[self.rows(year, month)]
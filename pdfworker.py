@@ -0,0 +1,113 @@
+import io
+import multiprocessing
+import sys
+import threading
+import types
+from contextlib import contextmanager
+from functools import lru_cache
+from multiprocessing import context
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+
+# --------------------------------------------------------
+# PDF İŞÇİLERİ (yalnızca reportlab)
+# --------------------------------------------------------
+# Statement PDFs are built in worker processes. A worker loads this module
+# and nothing else of the app: no pandas, no Streamlit, no storage. The
+# rows arrive already formatted as text. Workers come from a forkserver
+# that has this module preloaded, or are spawned where there is no
+# forkserver. Both kinds normally re-import the parent's __main__, and
+# under Streamlit that is the app script, so __main__ is hidden while a
+# worker starts.
+
+
+@lru_cache(maxsize=None)
+def pdf_table_style():
+    return TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("ALIGN", (3, 1), (3, -1), "RIGHT"),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+    ])
+
+
+def pdf_document(pdf_buffer):
+    """A4 document with the report margins, and the sample paragraph styles."""
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+    return doc, getSampleStyleSheet()
+
+
+def statement_pdf(customer, today, balance, table_data):
+    """Statement PDF bytes: `today` as text, balance sums and the ledger table (header row first)."""
+    pdf_buffer = io.BytesIO()
+    doc, styles = pdf_document(pdf_buffer)
+    elements = []
+    elements.append(Paragraph(f"<b>Müşteri Ekstresi – {customer}</b>", styles["Title"]))
+    elements.append(Paragraph(f"Tarih: {today}", styles["Normal"]))
+    elements.append(Paragraph(
+        f"Faturalanan: {balance['Faturalanan']:,.0f} TL · Ödenen: {balance['Ödenen']:,.0f} TL · "
+        f"<b>Bekleyen: {balance['Bekleyen']:,.0f} TL</b>",
+        styles["Normal"],
+    ))
+    elements.append(Paragraph(" ", styles["Normal"]))
+
+    table = Table(table_data, repeatRows=1)
+    table.setStyle(pdf_table_style())
+    elements.append(table)
+    doc.build(elements)
+    return pdf_buffer.getvalue()
+
+
+# ---------------- worker processes ----------------
+_starting = threading.Lock()
+
+
+@contextmanager
+def _without_main():
+    """Show multiprocessing a bare __main__ while a worker is being started."""
+    with _starting:
+        main = sys.modules.get("__main__")
+        bare = types.ModuleType("__main__")
+        sys.modules["__main__"] = bare
+        try:
+            yield
+        finally:
+            # Streamlit may have installed the next run's script meanwhile
+            if sys.modules.get("__main__") is bare:
+                sys.modules["__main__"] = main
+
+
+class SpawnWorker(context.SpawnProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        with _without_main():
+            return context.SpawnProcess._Popen(process_obj)
+
+
+class SpawnContext(context.SpawnContext):
+    Process = SpawnWorker
+
+
+if hasattr(context, "ForkServerProcess"):
+    class ForkServerWorker(context.ForkServerProcess):
+        @staticmethod
+        def _Popen(process_obj):
+            with _without_main():
+                return context.ForkServerProcess._Popen(process_obj)
+
+    class ForkServerContext(context.ForkServerContext):
+        Process = ForkServerWorker
+
+
+def worker_context():
+    """Multiprocessing context for PDF workers: forkserver if available, else spawn."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = ForkServerContext()
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return SpawnContext()
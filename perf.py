@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------------------------
+# PERFORMANS ÖLÇÜMÜ (span + sayaç)
+# --------------------------------------------------------
+# Spans are timed with perf_counter and kept in a rolling window per
+# (page, stage), so percentiles describe recent reruns only. The page is
+# taken from the calling thread (Streamlit runs each session's script on
+# its own thread, and a fragment rerun on a new one, so fragments set it
+# again); work on background threads is filed under BACKGROUND.
+
+BACKGROUND = "arka plan"
+
+
+class PerfStats:
+    """Process-wide rolling timings and counters."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans = defaultdict(lambda: deque(maxlen=self.window))
+        self._counters = defaultdict(float)
+
+    # ---------------- recording ----------------
+    def set_page(self, page):
+        self._local.page = page
+
+    def current_page(self):
+        return getattr(self._local, "page", BACKGROUND)
+
+    def record(self, stage, seconds, page=None):
+        key = (page or self.current_page(), stage)
+        with self._lock:
+            self._spans[key].append(seconds)
+
+    @contextmanager
+    def span(self, stage, page=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, page)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    # ---------------- reporting ----------------
+    def summary(self):
+        """One row per (page, stage): n, p50/p95/max in milliseconds."""
+        with self._lock:
+            spans = {key: np.array(values) for key, values in self._spans.items()}
+        rows = [
+            (page, stage, len(v), *(np.percentile(v, [50, 95]) * 1000), v.max() * 1000)
+            for (page, stage), v in sorted(spans.items())
+        ]
+        return pd.DataFrame(rows, columns=["Sayfa", "Aşama", "Adet", "p50 (ms)", "p95 (ms)", "max (ms)"])
+
+    def counters(self):
+        """[(name, {label: value}, total)] sorted by name."""
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [(name, dict(labels), value) for (name, labels), value in items]
+
+    def to_json(self):
+        return json.dumps({
+            "spans": self.summary().to_dict(orient="records"),
+            "counters": [{"name": n, "labels": labels, "value": v} for n, labels, v in self.counters()],
+        }, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        def labels_text(labels):
+            body = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            return "{" + body + "}" if body else ""
+
+        lines = ["# TYPE lihkab_span_seconds summary"]
+        for row in self.summary().itertuples(index=False):
+            base = {"page": row[0], "stage": row[1]}
+            for quantile, value in (("0.5", row[3]), ("0.95", row[4])):
+                lines.append(f"lihkab_span_seconds{labels_text({**base, 'quantile': quantile})} {value / 1000:.6f}")
+            lines.append(f"lihkab_span_seconds_count{labels_text(base)} {row[2]}")
+        for name, labels, value in self.counters():
+            lines.append(f"lihkab_{name}_total{labels_text(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path, fmt="json"):
+        text = self.to_prometheus() if fmt == "prometheus" else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+
+# --------------------------------------------------------
+# ÖLÇÜLEN DEPOLAMA
+# --------------------------------------------------------
+def _size(payload):
+    """Estimated bytes of a list of cells or rows: text cells by length, others 8.
+
+    Only the cells are walked; a whole sheet is not serialized to be measured.
+    """
+    size = 0
+    for item in payload:
+        if isinstance(item, (list, tuple)):
+            size += sum(len(v) if isinstance(v, str) else 8 for v in item)
+        else:
+            size += len(item) if isinstance(item, str) else 8
+    return size
+
+
+class InstrumentedStorage:
+    """Storage wrapper that times every call and counts API calls and (estimated) bytes."""
+
+    def __init__(self, storage, stats):
+        self.storage = storage
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def _call(self, op, fn, *args, sent=None):
+        self.stats.count("api_calls", op=op)
+        if sent is not None:
+            self.stats.count("bytes_sent", _size(sent), op=op)
+        with self.stats.span(f"storage.{op}"):
+            return fn(*args)
+
+    def read_values(self, name):
+        values = self._call("read_values", self.storage.read_values, name)
+        self.stats.count("bytes_received", _size(values), op="read_values")
+        return values
+
+    def read_column(self, name, col):
+        values = self._call("read_column", self.storage.read_column, name, col)
+        self.stats.count("bytes_received", _size(values), op="read_column")
+        return values
+
+    def revision(self):
+        return self._call("revision", self.storage.revision)
+
+    def append_rows(self, name, rows):
+        return self._call("append_rows", self.storage.append_rows, name, rows, sent=rows)
+
+    def update_cells(self, name, cells):
+        return self._call("update_cells", self.storage.update_cells, name, cells, sent=list(cells.values()))
+
+    def delete_rows(self, name, sheet_rows):
+        return self._call("delete_rows", self.storage.delete_rows, name, sheet_rows, sent=list(sheet_rows))
+
+    def write_values(self, name, rows):
+        return self._call("write_values", self.storage.write_values, name, rows, sent=rows)
+
+    def ensure_worksheet(self, name, header):
+        return self._call("ensure_worksheet", self.storage.ensure_worksheet, name, header)
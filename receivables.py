@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------------------------
+# ALACAK YAŞLANDIRMA + MÜŞTERİ CARİSİ
+# --------------------------------------------------------
+AGING_BANDS = ["0–30", "31–60", "61–90", "90+"]
+UNDATED = "Tarihsiz"
+UNNAMED = "(isimsiz)"
+_BAND_EDGES = [-np.inf, 30, 60, 90, np.inf]
+
+
+class Receivables:
+    """Outstanding Ücret per Müşteri and aging band, plus per-customer ledgers.
+
+    Built once per (data revision, day) with a handful of vectorized
+    groupbys; the views below only slice the precomputed frames.
+    """
+
+    def __init__(self, df, today):
+        today = pd.Timestamp(today).normalize()
+        customer = df["Müşteri"].fillna("").astype(str).str.strip().replace("", UNNAMED)
+        ucret = df["Ücret"].fillna(0)
+        pending = (df["Ödeme Durumu"] == "Bekliyor").fillna(False).astype(bool)
+        paid = (df["Ödeme Durumu"] == "Ödendi").fillna(False).astype(bool)
+
+        # days outstanding for every row, so pages can reuse it
+        self.days = (today - df["Tarih"]).dt.days
+
+        band = pd.cut(self.days[pending], _BAND_EDGES, labels=AGING_BANDS)
+        band = band.cat.add_categories([UNDATED]).fillna(UNDATED)
+        aging = (
+            pd.DataFrame({"Müşteri": customer[pending], "Band": band, "Ücret": ucret[pending]})
+            .pivot_table(index="Müşteri", columns="Band", values="Ücret", aggfunc="sum", fill_value=0, observed=False)
+            .reindex(columns=AGING_BANDS + [UNDATED], fill_value=0)
+        )
+        aging.columns = list(aging.columns)
+        aging["Toplam"] = aging.sum(axis=1)
+        aging["En Eski (Gün)"] = self.days[pending].groupby(customer[pending]).max()
+        aging = aging[aging["Toplam"] > 0]
+        self.aging = aging.sort_values(["90+", "Toplam"], ascending=False)
+
+        amounts = pd.DataFrame({
+            "Müşteri": customer,
+            "İş": 1,
+            "Faturalanan": ucret,
+            "Ödenen": ucret.where(paid, 0),
+            "Bekleyen": ucret.where(pending, 0),
+        })
+        self.balances = amounts.groupby("Müşteri").sum().sort_values("Bekleyen", ascending=False)
+
+        self._jobs = df
+        self._customer = customer
+        self._rows = customer.groupby(customer).indices  # Müşteri -> row positions
+
+    def totals(self):
+        """Outstanding Ücret per aging band over all customers."""
+        return self.aging[AGING_BANDS + [UNDATED, "Toplam"]].sum()
+
+    def top_overdue(self, n=10):
+        """Customers with the most Ücret outstanding for over 90 days, then by total."""
+        return self.aging.head(n).reset_index()
+
+    def customers(self):
+        return sorted(self._rows, key=str.lower)
+
+    def _ledger_rows(self, rows):
+        jobs = self._jobs.iloc[rows][["Tarih", "İş Türü", "Ada_Parsel", "Ücret", "Ödeme Durumu"]].copy()
+        jobs["Gecikme (Gün)"] = self.days.iloc[rows].where(jobs["Ödeme Durumu"] == "Bekliyor")
+        return jobs.sort_values("Tarih", ascending=False, kind="stable")
+
+    def ledger(self, customer):
+        """The customer's jobs, newest first, with days outstanding for unpaid ones."""
+        return self._ledger_rows(self._rows.get(customer, np.arange(0)))
+
+    def statements(self, customers):
+        """(customer, ledger, balance dict) per customer, from one slice, sort and groupby."""
+        rows = [self._rows[c] for c in customers if c in self._rows]
+        if not rows:
+            return []
+        jobs = self._ledger_rows(np.concatenate(rows))
+        balances = self.balances.to_dict("index")
+        return [
+            (customer, ledger, balances[customer])
+            for customer, ledger in jobs.groupby(self._customer.loc[jobs.index], sort=False)
+        ]
@@ -0,0 +1,191 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+# --------------------------------------------------------
+# SHEETS İSTEK ZAMANLAYICI (kota bütçesi + öncelik)
+# --------------------------------------------------------
+# Every storage call takes a token from a shared bucket refilled at the
+# per-minute quota. Callers queue by priority: writes first, then reads,
+# then the background revision probes, so a burst of refreshes cannot
+# starve a save. Identical reads already in flight are shared instead of
+# sent twice, and at most `max_concurrency` calls are on the wire. A 429
+# from the backend empties the bucket for a while and the call is retried,
+# so under load requests slow down instead of failing.
+
+WRITE, READ, BACKGROUND = 0, 1, 2
+
+PRIORITIES = {
+    "append_rows": WRITE,
+    "update_cells": WRITE,
+    "delete_rows": WRITE,
+    "write_values": WRITE,
+    "ensure_worksheet": WRITE,
+    "read_column": WRITE,  # locates the rows of a write that is about to go out
+    "read_values": READ,
+    "revision": BACKGROUND,
+}
+
+
+def status_code(error):
+    """HTTP status of a gspread APIError (or anything shaped like one), else None."""
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`. Not thread-safe on its own."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._at = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._at) * self.rate)
+        self._at = now
+
+    def delay(self):
+        """Seconds until a token is available (0 if one is)."""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        """Owe `seconds` worth of tokens, e.g. after the API said 429."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class RequestScheduler:
+    """Storage wrapper that budgets, orders and de-duplicates API calls."""
+
+    def __init__(self, storage, requests_per_minute=60, burst=10, max_concurrency=4,
+                 max_retries=5, backoff=2.0):
+        self.storage = storage
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.throttled = 0  # 429s absorbed by retrying
+        self.merged = 0     # reads answered by a call already in flight
+
+        self._bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._tickets = itertools.count()
+        self._active = 0
+        self._inflight = {}
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    # ---------------- budget ----------------
+    def _acquire(self, priority):
+        ticket = (priority, next(self._tickets))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self._cond.notify_all()
+            while True:
+                if self._waiting[0] == ticket and self._active < self.max_concurrency:
+                    delay = self._bucket.delay()
+                    if delay <= 0:
+                        self._bucket.take()
+                        heapq.heappop(self._waiting)
+                        self._active += 1
+                        self._cond.notify_all()
+                        return
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _call(self, op, fn, *args):
+        for attempt in range(self.max_retries + 1):
+            self._acquire(PRIORITIES[op])
+            try:
+                return fn(*args)
+            except Exception as e:
+                if status_code(e) != 429 or attempt == self.max_retries:
+                    raise
+                with self._cond:
+                    self.throttled += 1
+                    self._bucket.pause(self.backoff * 2 ** attempt)
+            finally:
+                self._release()
+
+    def _shared(self, key, op, fn, *args):
+        """Run a read once for every caller that asks for it while it is in flight."""
+        with self._cond:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.merged += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._call(op, fn, *args)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def status(self):
+        with self._cond:
+            return {
+                "waiting": len(self._waiting),
+                "active": self._active,
+                "tokens": round(self._bucket.tokens, 2),
+                "throttled": self.throttled,
+                "merged": self.merged,
+            }
+
+    # ---------------- storage calls ----------------
+    def read_values(self, name):
+        return self._shared(("read_values", name), "read_values", self.storage.read_values, name)
+
+    def read_column(self, name, col):
+        return self._call("read_column", self.storage.read_column, name, col)
+
+    def revision(self):
+        return self._shared(("revision",), "revision", self.storage.revision)
+
+    def append_rows(self, name, rows):
+        return self._call("append_rows", self.storage.append_rows, name, rows)
+
+    def update_cells(self, name, cells):
+        return self._call("update_cells", self.storage.update_cells, name, cells)
+
+    def delete_rows(self, name, sheet_rows):
+        return self._call("delete_rows", self.storage.delete_rows, name, sheet_rows)
+
+    def write_values(self, name, rows):
+        return self._call("write_values", self.storage.write_values, name, rows)
+
+    def ensure_worksheet(self, name, header):
+        return self._call("ensure_worksheet", self.storage.ensure_worksheet, name, header)
@@ -0,0 +1,133 @@
+import pandas as pd
+
+
+# --------------------------------------------------------
+# SABİT LİSTELER
+# --------------------------------------------------------
+IS_TURU_LIST = [
+    "Aplikasyon", "Yapı Aplikasyonu", "Ecri-misil", "Kübaj", "Tus",
+    "Kat İrtifağı", "Kat Mülkiyeti", "Cins Değişikliği", "İntikal",
+    "İfraz", "Yola Terk", "İhtas", "Tevhit", "Oturma Raporu Takip",
+    "Numarataj", "Zemin Tespit", "İmar Barışı (Kat Mülkiyeti)",
+    "Hatalı Bağımsız Düzeltme", "41 uygulaması", "Plankote"
+]
+
+DURUM_LIST = [
+    "Başvuru Alındı",
+    "Araziye gidildi",
+    "Evraklar hazırlanıyor",
+    "Tamamlandı"
+]
+
+ODEME_DURUMU_LIST = ["Bekliyor", "Ödendi"]
+
+ilce_mahalle_map = {
+    "Karaburun": ["Merkez","Yayla","Eğlenhoca","İnecik","Kösedere","Karareis","Saip","Sarpıncık","Hasseki","İhsaniye","Küçükbahçe","Yeniköy","Bozköy"],
+    "Çeşme": ["Alaçatı","Ilıca","Ovacık","Şifne","Reisdere","Üniversite","Musalla"],
+    "Urla": ["Merkez","Gülbahçe","Zeytinalanı","Kuşçular","Bademler","Balıklıova"],
+    "Güzelbahçe": ["Yaka","Siteler","Çamlık","Yelki"],
+    "Narlıdere": ["Çatalkaya","Limanreis","Yenikale","Altıevler"],
+    "Balçova": ["Merkez","Korutürk","Onur","İnciraltı"],
+    "Konak": ["Alsancak","Güzelyalı","Göztepe","Karataş","Kemeraltı","Basmane"],
+    "Karabağlar": ["Bahçelievler","Gülyaka","Cennetçeşme","Esenyalı"],
+    "Buca": ["Kuruçeşme","Buttepe","Gediz","Yıldız","Hürriyet"],
+    "Bornova": ["Kazımdirik","Erzene","Evka 3","Işıkkent","Çamdibi"],
+    "Bayraklı": ["Adalet","Mansuroğlu","Anadolu","Soğukkuyu"],
+    "Karşıyaka": ["Bostanlı","Mavişehir","Alaybey","Bahariye"],
+    "Çiğli": ["Sasalı","Balatçık","Ataşehir","Evka 5"],
+    "Menemen": ["Merkez","Asarlık","Türkelli","Seyrek"],
+    "Aliağa": ["Yeni Mahalle","Kazım Dirik","Hürriyet"],
+    "Foça": ["Yeni Foça","Eski Foça","Gökçealan"],
+    "Dikili": ["Salihler","Bademli","Kabakum"],
+    "Bergama": ["Atmaca","Bozköy","Zağnos"],
+    "Kınık": ["Merkez","Poyracık"],
+    "Tire": ["Derekahve","İpekçiler","Yeni Mahalle"],
+    "Ödemiş": ["Mescitli","Karadoğan","Hürriyet"],
+    "Kiraz": ["Irmak","Haliller","Cevizli"],
+    "Beydağ": ["Atatürk","Menderes"],
+    "Torbalı": ["Tepeköy","Yazıbaşı","Muratbey"],
+    "Selçuk": ["İsa Bey","14 Mayıs","Zafer"],
+    "Menderes": ["Gümüldür","Özdere","Tekeli"],
+    "Kemalpaşa": ["Ulucak","Bağyurdu","Yukarıkızılca"]
+}
+
+
+# --------------------------------------------------------
+# SAYFA1 ŞEMASI
+# --------------------------------------------------------
+# Vocabulary columns load as categoricals. Values outside the fixed list
+# are kept as extra categories (after the known ones) so legacy rows still
+# show what the sheet says; Durum is the exception and falls back to the
+# first state, as it always has.
+DEFAULT_DURUM = DURUM_LIST[0]
+TEXT_COLUMNS = ["Müşteri", "Ada_Parsel"]
+ID_COLUMN = "ID"  # stable row ID kept by SheetMirror; addresses rows for writes, not shown
+
+
+def _mahalleler():
+    seen = {}
+    for mahalleler in ilce_mahalle_map.values():
+        seen.update(dict.fromkeys(mahalleler))
+    return list(seen)
+
+
+CATEGORY_COLUMNS = {
+    "Durum": DURUM_LIST,
+    "İş Türü": IS_TURU_LIST,
+    "İlçe": list(ilce_mahalle_map),
+    "Mahalle": _mahalleler(),
+    "Ödeme Durumu": ODEME_DURUMU_LIST,
+}
+
+
+def _text(col):
+    """Sheet cell text; whole numbers read as floats ('123.0') go back to '123'."""
+    num = pd.to_numeric(col, errors="coerce")
+    whole = num.notna() & (num % 1 == 0)
+    text = col.astype(object).where(~whole, num.where(whole).astype("Int64").astype(str))
+    return text.where(col.notna(), "").astype(str).str.strip()
+
+
+def _categorical(col, vocabulary):
+    text = _text(col)
+    extra = sorted(set(text.unique()) - set(vocabulary) - {""})
+    return pd.Categorical(text.where(text != ""), categories=list(vocabulary) + extra)
+
+
+def parse_dates(col):
+    """Tarih cells -> dates; ISO (yyyy-mm-dd) first, then dd.mm.yyyy.
+
+    The formats are fixed rather than guessed from the column, so a cell
+    parses the same in a whole sheet and in a single changed row.
+    """
+    text = col.astype(object).where(col.notna(), "").astype(str).str.strip()
+    text = text.where(text != "")
+    dates = pd.to_datetime(text, format="ISO8601", errors="coerce")
+    missing = dates.isna() & text.notna()
+    if missing.any():
+        dates = dates.where(~missing, pd.to_datetime(text.where(missing), format="%d.%m.%Y", errors="coerce"))
+    return dates.dt.normalize()
+
+
+def parse_jobs(raw):
+    """Raw Sayfa1 frame -> typed jobs frame.
+
+    Tarih is one datetime64 column (time of day dropped), Ücret is float
+    (NaN when blank), the vocabulary columns are categoricals and the
+    remaining columns are plain strings with "" for blanks (the row ID
+    among them).
+    """
+    df = pd.DataFrame(index=raw.index)
+    for col in raw.columns:
+        if col == "Tarih":
+            df[col] = parse_dates(raw[col])
+        elif col == "Ücret":
+            df[col] = pd.to_numeric(raw[col], errors="coerce")
+        elif col == "Durum":
+            text = _text(raw[col])
+            df[col] = pd.Categorical(text.where(text.isin(DURUM_LIST), DEFAULT_DURUM), categories=DURUM_LIST)
+        elif col in CATEGORY_COLUMNS:
+            df[col] = _categorical(raw[col], CATEGORY_COLUMNS[col])
+        else:
+            df[col] = _text(raw[col])
+    return df
@@ -0,0 +1,162 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------------------------
+# ARAMA İNDEKSİ (Müşteri + Ada/Parsel)
+# --------------------------------------------------------
+_TR_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i", "Ş": "s", "ş": "s", "Ç": "c", "ç": "c",
+    "Ğ": "g", "ğ": "g", "Ö": "o", "ö": "o", "Ü": "u", "ü": "u",
+})
+_NUMBERS = re.compile(r"\d+")
+
+
+def fold(text):
+    """Turkish letters folded to their ASCII base, then lowercased: 'IŞIK', 'Işık'
+    and 'isik' all meet at 'isik'; 'İSKELE' -> 'iskele', 'Gündoğdu' -> 'gundogdu'."""
+    return str(text).translate(_TR_FOLD).lower()
+
+
+def _text(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return "" if pd.isna(value) else str(value)
+
+
+def parcel_key(text):
+    """'123/4', 'Ada 123 Parsel 4' -> ('123', '123/4'); a single number -> ('123', None)."""
+    numbers = [str(int(n)) for n in _NUMBERS.findall(text)]
+    if not numbers:
+        return None, None
+    return numbers[0], ("/".join(numbers[:2]) if len(numbers) > 1 else None)
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Snapshot:
+    """Immutable index over one revision of the jobs frame."""
+
+    def __init__(self, values, postings, grams, ada, parcel):
+        self.values = values        # folded unique texts
+        self.postings = postings    # value id -> row positions
+        self.grams = grams          # trigram -> set of value ids
+        self.ada = ada              # ada number -> row positions
+        self.parcel = parcel        # "ada/parsel" -> row positions
+
+    def _text_hits(self, q):
+        if len(q) >= 3:
+            grams = sorted(trigrams(q), key=lambda g: len(self.grams.get(g, ())))
+            candidates = set(self.grams.get(grams[0], ()))
+            for g in grams[1:]:
+                candidates &= self.grams.get(g, set())
+                if not candidates:
+                    break
+        else:
+            candidates = range(len(self.values))
+        return [self.postings[v] for v in sorted(candidates) if q in self.values[v]]
+
+    def search(self, query):
+        """Row positions matching `query`, exact ada/parsel matches first."""
+        q = fold(query).strip()
+        if not q:
+            return np.arange(0)
+
+        ranked = []
+        ada, parcel = parcel_key(q)
+        if parcel is not None and parcel in self.parcel:
+            ranked.append(self.parcel[parcel])
+        elif ada is not None and parcel is None and ada in self.ada:
+            ranked.append(self.ada[ada])
+        ranked += self._text_hits(q)
+
+        if not ranked:
+            return np.arange(0)
+        return pd.unique(np.concatenate(ranked))
+
+
+def _group_rows(codes):
+    """Row positions per code (codes from pd.factorize; -1 = missing)."""
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+    firsts = sorted_codes[np.r_[0, bounds]] if len(order) else []
+    return {int(c): rows for c, rows in zip(firsts, np.split(order, bounds)) if c >= 0}
+
+
+class JobSearchIndex:
+    """Process-wide search index; refresh() builds a snapshot per data revision.
+
+    Folding, parcel parsing and trigrams are done once per distinct cell
+    text and remembered, so a refresh after new jobs only pays for texts it
+    hasn't seen; the per-row work is vectorized grouping. Each refresh keeps
+    only what the new frame uses, so edited and deleted texts are dropped.
+    """
+
+    def __init__(self, columns=("Müşteri", "Ada_Parsel")):
+        self.columns = columns
+        self._folded = {}
+        self._grams = {}
+        self._parcels = {}
+        self._lock = threading.Lock()
+
+    def _fold(self, value):
+        found = self._folded.get(value)
+        if found is None:
+            found = self._folded[value] = fold(_text(value))
+        return found
+
+    def refresh(self, df):
+        with self._lock:
+            return self._refresh(df)
+
+    def _refresh(self, df):
+        folded, parcels = {}, {}
+        postings_by_text = {}
+        for col in self.columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col])
+            uniques = uniques.tolist()
+            for code, rows in _group_rows(codes).items():
+                text = folded[uniques[code]] = self._fold(uniques[code])
+                if text:
+                    postings_by_text.setdefault(text, []).append(rows)
+
+        values = list(postings_by_text)
+        postings = [np.unique(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+                    for parts in postings_by_text.values()]
+        grams = {}
+        for vid, text in enumerate(values):
+            found = self._grams.get(text)
+            if found is None:
+                found = self._grams[text] = trigrams(text)
+            for g in found:
+                grams.setdefault(g, set()).add(vid)
+
+        ada, parcel = {}, {}
+        if "Ada_Parsel" in df.columns:
+            codes, uniques = pd.factorize(df["Ada_Parsel"])
+            uniques = uniques.tolist()
+            for code, rows in _group_rows(codes).items():
+                text = folded[uniques[code]] = self._fold(uniques[code])
+                keys = self._parcels.get(text)
+                if keys is None:
+                    keys = self._parcels[text] = parcel_key(text)
+                parcels[text] = keys
+                a, p = keys
+                if a is not None:
+                    ada.setdefault(a, []).append(rows)
+                if p is not None:
+                    parcel.setdefault(p, []).append(rows)
+        ada = {k: np.sort(np.concatenate(v)) for k, v in ada.items()}
+        parcel = {k: np.sort(np.concatenate(v)) for k, v in parcel.items()}
+
+        self._folded, self._parcels = folded, parcels
+        self._grams = {text: self._grams[text] for text in values}
+        return _Snapshot(values, postings, grams, ada, parcel)
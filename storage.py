@@ -0,0 +1,458 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+
+# --------------------------------------------------------
+# DEPOLAMA ARAYÜZÜ
+# --------------------------------------------------------
+# Every backend offers the same row-level calls, addressed like the sheet
+# (1-based rows, header in row 1, cell values as the Sheets API returns
+# them):
+#
+#   read_values(name)              -> [[header...], [row...], ...] ([] if missing)
+#   read_column(name, col)         -> [header, value, ...] of one column
+#   revision()                     -> change marker, equal while nothing changed
+#   append_rows(name, rows)        -> sheet row of the first appended row
+#   update_cells(name, {(row, col): value})
+#   delete_rows(name, sheet_rows)
+#   write_values(name, rows)       -> replace the whole worksheet
+#   ensure_worksheet(name, header) -> create it (with header) if missing
+#
+# SheetStorage talks to Google Sheets; SQLiteStorage keeps the worksheets
+# in a local database so the app can run and be profiled offline.
+# update_by_id / delete_by_id below build on these calls to address rows
+# by an ID column instead of by position.
+
+
+def values_frame(values):
+    """Worksheet values (header first) -> frame, parsed the way conn.read() does."""
+    if not values:
+        return pd.DataFrame()
+    header = values[0]
+    width = len(header)
+    rows = [list(r[:width]) + [""] * (width - len(r)) for r in values[1:]]
+    if not rows:
+        return pd.DataFrame(columns=header)
+    return TextParser([header] + rows).read().dropna(how="all")
+
+
+def open_storage(config):
+    """Backend chosen by the `[storage]` config section (default: Google Sheets).
+
+    backend = "gsheets" | "sqlite"; for sqlite also `path` and, to mimic the
+    API, `latency` and `jitter` in seconds and `quota_per_minute`.
+    """
+    backend = config.get("backend", "gsheets")
+    if backend == "sqlite":
+        return SQLiteStorage(
+            config.get("path", "data/offline.sqlite"),
+            latency=float(config.get("latency", 0)),
+            jitter=float(config.get("jitter", 0)),
+            quota_per_minute=config.get("quota_per_minute"),
+        )
+    if backend == "gsheets":
+        import streamlit as st
+        from streamlit_gsheets import GSheetsConnection
+
+        return SheetStorage(st.connection("gsheets", type=GSheetsConnection))
+    raise ValueError(f"Unknown storage backend: {backend!r}")
+
+
+# --------------------------------------------------------
+# GOOGLE SHEETS – HAM DEĞER ERİŞİMİ
+# --------------------------------------------------------
+# Values are requested exactly the way streamlit_gsheets does it for
+# conn.read(), so rows fetched here parse to the same frame.
+# gspread (which comes with streamlit_gsheets) is imported in the methods
+# that need it, so the SQLite backend never loads the Google client stack.
+VALUE_PARAMS = {
+    "valueRenderOption": "UNFORMATTED_VALUE",
+    "dateTimeRenderOption": "FORMATTED_STRING",
+}
+
+
+class SheetStorage:
+    """Thin row-level access to the spreadsheet behind a GSheetsConnection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._spreadsheet = None
+        self._worksheets = {}
+
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            self._spreadsheet = self.conn.client._open_spreadsheet()
+        return self._spreadsheet
+
+    def worksheet(self, name):
+        if name not in self._worksheets:
+            self._worksheets[name] = self.spreadsheet().worksheet(name)
+        return self._worksheets[name]
+
+    def _values(self, a1_range):
+        data = self.spreadsheet().values_get(a1_range, params=VALUE_PARAMS)
+        return data.get("values", [])
+
+    def read_values(self, name):
+        """All cell values of a worksheet, header row first; [] if it does not exist."""
+        from gspread.exceptions import APIError, WorksheetNotFound
+
+        try:
+            return self._values(f"'{name}'")
+        except APIError:
+            # a missing worksheet is an unparsable range; tell it from real errors
+            try:
+                self.worksheet(name)
+            except WorksheetNotFound:
+                return []
+            raise
+
+    def read_column(self, name, col):
+        """Values of one column (1-based), header first; a fraction of read_values."""
+        from gspread.utils import rowcol_to_a1
+
+        letter = rowcol_to_a1(1, col)[:-1]
+        return [r[0] if r else "" for r in self._values(f"'{name}'!{letter}:{letter}")]
+
+    def revision(self):
+        """Cheap change marker: the spreadsheet's Drive modifiedTime (no cell data)."""
+        return self.spreadsheet().get_lastUpdateTime()
+
+    def append_rows(self, name, rows):
+        """Append rows under the existing data; returns the sheet row of the first one.
+
+        Only the new rows travel to the API, so the cost does not depend on
+        how many rows the worksheet already has.
+        """
+        response = self.worksheet(name).append_rows(
+            rows,
+            value_input_option="USER_ENTERED",
+            insert_data_option="INSERT_ROWS",
+            table_range="A1",
+        )
+        from gspread.utils import a1_to_rowcol
+
+        updated = response["updates"]["updatedRange"]  # 'Sayfa1'!A12:I12
+        return a1_to_rowcol(updated.split("!")[-1].split(":")[0])[0]
+
+    def update_cells(self, name, cells):
+        """Write {(sheet_row, sheet_col): value} in one batched values request."""
+        from gspread.utils import rowcol_to_a1
+
+        data = [
+            {"range": f"'{name}'!{rowcol_to_a1(row, col)}", "values": [[value]]}
+            for (row, col), value in sorted(cells.items())
+        ]
+        self.spreadsheet().values_batch_update({"valueInputOption": "USER_ENTERED", "data": data})
+
+    def delete_rows(self, name, sheet_rows):
+        """Delete the given sheet rows (1-based) in one batched request."""
+        sheet_id = self.worksheet(name).id
+        requests = [
+            {"deleteDimension": {"range": {
+                "sheetId": sheet_id, "dimension": "ROWS", "startIndex": row - 1, "endIndex": row,
+            }}}
+            # bottom-up, so earlier deletions don't shift later ones
+            for row in sorted(set(sheet_rows), reverse=True)
+        ]
+        self.spreadsheet().batch_update({"requests": requests})
+
+    def write_values(self, name, rows):
+        """Replace the worksheet's contents with `rows` (header first)."""
+        self.spreadsheet().values_clear(f"'{name}'")
+        self.spreadsheet().values_update(
+            f"'{name}'!A1", params={"valueInputOption": "USER_ENTERED"}, body={"values": rows}
+        )
+
+    def ensure_worksheet(self, name, header):
+        """Add the worksheet with `header` as its first row unless it exists."""
+        from gspread.exceptions import WorksheetNotFound
+
+        try:
+            self.worksheet(name)
+        except WorksheetNotFound:
+            ws = self.spreadsheet().add_worksheet(name, rows=1000, cols=max(len(header), 1))
+            self._worksheets[name] = ws
+            self.write_values(name, [header])
+
+
+# --------------------------------------------------------
+# YEREL SQLITE DEPOSU (çevrimdışı / profil için)
+# --------------------------------------------------------
+def _entered(value):
+    """Mimic USER_ENTERED: numeric text is stored as a number."""
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            number = float(text)
+        except ValueError:
+            return value
+        return number if number == number and abs(number) != float("inf") else value
+    return value
+
+
+def _trimmed(values):
+    """Drop trailing blank cells, as the Sheets API does."""
+    values = list(values)
+    while values and values[-1] in ("", None):
+        values.pop()
+    return values
+
+
+class QuotaExceeded(Exception):
+    """Simulated rate limit, shaped like gspread's APIError (response.status_code == 429)."""
+
+    def __init__(self, message="Quota exceeded"):
+        super().__init__(message)
+        self.response = SimpleNamespace(status_code=429)
+
+
+class SQLiteStorage:
+    """Worksheets kept in a local SQLite file, behind the same calls as SheetStorage.
+
+    Every call sleeps `latency` (+ up to `jitter`) seconds first, so pages
+    and benchmarks see round trips comparable to the real API. With
+    `quota_per_minute` set, calls beyond that many in the last 60 seconds
+    raise QuotaExceeded like the Sheets API does. The revision is a counter
+    bumped by every write.
+    """
+
+    def __init__(self, path, latency=0.0, jitter=0.0, quota_per_minute=None):
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_per_minute = int(quota_per_minute) if quota_per_minute else None
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._calls_lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS cells (sheet TEXT, row INTEGER, cells TEXT)")
+            db.execute("CREATE INDEX IF NOT EXISTS cells_row ON cells (sheet, row)")
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def _wait(self):
+        if self.quota_per_minute:
+            with self._calls_lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 60:
+                    self._calls.popleft()
+                if len(self._calls) >= self.quota_per_minute:
+                    raise QuotaExceeded(f"Quota exceeded: {self.quota_per_minute} requests per minute")
+                self._calls.append(now)
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _bump_revision(self, db):
+        row = db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)",
+            (json.dumps((json.loads(row[0]) if row else 0) + 1),),
+        )
+
+    def _last_row(self, db, name):
+        return db.execute("SELECT COALESCE(MAX(row), 0) FROM cells WHERE sheet = ?", (name,)).fetchone()[0]
+
+    def read_values(self, name):
+        self._wait()
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT row, cells FROM cells WHERE sheet = ? ORDER BY row", (name,)
+            ).fetchall()
+        values, expected = [], 1
+        for row, cells in rows:
+            values += [[]] * (row - expected)  # gaps read back as empty rows
+            values.append(json.loads(cells))
+            expected = row + 1
+        return values
+
+    def read_column(self, name, col):
+        return [r[col - 1] if len(r) >= col else "" for r in self.read_values(name)]
+
+    def revision(self):
+        self._wait()
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return json.loads(row[0]) if row else 0
+
+    def append_rows(self, name, rows):
+        self._wait()
+        with self._lock, self._connect() as db:
+            first = self._last_row(db, name) + 1
+            db.executemany(
+                "INSERT INTO cells (sheet, row, cells) VALUES (?, ?, ?)",
+                [(name, first + i, json.dumps(_trimmed(_entered(v) for v in r), ensure_ascii=False))
+                 for i, r in enumerate(rows)],
+            )
+            self._bump_revision(db)
+        return first
+
+    def update_cells(self, name, cells):
+        self._wait()
+        by_row = {}
+        for (row, col), value in cells.items():
+            by_row.setdefault(row, {})[col] = value
+        with self._lock, self._connect() as db:
+            for row, updates in sorted(by_row.items()):
+                found = db.execute(
+                    "SELECT cells FROM cells WHERE sheet = ? AND row = ?", (name, row)
+                ).fetchone()
+                values = json.loads(found[0]) if found else []
+                values += [""] * (max(updates) - len(values))
+                for col, value in updates.items():
+                    values[col - 1] = _entered(value)
+                payload = json.dumps(_trimmed(values), ensure_ascii=False)
+                if found:
+                    db.execute("UPDATE cells SET cells = ? WHERE sheet = ? AND row = ?", (payload, name, row))
+                else:
+                    db.execute("INSERT INTO cells (sheet, row, cells) VALUES (?, ?, ?)", (name, row, payload))
+            self._bump_revision(db)
+
+    def delete_rows(self, name, sheet_rows):
+        self._wait()
+        with self._lock, self._connect() as db:
+            # bottom-up, shifting the rows below each deleted one, like the sheet
+            for row in sorted(set(sheet_rows), reverse=True):
+                db.execute("DELETE FROM cells WHERE sheet = ? AND row = ?", (name, row))
+                db.execute("UPDATE cells SET row = row - 1 WHERE sheet = ? AND row > ?", (name, row))
+            self._bump_revision(db)
+
+    def ensure_worksheet(self, name, header):
+        if not self.read_values(name):
+            self.write_values(name, [header])
+
+    def write_values(self, name, rows):
+        self._wait()
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM cells WHERE sheet = ?", (name,))
+            db.executemany(
+                "INSERT INTO cells (sheet, row, cells) VALUES (?, ?, ?)",
+                [(name, i + 1, json.dumps(_trimmed(_entered(v) for v in r), ensure_ascii=False))
+                 for i, r in enumerate(rows)],
+            )
+            self._bump_revision(db)
+
+
+# --------------------------------------------------------
+# SATIR KİMLİĞİYLE YAZMA
+# --------------------------------------------------------
+# Sheet positions move when rows are inserted, sorted, deleted or
+# archived by anyone, so a write prepared against an earlier copy of the
+# sheet may no longer point at its row. Rows that carry an ID are located
+# just before the write by reading only the ID column.
+
+class RowConflict(Exception):
+    """A row to be written is no longer in the sheet; status 409, so never retried."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.response = SimpleNamespace(status_code=409)
+
+
+def locate_rows(storage, name, col, ids):
+    """{row id: sheet row} for the `ids` found in column `col` (1-based)."""
+    wanted = {str(i) for i in ids}
+    found = {}
+    for row, value in enumerate(storage.read_column(name, col), start=1):
+        value = str(value)
+        if value in wanted and value not in found:
+            found[value] = row
+    return found
+
+
+def update_by_id(storage, name, col, cells):
+    """Write {(row id, sheet col): value} wherever those rows are now.
+
+    Raises RowConflict, writing nothing, when one of the rows is gone.
+    """
+    rows = locate_rows(storage, name, col, {row_id for row_id, _ in cells})
+    missing = sorted({row_id for row_id, _ in cells} - set(rows))
+    if missing:
+        raise RowConflict(f"Satır sayfada bulunamadı (silinmiş olabilir): {', '.join(missing)}")
+    storage.update_cells(name, {(rows[row_id], c): value for (row_id, c), value in cells.items()})
+
+
+def delete_by_id(storage, name, col, ids):
+    """Delete the rows carrying `ids`; ids no longer in the sheet are skipped."""
+    rows = locate_rows(storage, name, col, ids)
+    if rows:
+        storage.delete_rows(name, sorted(rows.values()))
+
+
+def move_by_id(storage, name, col, ids, header, moves, writes):
+    """Move rows carrying `ids` out of `name`: append, write, then delete.
+
+    `moves` is {worksheet: rows} (rows in the `header` layout, ID in column
+    `col`) and `writes` is {worksheet: values} written whole. Worksheets
+    are created as needed. Rows whose ID a target already holds are not
+    appended again, so a move retried after a partial failure does not
+    duplicate them, and the rows are deleted from `name` only after every
+    append and write went through.
+    """
+    wanted = {str(i) for i in ids}
+    for target, rows in moves.items():
+        storage.ensure_worksheet(target, header)
+        rows = [r for r in rows if str(r[col - 1]) in wanted]
+        there = locate_rows(storage, target, col, {str(r[col - 1]) for r in rows})
+        rows = [r for r in rows if str(r[col - 1]) not in there]
+        if rows:
+            storage.append_rows(target, rows)
+    for target, values in writes.items():
+        storage.ensure_worksheet(target, values[0])
+        storage.write_values(target, values)
+    delete_by_id(storage, name, col, ids)
+
+
+# --------------------------------------------------------
+# REVİZYON YOKLAMASI
+# --------------------------------------------------------
+class RevisionProbe:
+    """Shared, rate-limited view of SheetStorage.revision().
+
+    Callers on the request path get the last probed value if it is younger
+    than `min_interval` seconds; concurrent callers share one probe.
+    """
+
+    def __init__(self, storage, min_interval=2):
+        self.storage = storage
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._at = 0.0
+
+    def current(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._value is None or now - self._at >= self.min_interval:
+                self._value = self.storage.revision()
+                self._at = now
+            return self._value
+
+    def refresh(self):
+        """Probe now, e.g. right after our own write, and share the new value."""
+        with self._lock:
+            self._value = self.storage.revision()
+            self._at = time.monotonic()
+            return self._value
@@ -0,0 +1,45 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage  # noqa: E402
+
+
+class SheetError(Exception):
+    """Shaped like gspread's APIError."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status)
+
+
+class Failing:
+    """Storage whose `kind` calls fail with `status` the next `times` times."""
+
+    def __init__(self, storage, kind, status=400, times=1):
+        self.storage = storage
+        self.kind = kind
+        self.status = status
+        self.times = times
+
+    def __getattr__(self, name):
+        call = getattr(self.storage, name)
+        if name != self.kind:
+            return call
+
+        def failing(*args, **kwargs):
+            if self.times:
+                self.times -= 1
+                raise SheetError(self.status)
+            return call(*args, **kwargs)
+
+        return failing
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteStorage(str(tmp_path / "sheet.sqlite"))
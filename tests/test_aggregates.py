@@ -0,0 +1,74 @@
+from aggregates import DIMENSIONS, JobAggregates
+from mirror import SheetMirror
+from schema import parse_jobs
+
+HEADER = ["Tarih", "Müşteri", "İlçe", "Mahalle", "İş Türü", "Ücret", "Durum", "Ödeme Durumu"]
+SHEET = [
+    HEADER,
+    ["2024-01-05", "M0", "Karaburun", "Merkez", "Aplikasyon", 1000, "Tamamlandı", "Ödendi"],
+    ["2024-01-20", "M1", "Karaburun", "Yayla", "Aplikasyon", 1500, "Başvuru Alındı", "Bekliyor"],
+    ["2024-02-11", "M2", "Çeşme", "Alaçatı", "Ecri-misil", 2500, "Tamamlandı", "Bekliyor"],
+    ["", "M3", "Çeşme", "Ilıca", "Aplikasyon", "", "", ""],
+]
+
+
+def edited_mirror(tmp_path, storage, view):
+    """Mirror with `view` subscribed, after appends, edits, deletions and a sync."""
+    storage.write_values("Sayfa1", SHEET)
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite"), storage, id_column="ID")
+    mirror.sync()
+    mirror.subscribe(view)
+
+    def row_id(customer):
+        frame = mirror.read()
+        return frame.loc[frame["Müşteri"] == customer, "ID"].item()
+
+    mirror.append_rows([
+        {"Tarih": "2024-03-01", "Müşteri": "M4", "İlçe": "Çeşme", "İş Türü": "Aplikasyon", "Ücret": 700,
+         "Durum": "Tamamlandı", "Ödeme Durumu": "Ödendi"},
+        {"Tarih": "2023-12-30", "Müşteri": "M5", "İlçe": "Karaburun", "İş Türü": "Ecri-misil", "Ücret": 300,
+         "Durum": "Başvuru Alındı", "Ödeme Durumu": "Bekliyor"},
+    ])
+    mirror.update_cells({
+        row_id("M1"): {"Ödeme Durumu": "Ödendi", "Ücret": 1600},
+        row_id("M3"): {"Tarih": "2024-02-02"},
+    })
+    mirror.delete_rows([row_id("M0")])
+
+    # someone edits the sheet by hand; the next sync brings the change
+    values = storage.read_values("Sayfa1")
+    values[1][HEADER.index("Durum")] = "Tamamlandı"
+    storage.write_values("Sayfa1", values)
+    mirror.sync()
+    return mirror
+
+
+def sorted_table(aggregates, **kwargs):
+    table = aggregates.table(**kwargs)
+    return table.sort_values(DIMENSIONS).reset_index(drop=True)
+
+
+def test_incremental_cells_equal_a_full_recompute(tmp_path, storage):
+    live = JobAggregates(parse_jobs)
+    mirror = edited_mirror(tmp_path, storage, live)
+
+    full = JobAggregates(parse_jobs)
+    full.rebuild(mirror.read())
+    assert sorted_table(live).equals(sorted_table(full))
+    assert live.totals() == full.totals()
+    assert live.totals(year=2024, month=2) == full.totals(year=2024, month=2)
+    assert live.monthly().equals(full.monthly())
+    assert live.totals()["toplam"] == 5
+
+
+def test_archive_cells_add_to_the_live_ones(tmp_path, storage):
+    live = JobAggregates(parse_jobs)
+    edited_mirror(tmp_path, storage, live)
+    before = live.totals()
+
+    archived = live.table(year=2024, month=1).assign(Ay="2022-06")
+    live.set_archive(archived)
+    after = live.totals()
+    assert after["toplam"] == before["toplam"] + int(archived["Adet"].sum())
+    assert after["odenen"] == before["odenen"] + float(archived.loc[archived["Ödeme Durumu"] == "Ödendi", "Ücret"].sum())
+    assert live.totals(year=2022)["toplam"] == int(archived["Adet"].sum())
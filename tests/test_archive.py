@@ -0,0 +1,102 @@
+from datetime import date
+
+import pytest
+
+from archive import SUMMARY_SHEET, JobArchive, archive_sheet
+from conftest import Failing
+from mirror import SheetMirror
+from storage import RowConflict
+from writequeue import WriteQueue
+
+HEADER = ["Tarih", "Müşteri", "İş Türü", "İlçe", "Ücret", "Durum", "Ödeme Durumu"]
+SHEET = [
+    HEADER,
+    ["2022-03-01", "M0", "Aplikasyon", "Kepez", 100, "Tamamlandı", "Ödendi"],
+    ["2023-05-02", "M1", "Aplikasyon", "Kepez", 200, "Tamamlandı", "Ödendi"],
+    ["2023-06-03", "M2", "Aplikasyon", "Kepez", 300, "Tamamlandı", "Bekliyor"],
+    ["2025-01-04", "M3", "Aplikasyon", "Kepez", 400, "Tamamlandı", "Ödendi"],
+]
+BEFORE = date(2024, 1, 1)
+
+
+def make_archive(tmp_path, storage, sent_to=None):
+    """Archive over a queued mirror; the queue sends to `sent_to` (default: `storage`)."""
+    storage.write_values("Sayfa1", SHEET)
+    queue = WriteQueue(str(tmp_path / "queue.sqlite"), sent_to or storage, base_delay=0)
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite"), storage, queue=queue, id_column="ID")
+    mirror.sync()
+    return JobArchive(storage, mirror), mirror, queue
+
+
+def customers(storage, name):
+    return [row[1] for row in storage.read_values(name)[1:]]
+
+
+def test_closed_jobs_move_to_their_year(tmp_path, storage):
+    archive, mirror, queue = make_archive(tmp_path, storage)
+
+    count, summary = archive.archive(BEFORE)
+    assert count == 2
+    assert mirror.read()["Müşteri"].tolist() == ["M2", "M3"]
+    assert customers(storage, "Sayfa1") == ["M0", "M1", "M2", "M3"]  # not sent yet
+    assert archive.summary() is summary
+
+    queue.flush()
+    assert customers(storage, "Sayfa1") == ["M2", "M3"]
+    assert customers(storage, archive_sheet(2022)) == ["M0"]
+    assert customers(storage, archive_sheet(2023)) == ["M1"]
+    assert archive.summary().by_year()[["Yıl", "Adet", "Ücret"]].values.tolist() == [[2022, 1, 100], [2023, 1, 200]]
+
+
+def test_failed_append_keeps_the_rows_in_the_sheet(tmp_path, storage):
+    archive, _, queue = make_archive(tmp_path, storage, sent_to=Failing(storage, "append_rows"))
+    archive.archive(BEFORE)
+
+    queue.flush()
+    assert queue.blocked() == ["Sayfa1"]
+    assert customers(storage, "Sayfa1") == ["M0", "M1", "M2", "M3"]
+    assert storage.read_values(SUMMARY_SHEET) == []
+
+    queue.retry_failed()
+    queue.flush()
+    assert customers(storage, "Sayfa1") == ["M2", "M3"]
+    assert customers(storage, archive_sheet(2022)) == ["M0"]
+
+
+def test_retry_after_a_partial_move_does_not_duplicate(tmp_path, storage):
+    archive, _, queue = make_archive(tmp_path, storage, sent_to=Failing(storage, "delete_rows"))
+    archive.archive(BEFORE)
+
+    queue.flush()
+    assert customers(storage, archive_sheet(2022)) == ["M0"]  # appended before the delete failed
+    queue.retry_failed()
+    queue.flush()
+    assert customers(storage, archive_sheet(2022)) == ["M0"]
+    assert customers(storage, archive_sheet(2023)) == ["M1"]
+    assert customers(storage, "Sayfa1") == ["M2", "M3"]
+
+
+def test_archive_aborts_when_the_mirror_moved(tmp_path, storage, monkeypatch):
+    archive, mirror, queue = make_archive(tmp_path, storage)
+    snapshot = mirror.snapshot
+
+    def edited_meanwhile():
+        taken = snapshot()
+        frame = taken[1]
+        m0 = frame.loc[frame["Müşteri"] == "M0", "ID"].item()
+        mirror.update_cells({m0: {"Ödeme Durumu": "Bekliyor"}})
+        return taken
+
+    monkeypatch.setattr(mirror, "snapshot", edited_meanwhile)
+    with pytest.raises(RowConflict):
+        archive.archive(BEFORE)
+    queue.flush()
+    assert customers(storage, "Sayfa1") == ["M0", "M1", "M2", "M3"]
+    assert storage.read_values(archive_sheet(2022)) == []
+
+
+def test_reading_the_summary_does_not_create_it(tmp_path, storage):
+    archive, _, _ = make_archive(tmp_path, storage)
+
+    assert archive.summary().frame.empty
+    assert storage.read_values(SUMMARY_SHEET) == []
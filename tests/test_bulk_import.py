@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from bulk_import import parse_amounts
+
+
+@pytest.mark.parametrize("cell, amount", [
+    ("1.500", 1500.0),
+    ("12.500 TL", 12500.0),
+    ("1.234.567 ₺", 1234567.0),
+    ("1.250,50 ₺", 1250.5),
+    ("1250,5", 1250.5),
+    ("1250.5", 1250.5),
+    ("1.5", 1.5),
+    ("750", 750.0),
+    ("-1.500", -1500.0),
+])
+def test_amounts(cell, amount):
+    assert parse_amounts(pd.Series([cell], dtype=object)).iloc[0] == amount
+
+
+def test_not_a_number():
+    parsed = parse_amounts(pd.Series(["", "on bin", "1.50.0"], dtype=object))
+    assert parsed.isna().all()
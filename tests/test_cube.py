@@ -0,0 +1,53 @@
+import pandas as pd
+
+from cube import GROUPS, MEASURES, PERIODS, JobCube
+from mirror import SheetMirror
+from schema import parse_jobs
+
+HEADER = ["Tarih", "Müşteri", "İlçe", "Mahalle", "İş Türü", "Ücret", "Durum", "Ödeme Durumu"]
+SHEET = [
+    HEADER,
+    ["2024-01-05", "M0", "Karaburun", "Merkez", "Aplikasyon", 1000, "Tamamlandı", "Ödendi"],
+    ["2024-04-20", "M1", "Karaburun", "Yayla", "Aplikasyon", 1500, "Tamamlandı", "Bekliyor"],
+    ["2023-11-11", "M2", "Çeşme", "Alaçatı", "Ecri-misil", 2500, "Tamamlandı", "Bekliyor"],
+    ["", "M3", "Çeşme", "", "Aplikasyon", "", "", ""],
+]
+
+
+def test_incremental_cube_equals_a_full_recompute(tmp_path, storage):
+    storage.write_values("Sayfa1", SHEET)
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite"), storage, id_column="ID")
+    mirror.sync()
+    live = JobCube(parse_jobs)
+    mirror.subscribe(live)
+
+    def row_id(customer):
+        frame = mirror.read()
+        return frame.loc[frame["Müşteri"] == customer, "ID"].item()
+
+    # a month and a mahalle the cube has not seen grow its axes
+    mirror.append_rows([
+        {"Tarih": "2025-02-01", "Müşteri": "M4", "İlçe": "Çeşme", "Mahalle": "Eski Mahalle",
+         "İş Türü": "Aplikasyon", "Ücret": 700, "Durum": "Tamamlandı", "Ödeme Durumu": "Ödendi"},
+    ])
+    mirror.update_cells({
+        row_id("M1"): {"Ödeme Durumu": "Ödendi", "Mahalle": "Merkez"},
+        row_id("M3"): {"Tarih": "2024-04-02", "Ücret": 400},
+    })
+    mirror.delete_rows([row_id("M0")])
+
+    full = JobCube(parse_jobs)
+    full.rebuild(mirror.read())
+    assert live.years() == full.years() == ["2025", "2024", "2023"]
+    for by in GROUPS:
+        for period in PERIODS:
+            for measure in MEASURES:
+                pd.testing.assert_frame_equal(
+                    live.pivot(by, period, measure), full.pivot(by, period, measure), check_like=True,
+                )
+    pd.testing.assert_frame_equal(
+        live.pivot("Mahalle", "Ay", "Adet", ilce="Çeşme", year=2025),
+        full.pivot("Mahalle", "Ay", "Adet", ilce="Çeşme", year=2025),
+        check_like=True,
+    )
+    assert live.pivot("İlçe", "Yıl", "Ücret")["Toplam"].sum() == 1500 + 2500 + 400 + 700
@@ -0,0 +1,42 @@
+import io
+import sys
+import types
+import zipfile
+
+import pandas as pd
+
+from exports import BatchProgress, StatementPool, statements_zip
+
+LEDGER = pd.DataFrame({
+    "Tarih": pd.to_datetime(["2024-01-05", "2024-02-10"]),
+    "İş Türü": ["Aplikasyon", "Cins Değişikliği"],
+    "Ada_Parsel": ["101/4", "12/7"],
+    "Ücret": [1500.0, 2500.0],
+    "Ödeme Durumu": ["Ödendi", "Bekliyor"],
+    "Gecikme (Gün)": [None, 40],
+})
+BALANCE = {"Faturalanan": 4000.0, "Ödenen": 1500.0, "Bekleyen": 2500.0}
+
+
+def test_statement_workers_do_not_run_the_script(tmp_path, monkeypatch):
+    # Streamlit installs the running script as __main__; a worker must not re-run it
+    marker = tmp_path / "ran"
+    script = tmp_path / "app_script.py"
+    script.write_text(f"open({str(marker)!r}, 'w').close()\n", encoding="utf-8")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+
+    pool = StatementPool(workers=1)
+    progress = BatchProgress(2)
+    try:
+        data = statements_zip([("Ali Veli", LEDGER, BALANCE), ("Ayşe", LEDGER, BALANCE)], progress, pool)
+    finally:
+        pool.shutdown()
+
+    assert (progress.done, progress.failed) == (2, [])
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert sorted(archive.namelist()) == ["ekstre_Ali_Veli.pdf", "ekstre_Ayşe.pdf"]
+        assert archive.read("ekstre_Ayşe.pdf").startswith(b"%PDF")
+    assert not marker.exists()
+    assert sys.modules["__main__"] is main
@@ -0,0 +1,158 @@
+from mirror import SheetMirror, frame_changes
+from storage import RevisionProbe
+from writequeue import WriteQueue
+
+SHEET = [["Müşteri", "Ücret"], ["M0", 100], ["M1", 200], ["M2", 300]]
+
+
+def make_mirror(tmp_path, storage, queued=True):
+    storage.write_values("Sayfa1", SHEET)
+    queue = WriteQueue(str(tmp_path / "queue.sqlite"), storage, base_delay=0) if queued else None
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite"), storage, queue=queue, id_column="ID")
+    mirror.sync()
+    return mirror, queue
+
+
+def row_id(mirror, customer):
+    frame = mirror.read()
+    return frame.loc[frame["Müşteri"] == customer, "ID"].item()
+
+
+def customers(storage):
+    return [(row[0], row[1]) for row in storage.read_values("Sayfa1")[1:]]
+
+
+def insert_at_top(storage, row):
+    """Someone adds a row above the others by hand."""
+    values = storage.read_values("Sayfa1")
+    storage.write_values("Sayfa1", values[:1] + [row] + values[1:])
+
+
+def test_first_sync_gives_every_row_an_id(tmp_path, storage):
+    mirror, _ = make_mirror(tmp_path, storage)
+
+    values = storage.read_values("Sayfa1")
+    assert values[0] == ["Müşteri", "Ücret", "ID"]
+    ids = [row[2] for row in values[1:]]
+    assert len(set(ids)) == 3 and all(ids)
+    assert mirror.read()["ID"].tolist() == ids
+
+
+def test_queued_edit_follows_its_row(tmp_path, storage):
+    mirror, queue = make_mirror(tmp_path, storage)
+    mirror.update_cells({row_id(mirror, "M2"): {"Ücret": 999}})
+    insert_at_top(storage, ["Yeni", 50, "rmanual"])
+
+    queue.flush()
+    assert customers(storage) == [("Yeni", 50), ("M0", 100), ("M1", 200), ("M2", 999)]
+
+
+def test_queued_delete_follows_its_row(tmp_path, storage):
+    mirror, queue = make_mirror(tmp_path, storage)
+    mirror.delete_rows([row_id(mirror, "M0")])  # e.g. archived
+    insert_at_top(storage, ["Yeni", 50, "rmanual"])
+
+    queue.flush()
+    assert customers(storage) == [("Yeni", 50), ("M1", 200), ("M2", 300)]
+
+
+def test_edit_of_a_row_deleted_meanwhile_is_parked(tmp_path, storage):
+    mirror, queue = make_mirror(tmp_path, storage)
+    mirror.update_cells({row_id(mirror, "M1"): {"Ücret": 999}})
+    storage.delete_rows("Sayfa1", [3])  # M1 deleted by hand
+
+    assert queue.flush() == 0
+    assert queue.blocked() == ["Sayfa1"]
+    assert customers(storage) == [("M0", 100), ("M2", 300)]
+
+
+def test_appended_rows_get_ids(tmp_path, storage):
+    mirror, queue = make_mirror(tmp_path, storage)
+    position = mirror.append_rows([{"Müşteri": "M3", "Ücret": 400}])
+    new_id = mirror.read().loc[position, "ID"]
+    assert new_id == row_id(mirror, "M3")
+    mirror.update_cells({new_id: {"Ücret": 450}})
+    insert_at_top(storage, ["Yeni", 50, "rmanual"])
+
+    queue.flush()
+    assert customers(storage)[-1] == ("M3", 450)
+    assert storage.read_values("Sayfa1")[-1][2] == new_id
+
+
+def test_direct_write_finds_rows_the_mirror_has_not_seen_move(tmp_path, storage):
+    mirror, _ = make_mirror(tmp_path, storage, queued=False)
+    insert_at_top(storage, ["Yeni", 50, "rmanual"])  # not synced yet
+
+    mirror.update_cells({row_id(mirror, "M0"): {"Ücret": 150}})
+    mirror.delete_rows([row_id(mirror, "M2")])
+    assert customers(storage) == [("Yeni", 50), ("M0", 150), ("M1", 200)]
+
+
+def test_existing_mirror_adds_ids_without_a_sheet_change(tmp_path, storage):
+    storage.write_values("Sayfa1", SHEET)
+    SheetMirror(str(tmp_path / "mirror.sqlite"), storage).sync()
+
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite"), storage, id_column="ID")
+    mirror.sync()
+    assert storage.read_values("Sayfa1")[0][-1] == "ID"
+    assert mirror.read()["ID"].notna().all()
+
+
+def test_append_leaves_frames_already_handed_out_alone(tmp_path, storage):
+    mirror, _ = make_mirror(tmp_path, storage)
+    before = mirror.read()
+    first = mirror.append_rows([{"Müşteri": "M3", "Ücret": 400}, {"Müşteri": "M4", "Ücret": 500}])
+
+    assert len(before) == 3
+    after = mirror.read()
+    assert after.loc[first:, "Müşteri"].tolist() == ["M3", "M4"]
+    assert after.loc[first:, "Ücret"].tolist() == [400, 500]
+
+
+def test_edit_of_blank_and_numeric_columns(tmp_path, storage):
+    storage.write_values("Sayfa1", [["Müşteri", "Ada_Parsel", "Not"], ["M0", 12, ""], ["M1", 13, ""]])
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite"), storage, id_column="ID")
+    mirror.sync()
+    before = mirror.read()
+
+    mirror.update_cells({row_id(mirror, "M0"): {"Ada_Parsel": "123/4", "Not": "acil"}})
+    assert [row[:3] for row in storage.read_values("Sayfa1")[1:]] == [["M0", "123/4", "acil"], ["M1", 13, ""]]
+    after = mirror.read()
+    assert after.loc[0, ["Ada_Parsel", "Not"]].tolist() == ["123/4", "acil"]
+    assert before["Not"].isna().all() and before.loc[0, "Ada_Parsel"] == 12
+
+
+def test_changes_are_keyed_by_the_ids_shown_at_render_time(tmp_path, storage):
+    mirror, queue = make_mirror(tmp_path, storage)
+    shown = mirror.read()
+    shown["Sil"] = False
+    edited = shown.copy()
+    edited.iloc[1, edited.columns.get_loc("Ücret")] = 250  # M1
+    edited.iloc[2, edited.columns.get_loc("Sil")] = True  # M2
+
+    # M0 goes away between render and save; positions shift, IDs do not
+    mirror.delete_rows([row_id(mirror, "M0")])
+    changes, deleted = frame_changes(shown, edited, flag="Sil", key="ID")
+    assert changes == {row_id(mirror, "M1"): {"Ücret": 250}}
+    assert deleted == [row_id(mirror, "M2")]
+
+    mirror.update_cells(changes)
+    mirror.delete_rows(deleted)
+    queue.flush()
+    assert customers(storage) == [("M1", 250)]
+    assert mirror.read()["Müşteri"].tolist() == ["M1"]
+
+
+def test_sync_shares_the_revision_probe_of_the_pages(tmp_path, storage):
+    storage.write_values("Sayfa1", SHEET)
+    probes = []
+    revision = storage.revision
+    storage.revision = lambda: probes.append(1) or revision()
+    probe = RevisionProbe(storage, min_interval=60)
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite"), storage, probe=probe)
+
+    mirror.sync()
+    for _ in range(3):
+        probe.current()
+        mirror.sync()
+    assert len(probes) == 1
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from partitions import DatePartitions
+
+DATES = pd.Series(pd.to_datetime([
+    "2024-03-05", "2023-12-31", None, "2024-03-01", "2024-01-15", "2023-03-10", None, "2024-12-01",
+]))
+FRAME = pd.DataFrame({"Tarih": DATES, "Müşteri": [f"M{i}" for i in range(len(DATES))]})
+
+
+def scan(year=None, month=None):
+    """Row positions a plain boolean filter selects."""
+    mask = pd.Series(True, index=DATES.index)
+    if year is not None:
+        mask &= DATES.dt.year == year
+    if month is not None:
+        mask &= DATES.dt.month == month
+    return np.flatnonzero(mask.fillna(False).to_numpy(dtype=bool))
+
+
+def test_rows_equal_a_boolean_filter():
+    partitions = DatePartitions(DATES)
+    for year in (None, 2023, 2024, 2025):
+        for month in (None, 1, 3, 12, 7):
+            assert partitions.rows(year, month).tolist() == scan(year, month).tolist()
+
+
+def test_select_returns_the_rows_of_the_frame():
+    partitions = DatePartitions(FRAME["Tarih"])
+
+    assert partitions.select(FRAME, 2024, 3)["Müşteri"].tolist() == ["M0", "M3"]
+    assert partitions.select(FRAME, month=12)["Müşteri"].tolist() == ["M1", "M7"]
+    assert partitions.select(FRAME, 2022).empty
+    assert partitions.select(FRAME) is FRAME  # undated rows only show up unfiltered
+
+
+def test_years_and_months():
+    partitions = DatePartitions(DATES)
+
+    assert partitions.years() == [2024, 2023]
+    assert partitions.months() == [1, 3, 12]
+    assert partitions.months(2023) == [3, 12]
+    assert DatePartitions(pd.Series(pd.to_datetime([None, None]))).rows(2024).tolist() == []
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from conftest import Failing, SheetError
+from scheduler import RequestScheduler
+
+SHEET = [["Müşteri", "Ücret"], ["M0", 100]]
+
+
+class Gated:
+    """Storage that logs each call and holds it until `gate` is set."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.gate = threading.Event()
+        self.calls = []
+
+    def __getattr__(self, name):
+        call = getattr(self.storage, name)
+
+        def gated(*args):
+            self.calls.append(name)
+            self.gate.wait(5)
+            return call(*args)
+
+        return gated
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_429_is_retried_after_backing_off(storage):
+    storage.write_values("Sayfa1", SHEET)
+    scheduler = RequestScheduler(Failing(storage, "read_values", status=429, times=2),
+                                 requests_per_minute=600, burst=1, backoff=0.05)
+
+    started = time.monotonic()
+    assert scheduler.read_values("Sayfa1") == SHEET
+    # the bucket owed 0.05 s and then 0.1 s of tokens before the retries
+    assert time.monotonic() - started >= 0.15
+    assert scheduler.status()["throttled"] == 2
+
+
+def test_other_errors_and_persistent_429_are_raised(storage):
+    storage.write_values("Sayfa1", SHEET)
+    scheduler = RequestScheduler(Failing(storage, "read_values", status=400), backoff=0)
+    with pytest.raises(SheetError):
+        scheduler.read_values("Sayfa1")
+    assert scheduler.status()["throttled"] == 0
+
+    scheduler = RequestScheduler(Failing(storage, "read_values", status=429, times=3),
+                                 requests_per_minute=6000, max_retries=2, backoff=0)
+    with pytest.raises(SheetError):
+        scheduler.read_values("Sayfa1")
+    assert scheduler.status()["throttled"] == 2
+
+
+def test_writes_go_before_reads_before_probes(storage):
+    storage.write_values("Sayfa1", SHEET)
+    gated = Gated(storage)
+    scheduler = RequestScheduler(gated, requests_per_minute=6000, max_concurrency=1)
+
+    busy = threading.Thread(target=scheduler.read_values, args=("Users",))
+    busy.start()
+    wait_until(lambda: gated.calls == ["read_values"])
+
+    # queued lowest priority first; each waits behind the call on the wire
+    waiting = [
+        threading.Thread(target=scheduler.revision),
+        threading.Thread(target=scheduler.read_values, args=("Sayfa1",)),
+        threading.Thread(target=scheduler.append_rows, args=("Sayfa1", [["M1", 200]])),
+    ]
+    for i, thread in enumerate(waiting, start=1):
+        thread.start()
+        wait_until(lambda: scheduler.status()["waiting"] == i)
+
+    gated.gate.set()
+    for thread in [busy] + waiting:
+        thread.join(5)
+    assert gated.calls == ["read_values", "append_rows", "read_values", "revision"]
+
+
+def test_identical_reads_in_flight_are_merged(storage):
+    storage.write_values("Sayfa1", SHEET)
+    gated = Gated(storage)
+    scheduler = RequestScheduler(gated, requests_per_minute=6000)
+    results = []
+
+    def read():
+        results.append(scheduler.read_values("Sayfa1"))
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    threads[0].start()
+    wait_until(lambda: gated.calls == ["read_values"])
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: scheduler.status()["merged"] == 2)
+
+    gated.gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert gated.calls == ["read_values"]
+    assert results == [SHEET] * 3
@@ -0,0 +1,16 @@
+import pandas as pd
+
+from schema import parse_jobs
+
+TARIH = ["2024-04-03", "03.04.2024", "13.04.2024", "2024-04-03 14:30:00", "", "yarın"]
+
+
+def test_dates_parse_the_same_alone_and_together():
+    raw = pd.DataFrame({"Tarih": TARIH, "Ücret": ["100"] * len(TARIH)})
+    whole = parse_jobs(raw)["Tarih"]
+    one_by_one = pd.concat([parse_jobs(raw.iloc[[i]])["Tarih"] for i in range(len(raw))])
+
+    pd.testing.assert_series_equal(whole, one_by_one)
+    assert whole.tolist()[:4] == [pd.Timestamp("2024-04-03"), pd.Timestamp("2024-04-03"),
+                                  pd.Timestamp("2024-04-13"), pd.Timestamp("2024-04-03")]
+    assert whole.iloc[4:].isna().all()
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from search import JobSearchIndex, fold
+
+
+def jobs(*rows):
+    return pd.DataFrame(rows, columns=["Müşteri", "Ada_Parsel"])
+
+
+def test_turkish_letters_fold_to_what_people_type():
+    assert fold("IŞIK") == fold("Işık") == fold("isik") == "isik"
+    assert fold("İSKELE") == "iskele"
+    assert fold("Gündoğdu Çiftçi Öz") == "gundogdu ciftci oz"
+
+
+def test_search_matches_without_turkish_letters():
+    index = JobSearchIndex()
+    snapshot = index.refresh(jobs(["Ayşe Işık", "12/3"], ["Ali Gündoğdu", "101/4"], ["Mehmet Öztürk", "7"]))
+
+    assert snapshot.search("isik").tolist() == [0]
+    assert snapshot.search("GUNDOGDU").tolist() == [1]
+    assert snapshot.search("öztürk").tolist() == [2]
+    assert snapshot.search("ozturk").tolist() == [2]
+
+
+def test_parcel_matches_come_first():
+    snapshot = JobSearchIndex().refresh(jobs(["Müşteri 101", "5/1"], ["Ali", "Ada 101 Parsel 4"]))
+
+    assert snapshot.search("101/4").tolist()[0] == 1
+    assert snapshot.search("101").tolist() == [1, 0]
+
+
+def test_refresh_forgets_texts_that_are_gone():
+    index = JobSearchIndex()
+    index.refresh(jobs(["Ayşe Işık", "12/3"], ["Ali Veli", "101/4"]))
+    snapshot = index.refresh(jobs(["Ayşe Işık", "12/3"], ["Ali Kaya", "101/4"]))
+
+    assert snapshot.search("veli").tolist() == []
+    assert snapshot.search("kaya").tolist() == [1]
+    assert "ali veli" not in index._grams
+    assert "Ali Veli" not in index._folded
+    assert set(index._parcels) == {"12/3", "101/4"}
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from cache import SharedCache
+from conftest import Failing
+from users import UserTable
+from writequeue import WriteQueue
+
+HEADER = ["username", "password", "role"]
+
+
+def add_user(users, name):
+    return pd.concat([users, pd.DataFrame([[name, "1", "user"]], columns=HEADER)], ignore_index=True)
+
+
+def make_users(tmp_path, storage, status):
+    storage.write_values("Users", [HEADER, ["admin", "1234", "admin"]])
+    queue = WriteQueue(str(tmp_path / "queue.sqlite"), Failing(storage, "write_values", status=status), base_delay=0)
+    return UserTable(storage, queue, SharedCache()), queue
+
+
+def test_unsent_save_survives_a_revision_move(tmp_path, storage):
+    users, queue = make_users(tmp_path, storage, status=503)
+    users.save(add_user(users.load(storage.revision()), "ayse"))
+    queue.flush()  # 503: still queued
+
+    storage.write_values("Sayfa1", [["Müşteri"]])  # another worksheet moves the revision
+    current = users.load(storage.revision())
+    assert list(current["username"]) == ["admin", "ayse"]
+
+    users.save(add_user(current, "mehmet"))
+    queue.flush()
+    assert [r[0] for r in storage.read_values("Users")[1:]] == ["admin", "ayse", "mehmet"]
+    assert list(users.load(storage.revision())["username"]) == ["admin", "ayse", "mehmet"]
+
+
+def test_forget_reads_the_sheet_again(tmp_path, storage):
+    users, queue = make_users(tmp_path, storage, status=400)
+    users.save(add_user(users.load(storage.revision()), "ayse"))
+    queue.flush()
+
+    queue.discard_failed()
+    users.forget()
+    assert list(users.load(storage.revision())["username"]) == ["admin"]
+
+
+def test_login_index_survives_other_sheets_saves(tmp_path, storage):
+    users, queue = make_users(tmp_path, storage, status=503)
+    index = users.credentials(users.load(storage.revision()))
+    assert index.check("admin", "1234") == "admin"
+
+    storage.write_values("Sayfa1", [["Müşteri"]])
+    assert users.credentials(users.load(storage.revision())) is index
+
+    users.save(add_user(users.load(storage.revision()), "ayse"))
+    assert users.credentials(users.load(storage.revision())).check("ayse", "1") == "user"
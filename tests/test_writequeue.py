@@ -0,0 +1,92 @@
+from conftest import Failing
+from writequeue import WriteQueue
+
+SHEET = [["Müşteri", "Ücret"], ["M0", 100], ["M1", 200], ["M2", 300]]
+
+
+def make_queue(tmp_path, storage, **kwargs):
+    storage.write_values("Sayfa1", SHEET)
+    return WriteQueue(str(tmp_path / "queue.sqlite"), storage, base_delay=0, **kwargs)
+
+
+def queue_delete_then_edit(queue):
+    """Delete M1 (sheet row 3), then edit M2, which is row 3 once M1 is gone."""
+    queue.delete_rows("Sayfa1", [3])
+    queue.update_cells("Sayfa1", {(3, 2): 999})
+
+
+def test_failed_op_stops_its_sheet(tmp_path, storage):
+    queue = make_queue(tmp_path, Failing(storage, "delete_rows"))
+    queue_delete_then_edit(queue)
+
+    assert queue.flush() == 0
+    assert storage.read_values("Sayfa1") == SHEET
+    assert queue.blocked() == ["Sayfa1"]
+    assert (queue.pending("Sayfa1"), queue.unsent("Sayfa1")) == (1, 2)
+
+
+def test_other_sheets_keep_moving(tmp_path, storage):
+    queue = make_queue(tmp_path, Failing(storage, "delete_rows"))
+    queue_delete_then_edit(queue)
+    queue.write_values("Users", [["username"], ["admin"]])
+
+    assert queue.flush() == 1
+    assert storage.read_values("Users") == [["username"], ["admin"]]
+    assert storage.read_values("Sayfa1") == SHEET
+
+
+def test_retry_sends_in_order(tmp_path, storage):
+    queue = make_queue(tmp_path, Failing(storage, "delete_rows"))
+    queue_delete_then_edit(queue)
+    queue.flush()
+
+    queue.retry_failed()
+    assert queue.flush() == 2
+    assert storage.read_values("Sayfa1") == [SHEET[0], ["M0", 100], ["M2", 999]]
+
+
+def test_discard_rebases_later_writes(tmp_path, storage):
+    queue = make_queue(tmp_path, Failing(storage, "delete_rows"))
+    queue_delete_then_edit(queue)
+    queue.flush()
+
+    assert queue.discard_failed() == 0
+    assert queue.flush() == 1
+    assert storage.read_values("Sayfa1") == [SHEET[0], ["M0", 100], ["M1", 200], ["M2", 999]]
+
+
+def test_discarded_append_drops_writes_to_its_rows(tmp_path, storage):
+    queue = make_queue(tmp_path, Failing(storage, "append_rows"))
+    queue.append_rows("Sayfa1", [["M3", 400]])
+    queue.update_cells("Sayfa1", {(5, 2): 450})  # the appended row
+    queue.delete_rows("Sayfa1", [5])
+    queue.update_cells("Sayfa1", {(2, 2): 150})
+    queue.flush()
+
+    assert queue.discard_failed() == 2
+    assert queue.flush() == 1
+    assert storage.read_values("Sayfa1") == [SHEET[0], ["M0", 150], ["M1", 200], ["M2", 300]]
+
+
+def test_exhausted_retries_keep_the_sheet_stopped(tmp_path, storage):
+    queue = make_queue(tmp_path, Failing(storage, "delete_rows", status=429, times=10), max_attempts=2)
+    queue_delete_then_edit(queue)
+
+    queue.flush()  # first 429: retried later
+    assert queue.blocked() == []
+    queue.flush()  # second 429: out of attempts
+    assert queue.blocked() == ["Sayfa1"]
+    assert queue.flush() == 0
+    assert storage.read_values("Sayfa1") == SHEET
+
+
+def test_discarded_append_drops_keyed_writes_to_its_rows(tmp_path, storage):
+    storage.write_values("Sayfa1", [["Müşteri", "ID"], ["M0", "r0"]])
+    queue = WriteQueue(str(tmp_path / "queue.sqlite"), Failing(storage, "append_rows"), base_delay=0)
+    queue.append_rows("Sayfa1", [["M1", "r1"]])
+    queue.update_by_id("Sayfa1", 2, {("r1", 1): "M1b", ("r0", 1): "M0b"})
+    queue.flush()
+
+    assert queue.discard_failed() == 0
+    assert queue.flush() == 1
+    assert storage.read_values("Sayfa1") == [["Müşteri", "ID"], ["M0b", "r0"]]
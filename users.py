@@ -0,0 +1,67 @@
+import hashlib
+import json
+import threading
+
+from credentials import CredentialIndex
+from storage import values_frame
+
+
+# --------------------------------------------------------
+# USERS SAYFASI (paylaşılan okuma, kuyruklu yazma)
+# --------------------------------------------------------
+# Users is small and always written whole. Reads go through the
+# SharedCache tagged with the spreadsheet revision and saves go to the
+# write queue. That revision moves on a write to any worksheet, so while
+# our save is still in the queue a re-read would return the old users, and
+# the next whole-sheet save built on them would drop the pending change.
+# Until the queue has nothing left for Users, the saved frame is served.
+# The login index is tagged with a digest of the users instead of the
+# revision, so saves to other worksheets do not rebuild it.
+
+class UserTable:
+    """The Users worksheet as a frame of stripped text cells."""
+
+    def __init__(self, storage, queue, cache, sheet="Users"):
+        self.storage = storage
+        self.queue = queue
+        self.cache = cache
+        self.sheet = sheet
+        self._lock = threading.Lock()
+        self._saved = None  # last saved frame while its write has not landed
+
+    def _fetch(self):
+        users = values_frame(self.storage.read_values(self.sheet)).fillna("").astype(str)
+        for col in users.columns:
+            users[col] = users[col].str.strip()
+        return users
+
+    def load(self, revision):
+        with self._lock:
+            saved = self._saved
+            if saved is not None:
+                if self.queue.unsent(self.sheet):
+                    return saved
+                # sent: the sheet now holds exactly this frame
+                self._saved = None
+                self.cache.put(self.sheet, revision, saved)
+        return self.cache.get(self.sheet, revision, self._fetch)
+
+    def save(self, users):
+        """Queue the whole sheet; returns the frame as it will be written."""
+        users = users.reset_index(drop=True).fillna("").astype(str)
+        with self._lock:
+            self.queue.write_values(self.sheet, [list(users.columns)] + users.values.tolist())
+            self._saved = users
+        return users
+
+    def credentials(self, users):
+        """CredentialIndex for the `users` frame, rebuilt only when its contents change."""
+        payload = json.dumps([list(users.columns)] + users.values.tolist(), ensure_ascii=False, default=str)
+        digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+        return self.cache.get("Kimlik", digest, lambda: CredentialIndex(users))
+
+    def forget(self):
+        """The queued save was discarded; the next load reads the sheet again."""
+        with self._lock:
+            self._saved = None
+        self.cache.invalidate(self.sheet)
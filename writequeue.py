@@ -0,0 +1,357 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from storage import delete_by_id, move_by_id, update_by_id
+
+
+# --------------------------------------------------------
+# YAZMA KUYRUĞU (write-behind, diske günlüklü)
+# --------------------------------------------------------
+# Saves are journaled to a local SQLite file and return at once; a
+# background thread sends them to the storage in order. Consecutive
+# operations of the same kind on the same worksheet are coalesced into one
+# API call: cell updates merge (the last value of a cell wins), appends
+# concatenate, deletions combine and a whole-sheet write keeps only the
+# newest. Rate limits and server errors are retried with exponential
+# backoff; anything else (or too many attempts) parks the operation as
+# failed. Later operations on the same worksheet were numbered assuming the
+# parked one happened, so that worksheet's queue stops there until the
+# failure is retried or discarded; other worksheets keep moving.
+# update_by_id / delete_by_id carry row IDs instead of positions and find
+# their rows only when they are sent. move_by_id appends rows to other
+# worksheets, rewrites some and then deletes the rows here, as one journaled
+# operation filed under the worksheet the rows leave: a failure parks all of
+# it, never just the delete. It is sent on its own, never coalesced.
+
+KINDS = ("append_rows", "update_cells", "delete_rows", "write_values", "update_by_id", "delete_by_id", "move_by_id")
+KEYED = ("update_by_id", "delete_by_id", "move_by_id")
+
+
+def _retryable(error):
+    """Quota (429), server errors and network failures are worth retrying."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+def _unshift(deleted, row):
+    """Row number before `deleted` (sorted, original numbering) were removed."""
+    for d in deleted:
+        if d <= row:
+            row += 1
+        else:
+            break
+    return row
+
+
+def _coalesce(kind, payloads):
+    """Several queued payloads of one kind -> the payload of a single call."""
+    if kind == "append_rows":
+        return [row for rows in payloads for row in rows]
+    if kind == "update_cells":
+        merged = {}
+        for cells in payloads:
+            merged.update({(row, col): value for row, col, value in cells})
+        return [[row, col, value] for (row, col), value in merged.items()]
+    if kind == "delete_rows":
+        # later deletions were numbered after the earlier ones had happened
+        deleted = []
+        for rows in payloads:
+            originals = [_unshift(deleted, r) for r in sorted(set(rows))]
+            deleted = sorted(deleted + originals)
+        return deleted
+    if kind == "update_by_id":
+        merged = {}
+        for payload in payloads:
+            merged.update({(row_id, col): value for row_id, col, value in payload["cells"]})
+        return {"column": payloads[-1]["column"], "cells": [[r, c, v] for (r, c), v in merged.items()]}
+    if kind == "delete_by_id":
+        ids = [row_id for payload in payloads for row_id in payload["ids"]]
+        return {"column": payloads[-1]["column"], "ids": list(dict.fromkeys(ids))}
+    return payloads[-1]  # write_values; move_by_id is always sent alone
+
+
+def _rebase(kind, payload, discarded_kind, discarded):
+    """Payload of a later positional op, renumbered as if the `discarded` op had never run.
+
+    `discarded` is the payload of the dropped op, except for append_rows
+    where it is the sheet rows the append would have taken. Returns None
+    when nothing of the op is left (it only touched rows the append would
+    have created) or it cannot be rebased.
+    """
+    if discarded_kind in ("update_cells", "update_by_id") or kind in ("append_rows", "write_values"):
+        return payload
+    if discarded_kind in ("write_values", "delete_by_id", "move_by_id"):
+        return None  # numbered against rows whose positions are unknown
+    if discarded_kind == "delete_rows":
+        deleted = sorted(discarded)
+        if kind == "update_cells":
+            return [[_unshift(deleted, row), col, value] for row, col, value in payload]
+        return [_unshift(deleted, row) for row in payload]
+    # append_rows: those rows never came to be and the ones after them move up
+    gone = set(discarded)
+
+    def moved(row):
+        return row - sum(1 for g in gone if g < row)
+
+    if kind == "update_cells":
+        kept = [[moved(row), col, value] for row, col, value in payload if row not in gone]
+    else:
+        kept = [moved(row) for row in payload if row not in gone]
+    return kept or None
+
+
+def _drop_appended(kind, payload, appended):
+    """Keyed op minus the rows a discarded append would have created (None if nothing is left)."""
+    col = payload["column"]
+    gone = {str(row[col - 1]) for row in appended if len(row) >= col}
+    if kind == "update_by_id":
+        cells = [cell for cell in payload["cells"] if cell[0] not in gone]
+        return dict(payload, cells=cells) if cells else None
+    ids = [row_id for row_id in payload["ids"] if row_id not in gone]
+    return dict(payload, ids=ids) if ids else None  # move_by_id only moves rows in "ids"
+
+
+class WriteQueue:
+    """Durable write-behind queue in front of a storage backend."""
+
+    def __init__(self, path, storage, interval=1.0, base_delay=2.0, max_delay=120.0, max_attempts=8):
+        self.path = path
+        self.storage = storage
+        self.interval = interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.last_error = None
+        self.retry_at = 0.0
+
+        self._lock = threading.Lock()  # one flush at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS ops ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, sheet TEXT, kind TEXT, payload TEXT, "
+                "state TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0, error TEXT, created REAL)"
+            )
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    # ---------------- enqueue ----------------
+    def _put(self, sheet, kind, payload):
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO ops (sheet, kind, payload, created) VALUES (?, ?, ?, ?)",
+                (sheet, kind, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+        self._wake.set()
+
+    def append_rows(self, sheet, rows):
+        self._put(sheet, "append_rows", [list(r) for r in rows])
+
+    def update_cells(self, sheet, cells):
+        """Queue {(sheet_row, sheet_col): value}, as SheetStorage.update_cells takes it."""
+        self._put(sheet, "update_cells", [[row, col, value] for (row, col), value in cells.items()])
+
+    def delete_rows(self, sheet, sheet_rows):
+        self._put(sheet, "delete_rows", sorted(set(int(r) for r in sheet_rows)))
+
+    def write_values(self, sheet, rows):
+        self._put(sheet, "write_values", [list(r) for r in rows])
+
+    def update_by_id(self, sheet, column, cells):
+        """Queue {(row id, sheet_col): value}; rows are looked up in ID column `column` when sent."""
+        self._put(sheet, "update_by_id", {
+            "column": column, "cells": [[row_id, col, value] for (row_id, col), value in cells.items()],
+        })
+
+    def delete_by_id(self, sheet, column, ids):
+        self._put(sheet, "delete_by_id", {"column": column, "ids": [str(i) for i in ids]})
+
+    def move_by_id(self, sheet, column, ids, header, moves, writes):
+        """Queue storage.move_by_id: rows `ids` go to `moves`, then `writes` are written whole."""
+        self._put(sheet, "move_by_id", {
+            "column": column, "ids": [str(i) for i in ids], "header": list(header),
+            "moves": {name: [list(r) for r in rows] for name, rows in moves.items()},
+            "writes": {name: [list(r) for r in values] for name, values in writes.items()},
+        })
+
+    # ---------------- state ----------------
+    def _count(self, where, sheet):
+        params = ()
+        if sheet is not None:
+            where, params = where + " AND sheet = ?", (sheet,)
+        with self._connect() as db:
+            return db.execute(f"SELECT COUNT(*) FROM ops WHERE {where}", params).fetchone()[0]
+
+    def pending(self, sheet=None):
+        """Number of operations waiting to be sent (optionally for one worksheet)."""
+        return self._count("state = 'pending'", sheet)
+
+    def unsent(self, sheet=None):
+        """Pending plus parked operations: the sheet is behind the app by this many."""
+        return self._count("state IN ('pending', 'failed')", sheet)
+
+    def blocked(self):
+        """Worksheets whose queue is stopped at a failed operation."""
+        with self._connect() as db:
+            return [r[0] for r in db.execute("SELECT DISTINCT sheet FROM ops WHERE state = 'failed' ORDER BY sheet")]
+
+    def failed(self):
+        """Parked operations as dicts (id, sheet, kind, attempts, error, created)."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT id, sheet, kind, attempts, error, created FROM ops WHERE state = 'failed' ORDER BY id"
+            ).fetchall()
+        keys = ("id", "sheet", "kind", "attempts", "error", "created")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def retry_failed(self):
+        with self._connect() as db:
+            db.execute("UPDATE ops SET state = 'pending', attempts = 0 WHERE state = 'failed'")
+        self.retry_at = 0.0
+        self._wake.set()
+
+    def discard_failed(self):
+        """Drop the parked operations and renumber what was queued after them.
+
+        Later positional writes on the same worksheet assumed the dropped op
+        had happened; they are rebased (or dropped when they only touched
+        rows it would have appended). Writes by row ID only lose the rows a
+        dropped append would have created. Returns the number of later ops
+        dropped.
+        """
+        dropped = 0
+        with self._lock, self._connect() as db:
+            failed = db.execute(
+                "SELECT id, sheet, kind, payload FROM ops WHERE state = 'failed' ORDER BY id DESC"
+            ).fetchall()
+            # newest first: ops after an older failure already assume the newer one is gone
+            for op_id, sheet, kind, payload in failed:
+                discarded = raw = json.loads(payload)
+                if kind == "append_rows":
+                    # everything queued before it on this sheet has been sent,
+                    # so the append would have started right below the last row
+                    first = len(self.storage.read_values(sheet)) + 1
+                    discarded = list(range(first, first + len(raw)))
+                later = db.execute(
+                    "SELECT id, kind, payload FROM ops WHERE sheet = ? AND id > ? AND state = 'pending'",
+                    (sheet, op_id),
+                ).fetchall()
+                for later_id, later_kind, later_payload in later:
+                    later_payload = json.loads(later_payload)
+                    if later_kind not in KEYED:
+                        rebased = _rebase(later_kind, later_payload, kind, discarded)
+                    elif kind == "append_rows":
+                        rebased = _drop_appended(later_kind, later_payload, raw)
+                    else:
+                        rebased = later_payload
+                    if rebased is None:
+                        db.execute("DELETE FROM ops WHERE id = ?", (later_id,))
+                        dropped += 1
+                    else:
+                        db.execute(
+                            "UPDATE ops SET payload = ? WHERE id = ?",
+                            (json.dumps(rebased, ensure_ascii=False), later_id),
+                        )
+                db.execute("DELETE FROM ops WHERE id = ?", (op_id,))
+        self._wake.set()
+        return dropped
+
+    # ---------------- flushing ----------------
+    def _next_batch(self, db):
+        """Leading run of pending ops with the same sheet and kind, skipping blocked sheets."""
+        rows = db.execute(
+            "SELECT id, sheet, kind, payload, attempts FROM ops WHERE state = 'pending' "
+            "AND sheet NOT IN (SELECT sheet FROM ops WHERE state = 'failed') ORDER BY id LIMIT 500"
+        ).fetchall()
+        batch = []
+        for row in rows:
+            if batch and ((row[1], row[2]) != (batch[0][1], batch[0][2]) or row[2] == "move_by_id"):
+                break
+            batch.append(row)
+        return batch
+
+    def _send(self, sheet, kind, payload):
+        if kind == "update_cells":
+            self.storage.update_cells(sheet, {(row, col): value for row, col, value in payload})
+        elif kind == "update_by_id":
+            cells = {(row_id, col): value for row_id, col, value in payload["cells"]}
+            update_by_id(self.storage, sheet, payload["column"], cells)
+        elif kind == "delete_by_id":
+            delete_by_id(self.storage, sheet, payload["column"], payload["ids"])
+        elif kind == "move_by_id":
+            move_by_id(self.storage, sheet, payload["column"], payload["ids"],
+                       payload["header"], payload["moves"], payload["writes"])
+        else:
+            getattr(self.storage, kind)(sheet, payload)
+
+    def flush(self):
+        """Send pending operations until the queue is empty or a call fails.
+
+        A retryable failure stops the flush until the backoff has passed; a
+        parked one only stops its worksheet (see `_next_batch`).
+
+        Returns the number of journaled operations that were sent.
+        """
+        sent = 0
+        with self._lock:
+            while True:
+                with self._connect() as db:
+                    batch = self._next_batch(db)
+                if not batch:
+                    return sent
+                ids = [r[0] for r in batch]
+                sheet, kind = batch[0][1], batch[0][2]
+                marks = ", ".join("?" * len(ids))
+                try:
+                    self._send(sheet, kind, _coalesce(kind, [json.loads(r[3]) for r in batch]))
+                except Exception as e:
+                    self.last_error = e
+                    attempts = max(r[4] for r in batch) + 1
+                    state = "pending" if _retryable(e) and attempts < self.max_attempts else "failed"
+                    with self._connect() as db:
+                        db.execute(
+                            f"UPDATE ops SET attempts = ?, error = ?, state = ? WHERE id IN ({marks})",
+                            [attempts, str(e), state] + ids,
+                        )
+                    if state == "pending":
+                        self.retry_at = time.monotonic() + min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+                        return sent
+                    continue
+                with self._connect() as db:
+                    db.execute(f"DELETE FROM ops WHERE id IN ({marks})", ids)
+                sent += len(ids)
+                self.last_error = None
+                self.retry_at = 0.0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if time.monotonic() < self.retry_at:
+                continue
+            try:
+                self.flush()
+            except Exception as e:  # journal unreadable etc.; try again later
+                self.last_error = e
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="yazma-kuyrugu", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()